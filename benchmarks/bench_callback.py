@@ -0,0 +1,287 @@
+"""
+Benchmark of the EVE wrapper callback hot path.
+
+Drives EveWrapper.eve_callback and EveWrapperExt.eve_callback synchronously
+with frames from the offline simulator (synthetic EveProcessedImage and
+FpgaReadJson/EveGetFpgaData data) for every combination of the selected
+settings, and reports per case:
+
+- callback latency p50/p99/mean and callbacks/sec (SDK thread cost)
+- frames/sec published, including the Ext pipeline workers
+- peak traced bytes allocated per callback (tracemalloc, separate pass)
+- per-stage timings of the original conversion chain on the same input
+  (JSON read+parse, astype, cvtColor, resize, imencode, copy)
+
+Results can be saved as JSON and compared against a stored baseline; the exit
+code is 1 when a case regresses by more than the tolerance.
+
+Usage:
+    python benchmarks/bench_callback.py [--wrappers base,ext] [--channels 2,3]
+        [--max-width 800,0] [--users 2,10] [--to-jpg 1] [--copy-image 1]
+        [--frames 200] [--out results.json] [--baseline baseline.json] [--tolerance 0.2]
+"""
+
+import argparse
+import ctypes
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'library'))
+
+import cv2
+import numpy as np
+
+import eve.eve_wrapper as ew
+from eve.eve_python import eve_sdk as sdk
+from eve_sim import EveSimSDK, SyntheticFrames
+
+WRAPPERS = ('base', 'ext')
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+def make_wrapper(kind, toJpg, copyImage, maxWidth, metadataSource='json', pipelineWorkers=1):
+    """Create a wrapper without touching any hardware"""
+    args = dict(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                toJpg=toJpg, copyImage=copyImage, maxWidth=maxWidth, driverPath=ROOT, objectDetection=False)
+    if kind == 'base':
+        return ew.EveWrapper(**args)
+    from eve_wrapper_ext import EveWrapperExt
+    return EveWrapperExt(**args, options={'metadata_source': metadataSource, 'pipeline_workers': pipelineWorkers})
+
+
+def attach(wrapper, sim):
+    """Install the simulator as the SDK and register the wrapper's callback with it"""
+    ew.eve_sdk = sim
+    ew.requested_state = sdk.structs.EveRequestedProcessingState.EVE_REQUESTED_PROCESSING_STATE_CONTINUE
+    sim.CreateEve(None)
+    callback = sdk.EveProcessingCallbackFn(wrapper.eve_callback)
+    sim.EveRegisterDataCallback(callback)
+    return callback
+
+
+def _drain(wrapper):
+    pipeline = getattr(wrapper, '_pipeline', None)
+    if pipeline is not None:
+        pipeline.join(10.0)
+
+
+def _published(wrapper):
+    stats = wrapper.get_pipeline_stats() if hasattr(wrapper, 'get_pipeline_stats') else None
+    if stats is None:
+        return None
+    return stats['processed'] - stats['stale']
+
+
+def time_callbacks(wrapper, sim, frames, warmup=10):
+    """Run the callback `frames` times; returns per-call latencies (ns) and the elapsed time (s)"""
+    for i in range(warmup):
+        sim.deliver(i)
+    _drain(wrapper)
+    published = _published(wrapper)
+    latencies = np.empty(frames, dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(frames):
+        t0 = time.perf_counter_ns()
+        sim.deliver(i)
+        latencies[i] = time.perf_counter_ns() - t0
+    callbacks_elapsed = time.perf_counter() - start
+    _drain(wrapper)
+    elapsed = time.perf_counter() - start
+    if published is not None:
+        published = _published(wrapper) - published
+    else:
+        published = frames
+    return latencies, callbacks_elapsed, elapsed, published
+
+
+def allocations_per_callback(wrapper, sim, frames):
+    """Mean and max peak of traced bytes allocated while one callback (and its processing) runs"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(frames):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            sim.deliver(i)
+            _drain(wrapper)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return float(np.mean(peaks)), int(np.max(peaks))
+
+
+def stage_timings(sim, maxWidth, toJpg, copyImage, iterations):
+    """Median cost (us) of each step of the original conversion chain on the simulator's first frame"""
+    frame = sim._frames[0]
+    text_address = frame.json.ctypes.data
+    text_size = frame.json.size
+    raw = frame.image
+    timings = {}
+
+    def measure(name, fn):
+        samples = np.empty(iterations, dtype=np.int64)
+        for i in range(iterations):
+            t0 = time.perf_counter_ns()
+            result = fn()
+            samples[i] = time.perf_counter_ns() - t0
+        timings[name] = float(np.median(samples)) / 1000.0
+        return result
+
+    measure('read_json', lambda: json.loads(ctypes.string_at(text_address, text_size)))
+    img = measure('astype', lambda: raw.astype(np.uint8))
+    if img.shape[2] == 2:
+        img = measure('cvtColor', lambda: cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV))
+    if maxWidth > 0 and maxWidth / img.shape[1] < 1:
+        scale = maxWidth / img.shape[1]
+        source = img
+        img = measure('resize', lambda: cv2.resize(source, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+    if toJpg:
+        measure('imencode', lambda: cv2.imencode('.jpg', img)[1].tobytes())
+    if copyImage:
+        measure('copy', lambda: img.copy())
+    return timings
+
+
+def run_case(kind, channels, maxWidth, users, toJpg, copyImage, frames, width, height,
+             metadataSource='json', pipelineWorkers=1):
+    sim = EveSimSDK(SyntheticFrames(width=width, height=height, channels=channels, users=users, frames=10), fps=0)
+    wrapper = make_wrapper(kind, toJpg, copyImage, maxWidth, metadataSource, pipelineWorkers)
+    callback = attach(wrapper, sim)
+    try:
+        latencies, callbacks_elapsed, elapsed, published = time_callbacks(wrapper, sim, frames)
+        alloc_mean, alloc_max = allocations_per_callback(wrapper, sim, min(frames, 50))
+        stages = stage_timings(sim, maxWidth, toJpg, copyImage, min(frames, 50))
+    finally:
+        pipeline = getattr(wrapper, '_pipeline', None)
+        if pipeline is not None:
+            pipeline.stop()
+    del callback
+    return {
+        'wrapper': kind,
+        'channels': channels,
+        'max_width': maxWidth,
+        'users': users,
+        'json_bytes': int(sim._frames[0].json.size),
+        'to_jpg': toJpg,
+        'copy_image': copyImage,
+        'metadata_source': metadataSource,
+        'pipeline_workers': pipelineWorkers if kind == 'ext' else None,
+        'frames': frames,
+        'callback_us_p50': _percentile(latencies, 50) / 1000.0,
+        'callback_us_p99': _percentile(latencies, 99) / 1000.0,
+        'callback_us_mean': float(latencies.mean()) / 1000.0,
+        'callbacks_per_sec': frames / callbacks_elapsed if callbacks_elapsed else 0.0,
+        'published_fps': published / elapsed if elapsed else 0.0,
+        'alloc_bytes_per_callback': alloc_mean,
+        'alloc_bytes_per_callback_max': alloc_max,
+        'stages_us': stages,
+    }
+
+
+def case_name(case):
+    name = f"{case['wrapper']}-ch{case['channels']}-w{case['max_width']}-u{case['users']}"
+    name += f"-jpg{int(case['to_jpg'])}-copy{int(case['copy_image'])}"
+    if case['wrapper'] == 'ext':
+        name += f"-{case['metadata_source']}-workers{case['pipeline_workers']}"
+    return name
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        list: one message per regressed metric
+    """
+    regressions = []
+    base_cases = baseline.get('cases', {})
+    for name, case in results['cases'].items():
+        base = base_cases.get(name)
+        if base is None:
+            continue
+        for metric in ('callback_us_p50', 'callback_us_p99', 'alloc_bytes_per_callback'):
+            if base[metric] > 0 and case[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {case[metric]:.1f} > baseline {base[metric]:.1f}")
+        for metric in ('callbacks_per_sec', 'published_fps'):
+            if case[metric] < base[metric] * (1 - tolerance):
+                regressions.append(f"{name}: {metric} {case[metric]:.1f} < baseline {base[metric]:.1f}")
+    return regressions
+
+
+def _ints(text):
+    return [int(value) for value in text.split(',') if value != '']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the EVE wrapper callback hot path")
+    parser.add_argument('--wrappers', default='base,ext', help="wrappers to run: base, ext")
+    parser.add_argument('--channels', default='2,3', help="input channels: 2 (YUYV), 3 (BGR)")
+    parser.add_argument('--max-width', default='800,0', help="max_width values (0 = no scaling)")
+    parser.add_argument('--users', default='2,10', help="users per frame, sets the JSON payload size")
+    parser.add_argument('--to-jpg', default='1', help="to_jpg values (0/1)")
+    parser.add_argument('--copy-image', default='1', help="copy_image values (0/1)")
+    parser.add_argument('--metadata-source', default='json', help="Ext metadata sources: json, binary")
+    parser.add_argument('--pipeline-workers', default='1', help="Ext pipeline worker counts (0 = inline)")
+    parser.add_argument('--width', type=int, default=1600, help="input image width")
+    parser.add_argument('--height', type=int, default=1200, help="input image height")
+    parser.add_argument('--frames', type=int, default=200, help="callbacks per case")
+    parser.add_argument('--out', default=None, help="path of the JSON results file")
+    parser.add_argument('--baseline', default=None, help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    wrappers = [kind for kind in args.wrappers.split(',') if kind]
+    for kind in wrappers:
+        if kind not in WRAPPERS:
+            parser.error(f"unknown wrapper '{kind}', expected one of {WRAPPERS}")
+
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'width': args.width,
+            'height': args.height,
+        },
+        'cases': {},
+    }
+    for kind, channels, maxWidth, users, toJpg, copyImage in itertools.product(
+            wrappers, _ints(args.channels), _ints(args.max_width), _ints(args.users),
+            _ints(args.to_jpg), _ints(args.copy_image)):
+        ext_variants = itertools.product(args.metadata_source.split(','), _ints(args.pipeline_workers))
+        for metadataSource, workers in (ext_variants if kind == 'ext' else [('json', 1)]):
+            case = run_case(kind, channels, maxWidth, users, bool(toJpg), bool(copyImage), args.frames,
+                            args.width, args.height, metadataSource, workers)
+            name = case_name(case)
+            results['cases'][name] = case
+            print(f"{name:55s} p50 {case['callback_us_p50']:8.1f} us  p99 {case['callback_us_p99']:8.1f} us  "
+                  f"{case['published_fps']:7.1f} fps  {case['alloc_bytes_per_callback'] / 1024:8.1f} KiB/cb")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
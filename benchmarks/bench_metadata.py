@@ -0,0 +1,106 @@
+"""
+Benchmark of the metadata paths of the extended EVE wrapper.
+
+Compares, per frame, the JSON text path (FpgaReadJson copy, serial_status scan,
+decode with every installed JSON backend) against the binary path
+(EveGetFpgaData struct copy, serial status read, CFpgaData decode), on a
+synthetic CFpgaData and the equivalent JSON text. The *_tensors timings fill
+the fixed-shape FrameTensors arrays instead of building dictionaries.
+
+Usage:
+    python benchmarks/bench_metadata.py [--users 5] [--iterations 2000] [--out results.json]
+"""
+
+import argparse
+import ctypes
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'library'))
+
+from eve_sim import synthetic_fpga_data
+from fpga_metadata import FPGA_DATA_SIZE, FpgaMetadataFrame, decode_fpga_data
+from frame_tensors import FrameTensors
+from metadata import MetadataFrame, available_decoders, get_decoder
+
+
+def _consume(metadata):
+    """Read the fields tapp.py uses"""
+    pipeline = metadata['pipeline_data']
+    count = pipeline['user_count']
+    for user in pipeline['users']:
+        user['face_id_status'], user['face_data']['distance']
+    return count
+
+
+def _time_per_frame(fn, iterations):
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - start) / iterations / 1000.0
+
+
+def run(users, iterations):
+    data = synthetic_fpga_data(users)
+    address = ctypes.addressof(data)
+    raw = ctypes.string_at(address, FPGA_DATA_SIZE)
+    text = json.dumps(decode_fpga_data(raw)).encode()
+    text_buffer = ctypes.create_string_buffer(text, len(text))
+    text_address = ctypes.addressof(text_buffer)
+
+    results = {
+        'users': users,
+        'iterations': iterations,
+        'json_bytes': len(text),
+        'binary_bytes': FPGA_DATA_SIZE,
+        'us_per_frame': {},
+    }
+    timings = results['us_per_frame']
+
+    # Callback-side cost only (copy + status check, no decode)
+    timings['json_copy_and_check'] = _time_per_frame(
+        lambda: MetadataFrame(ctypes.string_at(text_address, len(text)), 0).is_success(), iterations)
+    timings['binary_copy_and_check'] = _time_per_frame(
+        lambda: FpgaMetadataFrame(ctypes.string_at(address, FPGA_DATA_SIZE), 0).is_success(), iterations)
+
+    # Full cost when every frame is consumed
+    for name in available_decoders():
+        decode = get_decoder(name)
+        timings[f'json_full_{name}'] = _time_per_frame(
+            lambda: _consume(MetadataFrame(ctypes.string_at(text_address, len(text)), 0, decode).parsed()), iterations)
+    timings['binary_full'] = _time_per_frame(
+        lambda: _consume(FpgaMetadataFrame(ctypes.string_at(address, FPGA_DATA_SIZE), 0).parsed()), iterations)
+
+    # Fixed-shape arrays, refilled in place
+    tensors = FrameTensors()
+    timings['json_tensors'] = _time_per_frame(
+        lambda: tensors.fill(MetadataFrame(ctypes.string_at(text_address, len(text)), 0)), iterations)
+    timings['binary_tensors'] = _time_per_frame(
+        lambda: tensors.fill(FpgaMetadataFrame(ctypes.string_at(address, FPGA_DATA_SIZE), 0)), iterations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON vs binary metadata paths")
+    parser.add_argument('--users', type=int, default=5, help="number of users in the synthetic frame")
+    parser.add_argument('--iterations', type=int, default=2000, help="frames per measurement")
+    parser.add_argument('--out', default=None, help="optional path of a JSON results file")
+    args = parser.parse_args()
+
+    results = run(args.users, args.iterations)
+    print(f"Metadata benchmark: {results['users']} users, JSON {results['json_bytes']} bytes, "
+          f"CFpgaData {results['binary_bytes']} bytes")
+    for name, value in results['us_per_frame'].items():
+        print(f"  {name:28}: {value:9.1f} us/frame")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as file_:
+            json.dump(results, file_, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark of the YUYV colour paths of the extended EVE wrapper.
+
+Times, per frame, the JPEG output of a YUYV camera frame through:
+
+- reference: the original cvtColor -> resize -> imencode sequence, allocating
+  every intermediate
+- bgr: the same sequence through ImageConverter's persistent buffers
+- yuv: downscale in the YUV domain, then cvtColor -> imencode
+- yuv_<backend>: downscale in the YUV domain, then JPEG straight from the YUV
+  planes with every installed YUV JPEG backend (no colour conversion)
+- gray: downscale in the YUV domain and keep the Y plane, then imencode
+
+The conversion part alone is reported as *_convert. Each path's output image is
+compared with the reference (PSNR in dB) to show what the YUV-domain downscale
+costs in quality. The yuv_<backend> PSNR also includes the video vs full range
+difference between OpenCV's YUYV conversion and JPEG's YCbCr (see yuv_jpeg), and
+gray is compared with the reference converted to grayscale.
+
+Usage:
+    python benchmarks/bench_yuv.py [--width 1600] [--height 1200] [--max-width 800] [--out results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'library'))
+
+from frame_ring import FrameRing
+from image_converter import ImageConverter
+from yuv_jpeg import YuvJpegEncoder, available_yuv_encoders
+
+
+def colour_yuyv(width, height):
+    """Build a YUYV frame with colour gradients and edges (4:2:2 chroma of a BGR test image)"""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    bgr = np.empty((height, width, 3), dtype=np.uint8)
+    bgr[:, :, 0] = x
+    bgr[:, :, 1] = y
+    bgr[:, :, 2] = (x + y) / 2
+    for i in range(8):
+        cv2.circle(bgr, (width * (i + 1) // 9, height // 2), height // 10, (40 * i, 255 - 30 * i, 128), -1)
+    yuv = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV)
+    yuyv = np.empty((height, width, 2), dtype=np.uint8)
+    yuyv[:, :, 0] = yuv[:, :, 0]
+    yuyv[:, 0::2, 1] = ((yuv[:, 0::2, 1].astype(np.uint16) + yuv[:, 1::2, 1]) // 2).astype(np.uint8)
+    yuyv[:, 1::2, 1] = ((yuv[:, 0::2, 2].astype(np.uint16) + yuv[:, 1::2, 2]) // 2).astype(np.uint8)
+    return yuyv
+
+
+def _time_per_frame(fn, iterations):
+    fn()
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - start) / iterations / 1000.0
+
+
+def _psnr(image, reference):
+    if image.shape[2] == 1:
+        image = image[:, :, 0]
+        reference = cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY)
+    if image.shape[:2] != reference.shape[:2]:
+        image = cv2.resize(image, reference.shape[1::-1], interpolation=cv2.INTER_AREA)
+    return float(cv2.PSNR(np.ascontiguousarray(image), np.ascontiguousarray(reference)))
+
+
+def _reference(raw, size):
+    bgr = cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV)
+    return cv2.resize(bgr, size, interpolation=cv2.INTER_AREA)
+
+
+class _Path:
+    """One colour path: a converter writing into its own rings"""
+
+    def __init__(self, colorPath, maxWidth, keepYuv=False):
+        self.ring = FrameRing(4)
+        self.yuv_ring = FrameRing(4) if keepYuv else None
+        self.converter = ImageConverter(self.ring, maxWidth, colorPath=colorPath, yuvRing=self.yuv_ring)
+
+    def convert(self, raw):
+        slot, yuv_slot = self.converter.convert(raw)
+        image = self.ring.publish(slot, 0)
+        if yuv_slot is not None:
+            image.yuv = self.yuv_ring.publish(yuv_slot, 0)
+        return image
+
+
+def run(width, height, maxWidth, iterations):
+    raw = colour_yuyv(width, height)
+    scale = maxWidth / width if 0 < maxWidth < width else 1.0
+    size = (int(width * scale + 0.5), int(height * scale + 0.5))
+    reference = _reference(raw, size)
+
+    results = {
+        'width': width,
+        'height': height,
+        'max_width': maxWidth,
+        'iterations': iterations,
+        'us_per_frame': {},
+        'psnr_db': {},
+        'jpeg_bytes': {},
+    }
+    timings = results['us_per_frame']
+
+    timings['reference_convert'] = _time_per_frame(lambda: _reference(raw, size), iterations)
+    timings['reference'] = _time_per_frame(lambda: cv2.imencode('.jpg', _reference(raw, size))[1].tobytes(), iterations)
+    results['jpeg_bytes']['reference'] = len(cv2.imencode('.jpg', reference)[1])
+
+    for name in ('bgr', 'yuv', 'gray'):
+        path = _Path(name, maxWidth)
+        timings[f'{name}_convert'] = _time_per_frame(lambda: path.convert(raw), iterations)
+        timings[name] = _time_per_frame(lambda: cv2.imencode('.jpg', path.convert(raw))[1].tobytes(), iterations)
+        image = path.convert(raw)
+        results['psnr_db'][name] = _psnr(image, reference)
+        results['jpeg_bytes'][name] = len(cv2.imencode('.jpg', image)[1])
+
+    path = _Path('yuv', maxWidth, keepYuv=True)
+    for backend in available_yuv_encoders():
+        encoder = YuvJpegEncoder(backend)
+        timings[f'yuv_{backend}'] = _time_per_frame(lambda: encoder.encode(path.convert(raw).yuv), iterations)
+        data = encoder.encode(path.convert(raw).yuv)
+        decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        results['psnr_db'][f'yuv_{backend}'] = _psnr(decoded, reference)
+        results['jpeg_bytes'][f'yuv_{backend}'] = len(data)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BGR vs YUV-domain YUYV processing paths")
+    parser.add_argument('--width', type=int, default=1600, help="input image width")
+    parser.add_argument('--height', type=int, default=1200, help="input image height")
+    parser.add_argument('--max-width', type=int, default=800, help="output max_width (0 = no scaling)")
+    parser.add_argument('--iterations', type=int, default=100, help="frames per measurement")
+    parser.add_argument('--out', default=None, help="optional path of a JSON results file")
+    args = parser.parse_args()
+
+    results = run(args.width, args.height, args.max_width, args.iterations)
+    print(f"YUYV benchmark: {results['width']}x{results['height']} -> max_width {results['max_width']}")
+    for name, value in results['us_per_frame'].items():
+        psnr = results['psnr_db'].get(name)
+        quality = f"  PSNR {psnr:5.1f} dB" if psnr is not None else ""
+        print(f"  {name:20}: {value:9.1f} us/frame{quality}")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as file_:
+            json.dump(results, file_, indent=2)
+
+
+if __name__ == '__main__':
+    main()
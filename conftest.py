@@ -23,6 +23,12 @@ def pytest_addoption(parser):
         choices=["0", "1", "2"],
         help="Metadata saving mode: 0=default, 1=save all, 2=save only fail"
     )
+    parser.addoption(
+        "--record-metadata",
+        action="store",
+        default=None,
+        help="Directory to record a firmware metadata sample into (test_record_metadata_sample)"
+    )
     parser.addoption(
         "--image",
         action="store",
@@ -69,7 +75,7 @@ def eve(request, config):
     without modifying the original library.
     """
     try:
-        from eve_wrapper_ext import EveWrapperExt
+        from eve_wrapper_ext import EveWrapperExt, OPTIONS
     except ImportError as e:
         logging.warning(f"EVE wrapper not available: {e}")
         yield None
@@ -90,18 +96,32 @@ def eve(request, config):
             copyImage=eve_sdk_config.get('copy_image', True),
             maxWidth=eve_sdk_config.get('max_width', 800),
             driverPath=eve_sdk_config.get('driver_path', '/home/lattice/mY_Work/eve-cam/clnx_camDrvEn'),
-            objectDetection=eve_sdk_config.get('object_detection', False)
+            objectDetection=eve_sdk_config.get('object_detection', False),
+            options={key: value for key, value in eve_sdk_config.items() if key in OPTIONS}
         )
         
         # Initialize if hardware is available
         try:
-            # Preload camera driver
-            wrapper.preloadCameraDriver()
+            # Hardware SDK, or the offline simulator (no camera, FPGA or I2C needed)
+            sdk_backend = None
+            if eve_sdk_config.get('backend', 'hardware') == 'sim':
+                from eve_sim import EveSimSDK, SyntheticFrames
+                sim_config = config.get('sim', {})
+                sdk_backend = EveSimSDK(
+                    SyntheticFrames(
+                        width=sim_config.get('width', 1600),
+                        height=sim_config.get('height', 1200),
+                        channels=sim_config.get('channels', 2),
+                        users=sim_config.get('users', 2)),
+                    fps=sim_config.get('fps', 30))
+            else:
+                # Preload camera driver
+                wrapper.preloadCameraDriver()
             
             # Use the metadata camera setting directly from config.yaml
             use_metadata_camera = eve_sdk_config.get('use_metadata_camera', True)
             logging.debug("Initializing EVE wrapper - this should only appear once per test session")
-            wrapper.init(useMetadataCamera=use_metadata_camera)
+            wrapper.init(useMetadataCamera=use_metadata_camera, sdkBackend=sdk_backend)
 
             # Configure features
             features = config.get('features', {})
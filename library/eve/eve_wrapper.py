@@ -461,7 +461,7 @@ class EveWrapper():
             self.readJson()
             processed_image = eve_sdk.EveGetProcessedImage()
             if processed_image.error != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
-                print(f"EveGetProcessedImage() error code: {error}")
+                print(f"EveGetProcessedImage() error code: {processed_image.error}")
             else:
             
                 img = np.ctypeslib.as_array(processed_image.data, shape=(processed_image.height, processed_image.width, processed_image.channels)).astype(np.uint8)
@@ -0,0 +1,174 @@
+"""
+numpy structured dtypes mirroring the generated EVE ctypes structs.
+
+The files under eve/eve_python/structs/ are generated and ctypes-only, and
+walking nested ctypes arrays (CFpgaUserData * EVE_FPGA_MAX_USERS,
+CPoint3i * EVE_FPGA_LANDMARKS, ...) attribute by attribute is slow in Python.
+This module derives an equivalent numpy dtype for any ctypes.Structure, with
+every field offset and size checked against ctypes, and wraps SDK memory as
+zero-copy structured arrays so whole columns (all users' face boxes, all
+landmarks, ...) can be read as single array slices:
+
+    users = as_ndarray(fpgaData.data, structs.CFpgaData)[0]['pipelineData']['userData']
+    boxes = users['faceData']['faceBox']      # (EVE_FPGA_MAX_USERS,) structured
+    xs = users['faceData']['landmarks']['x']  # (EVE_FPGA_MAX_USERS, EVE_FPGA_LANDMARKS)
+"""
+
+import ctypes
+
+import numpy as np
+
+from eve.eve_python import eve_sdk as sdk
+
+structs = sdk.structs
+
+_dtype_cache = {}
+_all_dtypes = None
+
+
+def _is_pointer(ctype):
+    return issubclass(ctype, (ctypes._Pointer, ctypes.c_void_p, ctypes.c_char_p, ctypes.c_wchar_p))
+
+
+def _simple_dtype(ctype):
+    code = ctype._type_
+    if code == 'c':
+        return np.dtype('S1')
+    if code == 'u':
+        return np.dtype('U1')
+    return np.dtype(code)
+
+
+def _struct_dtype(ctype):
+    names, formats, offsets = [], [], []
+    for field in ctype._fields_:
+        if len(field) != 2:
+            raise TypeError(f"{ctype.__name__}.{field[0]}: bit fields have no numpy equivalent")
+        name, field_type = field
+        names.append(name)
+        formats.append(dtype_for(field_type))
+        offsets.append(getattr(ctype, name).offset)
+    dtype = np.dtype({
+        'names': names,
+        'formats': formats,
+        'offsets': offsets,
+        'itemsize': ctypes.sizeof(ctype),
+    })
+    _check_layout(ctype, dtype)
+    return dtype
+
+
+def _check_layout(ctype, dtype):
+    """Verify that every field of the dtype matches the ctypes layout"""
+    if dtype.itemsize != ctypes.sizeof(ctype):
+        raise TypeError(f"{ctype.__name__}: dtype size {dtype.itemsize} != ctypes size {ctypes.sizeof(ctype)}")
+    for name, _ in ctype._fields_:
+        field = getattr(ctype, name)
+        field_dtype, offset = dtype.fields[name][:2]
+        if offset != field.offset or field_dtype.itemsize != field.size:
+            raise TypeError(
+                f"{ctype.__name__}.{name}: dtype offset/size {offset}/{field_dtype.itemsize} "
+                f"!= ctypes {field.offset}/{field.size}")
+
+
+def dtype_for(ctype):
+    """
+    Get the numpy dtype equivalent to a ctypes type.
+
+    Structures and unions become structured dtypes with explicit offsets,
+    arrays become subarray dtypes and pointers become np.uintp.
+
+    Args:
+        ctype: ctypes type (Structure, Union, Array, pointer or simple type)
+
+    Returns:
+        np.dtype: dtype with the same size and field layout as the ctypes type
+
+    Raises:
+        TypeError: if the type cannot be represented or the layouts differ
+    """
+    dtype = _dtype_cache.get(ctype)
+    if dtype is not None:
+        return dtype
+
+    if issubclass(ctype, (ctypes.Structure, ctypes.Union)):
+        dtype = _struct_dtype(ctype)
+    elif issubclass(ctype, ctypes.Array):
+        dtype = np.dtype((dtype_for(ctype._type_), (ctype._length_,)))
+    elif _is_pointer(ctype):
+        dtype = np.dtype(np.uintp)
+    elif issubclass(ctype, ctypes._SimpleCData):
+        dtype = _simple_dtype(ctype)
+    else:
+        raise TypeError(f"No numpy dtype for ctypes type {ctype!r}")
+
+    if dtype.itemsize != ctypes.sizeof(ctype):
+        raise TypeError(f"{ctype.__name__}: dtype size {dtype.itemsize} != ctypes size {ctypes.sizeof(ctype)}")
+    _dtype_cache[ctype] = dtype
+    return dtype
+
+
+def build_dtypes(module=structs):
+    """
+    Build the dtype of every ctypes.Structure defined in a module.
+
+    Args:
+        module: module to scan, defaults to eve_sdk_structs
+
+    Returns:
+        dict: struct name -> np.dtype
+    """
+    dtypes = {}
+    for name, value in vars(module).items():
+        if isinstance(value, type) and issubclass(value, ctypes.Structure) and value is not ctypes.Structure:
+            dtypes[name] = dtype_for(value)
+    return dtypes
+
+
+def all_dtypes():
+    """Get the (cached) dtypes of every struct in eve_sdk_structs"""
+    global _all_dtypes
+    if _all_dtypes is None:
+        _all_dtypes = build_dtypes()
+    return _all_dtypes
+
+
+def as_ndarray(source, ctype, count=1):
+    """
+    Wrap memory holding `count` consecutive `ctype` structs as a zero-copy array.
+
+    Args:
+        source: ctypes pointer, ctypes instance, integer address, or a bytes-like object
+        ctype: ctypes type stored at that memory
+        count: int, number of consecutive structs
+
+    Returns:
+        np.ndarray: structured array of shape (count,). Views of SDK pointers are only
+                    valid while the SDK keeps that memory (e.g. during the data callback);
+                    views of bytes objects are read-only.
+    """
+    dtype = dtype_for(ctype)
+    size = dtype.itemsize * count
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return np.frombuffer(source, dtype=dtype, count=count)
+    if isinstance(source, ctypes._Pointer):
+        if not source:
+            raise ValueError("Cannot wrap a NULL pointer")
+        buffer = (ctypes.c_char * size).from_address(ctypes.addressof(source.contents))
+    elif isinstance(source, int):
+        buffer = (ctypes.c_char * size).from_address(source)
+    else:
+        # ctypes instance: from_buffer keeps it alive as long as the array
+        buffer = (ctypes.c_char * size).from_buffer(source)
+    return np.frombuffer(buffer, dtype=dtype, count=count)
+
+
+def unstructured(array):
+    """
+    View a structured array whose fields all share one type as a plain array.
+
+    CPoint3i, CRect2i, CAngles3f, ... become a trailing axis of their fields, e.g.
+    (n, EVE_FPGA_LANDMARKS) CPoint3i -> (n, EVE_FPGA_LANDMARKS, 3) int32, without copying.
+    """
+    return array[..., None].view(array.dtype[0])
@@ -0,0 +1,353 @@
+"""
+Record and replay of EVE sessions.
+
+SessionRecorder streams what the wrapper reads from the SDK in every callback
+(raw processed image, JSON text or CFpgaData bytes, image timestamp and frame
+time) plus the settings responses popped with PopQueuedSetting() into an
+append-only chunked file. Writing happens on a background thread; the
+callback only copies the SDK buffers.
+
+Recording maps such a file into memory and exposes its frames as zero-copy
+SimFrame views, and ReplaySDK feeds them back through the wrapper's callback
+at the recorded pace or as fast as the wrapper processes them:
+
+    eve.start_recording('session.everec')
+    ...
+    eve.stop_recording()
+
+    eve.init(useMetadataCamera=False, sdkBackend=ReplaySDK('session.everec', speed='max'))
+
+File layout (little endian, chunks 8-byte aligned):
+
+    header : magic 'EVEREC01', version u32, reserved u32
+    chunk  : tag (4 bytes), reserved u32, payload size u64, payload
+      FRAM : frame header, then the image, JSON and CFpgaData payloads
+      SETR : response time (ns) and a raw CFpgaGetSetting struct
+      INDX : frame and setting counts, then the offsets of their chunks
+    trailer: 'EVEINDEX', offset of the INDX chunk u64
+
+The index and trailer are written on close; a file without them (interrupted
+recording) is indexed by scanning its chunks.
+"""
+
+import ctypes
+import mmap
+import struct
+import time
+
+import numpy as np
+
+from eve.eve_python import eve_sdk as sdk
+from eve_sim import EveSimSDK, SimFrame
+from fpga_metadata import FpgaMetadataFrame
+from frame_pipeline import FramePipeline
+
+structs = sdk.structs
+
+MAGIC = b'EVEREC01'
+VERSION = 1
+INDEX_MAGIC = b'EVEINDEX'
+
+FILE_HEADER = struct.Struct('<8sII')
+CHUNK_HEADER = struct.Struct('<4sIQ')
+# callback time (ns), image timestamp, frame time, width, height, channels, image/JSON/CFpgaData sizes
+FRAME_HEADER = struct.Struct('<qqdiiiIII')
+SETTING_HEADER = struct.Struct('<q')
+INDEX_HEADER = struct.Struct('<QQ')
+TRAILER = struct.Struct('<8sQ')
+
+FRAME_TAG = b'FRAM'
+SETTING_TAG = b'SETR'
+INDEX_TAG = b'INDX'
+
+SETTING_SIZE = ctypes.sizeof(structs.CFpgaGetSetting)
+REPLAY_SPEEDS = ('original', 'max')
+
+
+def _padding(size):
+    return -size % 8
+
+
+class _FrameRecord:
+    """One callback's data copied out of the SDK, waiting to be written"""
+
+    __slots__ = ('callback_ns', 'timestamp', 'frame_time', 'shape', 'image', 'json', 'fpga')
+
+    def __init__(self, callback_ns, timestamp, frame_time, shape, image, json, fpga):
+        self.callback_ns = callback_ns
+        self.timestamp = timestamp
+        self.frame_time = frame_time
+        self.shape = shape
+        self.image = image
+        self.json = json
+        self.fpga = fpga
+
+
+class _SettingRecord:
+    """One settings response, waiting to be written"""
+
+    __slots__ = ('time_ns', 'raw')
+
+    def __init__(self, time_ns, raw):
+        self.time_ns = time_ns
+        self.raw = raw
+
+
+class SessionRecorder:
+    """Append-only recorder of callback data and settings responses"""
+
+    def __init__(self, path, queueSize=16):
+        """
+        Args:
+            path: str, file to create (overwritten if it exists)
+            queueSize: int, records buffered for the writer thread before new ones are dropped
+        """
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+        self._offset = FILE_HEADER.size
+        self._frame_offsets = []
+        self._setting_offsets = []
+        self._closed = False
+        self._writer = FramePipeline(self._write, 1, queueSize, 'drop_newest', 'eve-recorder')
+        self._writer.start()
+
+    def record_frame(self, processed_image, metadata, frame_time=0.0):
+        """
+        Copy one callback's data out of the SDK and queue it for writing.
+
+        Must be called from the data callback, while the SDK buffers are valid.
+
+        Args:
+            processed_image: EveProcessedImage, or None if no image was read
+            metadata: MetadataFrame or FpgaMetadataFrame read in this callback, or None
+            frame_time: float, EveGetProcessedFrameTime() value
+
+        Returns:
+            bool: False if the record was dropped because the writer fell behind
+        """
+        callback_ns = time.monotonic_ns()
+        image = None
+        shape = (0, 0, 0)
+        timestamp = 0
+        if processed_image is not None and processed_image.error == structs.EveError.EVE_ERROR_NO_ERROR:
+            shape = (processed_image.width, processed_image.height, processed_image.channels)
+            image = ctypes.string_at(processed_image.data, shape[0] * shape[1] * shape[2])
+            timestamp = processed_image.timestamp
+        json = fpga = None
+        if metadata is not None:
+            if isinstance(metadata, FpgaMetadataFrame):
+                fpga = metadata.raw
+            else:
+                json = metadata.raw
+        return self._writer.submit(_FrameRecord(callback_ns, timestamp, frame_time, shape, image, json, fpga))
+
+    def record_setting(self, setting):
+        """Queue a settings response (CFpgaGetSetting) for writing"""
+        return self._writer.submit(_SettingRecord(time.monotonic_ns(), bytes(setting)))
+
+    def stats(self):
+        """
+        Get recorder counters.
+
+        Returns:
+            dict: frames and settings written, bytes written and records dropped
+        """
+        writer = self._writer.stats()
+        return {
+            'path': self.path,
+            'frames': len(self._frame_offsets),
+            'settings': len(self._setting_offsets),
+            'bytes': self._offset,
+            'dropped': writer['dropped'],
+            'errors': writer['errors'],
+        }
+
+    def close(self, timeout=10.0):
+        """
+        Write the queued records, the index and the trailer, and close the file.
+
+        Returns:
+            dict: final counters, see stats()
+        """
+        if self._closed:
+            return self.stats()
+        self._writer.join(timeout)
+        self._writer.stop()
+        self._closed = True
+
+        index_offset = self._offset
+        offsets = np.array(self._frame_offsets + self._setting_offsets, dtype='<u8')
+        self._chunk(INDEX_TAG, INDEX_HEADER.pack(len(self._frame_offsets), len(self._setting_offsets)), offsets.tobytes())
+        self._file.write(TRAILER.pack(INDEX_MAGIC, index_offset))
+        self._offset += TRAILER.size
+        self._file.close()
+        return self.stats()
+
+    def _chunk(self, tag, *parts):
+        """Append a chunk whose payload is `parts`, each padded to 8 bytes; returns its offset"""
+        size = sum(len(part) + _padding(len(part)) for part in parts)
+        offset = self._offset
+        self._file.write(CHUNK_HEADER.pack(tag, 0, size))
+        for part in parts:
+            self._file.write(part)
+            pad = _padding(len(part))
+            if pad:
+                self._file.write(b'\0' * pad)
+        self._offset += CHUNK_HEADER.size + size
+        return offset
+
+    def _write(self, record):
+        if isinstance(record, _SettingRecord):
+            self._setting_offsets.append(self._chunk(SETTING_TAG, SETTING_HEADER.pack(record.time_ns), record.raw))
+            return
+        image = record.image or b''
+        json = record.json or b''
+        fpga = record.fpga or b''
+        width, height, channels = record.shape
+        header = FRAME_HEADER.pack(record.callback_ns, record.timestamp, record.frame_time,
+                                   width, height, channels, len(image), len(json), len(fpga))
+        self._frame_offsets.append(self._chunk(FRAME_TAG, header, image, json, fpga))
+
+
+class Recording:
+    """
+    A recorded session mapped into memory.
+
+    Frames are SimFrame objects whose buffers are read-only numpy views of the
+    mapping, built once when the file is opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an EVE recording")
+        if version != VERSION:
+            raise ValueError(f"Unsupported EVE recording version {version}")
+
+        index = self._read_index()
+        self.indexed = index is not None
+        frame_offsets, setting_offsets = index if index is not None else self._scan()
+        self.frames = [self._frame(offset) for offset in frame_offsets]
+        self.settings = [self._setting(offset) for offset in setting_offsets]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def close(self):
+        self.frames = []
+        self.settings = []
+        self._map.close()
+        self._file.close()
+
+    def _read_index(self):
+        """Offsets of the frame and setting chunks from the trailer's index, or None"""
+        size = len(self._map)
+        if size < FILE_HEADER.size + TRAILER.size:
+            return None
+        magic, offset = TRAILER.unpack_from(self._map, size - TRAILER.size)
+        if magic != INDEX_MAGIC:
+            return None
+        tag, _, _ = CHUNK_HEADER.unpack_from(self._map, offset)
+        if tag != INDEX_TAG:
+            return None
+        start = offset + CHUNK_HEADER.size
+        frames, settings = INDEX_HEADER.unpack_from(self._map, start)
+        offsets = np.frombuffer(self._map, dtype='<u8', count=frames + settings, offset=start + INDEX_HEADER.size)
+        return offsets[:frames].tolist(), offsets[frames:].tolist()
+
+    def _scan(self):
+        """Offsets of the frame and setting chunks, found by walking the chunks"""
+        frames, settings = [], []
+        offset = FILE_HEADER.size
+        size = len(self._map)
+        while offset + CHUNK_HEADER.size <= size:
+            tag, _, length = CHUNK_HEADER.unpack_from(self._map, offset)
+            end = offset + CHUNK_HEADER.size + length
+            if end > size or tag == INDEX_TAG:
+                # Truncated last chunk of an interrupted recording, or end of the chunks
+                break
+            if tag == FRAME_TAG:
+                frames.append(offset)
+            elif tag == SETTING_TAG:
+                settings.append(offset)
+            offset = end
+        return frames, settings
+
+    def _view(self, offset, size):
+        if not size:
+            return None, offset
+        return np.frombuffer(self._map, dtype=np.uint8, count=size, offset=offset), offset + size + _padding(size)
+
+    def _frame(self, offset):
+        offset += CHUNK_HEADER.size
+        (callback_ns, timestamp, frame_time, width, height, channels,
+         image_size, json_size, fpga_size) = FRAME_HEADER.unpack_from(self._map, offset)
+        offset += FRAME_HEADER.size + _padding(FRAME_HEADER.size)
+        image, offset = self._view(offset, image_size)
+        json, offset = self._view(offset, json_size)
+        fpga, offset = self._view(offset, fpga_size)
+        if image is not None:
+            image = image.reshape(height, width, channels)
+        return SimFrame(image, json, fpga, timestamp, frame_time, callback_ns)
+
+    def _setting(self, offset):
+        offset += CHUNK_HEADER.size
+        time_ns, = SETTING_HEADER.unpack_from(self._map, offset)
+        offset += SETTING_HEADER.size + _padding(SETTING_HEADER.size)
+        return time_ns, structs.CFpgaGetSetting.from_buffer_copy(self._map, offset)
+
+
+class ReplaySDK(EveSimSDK):
+    """
+    Simulated SDK replaying a Recording.
+
+    At 'max' speed the replay is lossless: the wrapper's pipeline waits for its
+    workers instead of dropping frames, so every recorded frame is published.
+    At 'original' speed frames are dropped as they would have been live.
+
+    Settings responses are not synthesized: PopQueuedSetting() returns the recorded
+    responses, each one once the first frame recorded after it has been delivered.
+    """
+
+    def __init__(self, recording, speed='original', loop=False):
+        """
+        Args:
+            recording: Recording, or path of a recorded file
+            speed: str, 'original' (recorded frame intervals) or 'max' (back to back, lossless)
+            loop: bool, restart from the first frame at the end of the recording
+        """
+        if speed not in REPLAY_SPEEDS:
+            raise ValueError(f"Unknown replay speed '{speed}', expected one of {REPLAY_SPEEDS}")
+        if isinstance(recording, str):
+            recording = Recording(recording)
+        super().__init__(recording, fps=0, loop=loop)
+        self.recording = recording
+        self._realtime = speed == 'original'
+        self.lossless = not self._realtime
+        self._next_setting = 0
+
+    def _interval(self, index):
+        if not self._realtime or not 0 < index < len(self.recording):
+            return 0.0
+        frames = self.recording.frames
+        return max(0, frames[index].callback_ns - frames[index - 1].callback_ns) / 1e9
+
+    def _respond(self, responseType, pipeline, setting, value):
+        pass
+
+    def _deliver(self, frame):
+        frames = self.recording.frames
+        settings = self.recording.settings
+        if frames and frame is frames[0]:
+            self._next_setting = 0
+        while self._next_setting < len(settings) and settings[self._next_setting][0] <= frame.callback_ns:
+            self._responses.append(settings[self._next_setting][1])
+            self._next_setting += 1
+        return super()._deliver(frame)
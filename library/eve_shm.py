@@ -0,0 +1,432 @@
+"""
+Shared-memory publication of EVE frames for out-of-process consumers.
+
+EVE is a process-wide singleton, so a recorder, web UI or test harness running
+in another process cannot own its own wrapper. ShmPublisher writes every
+published frame (converted image and raw metadata bytes) into a ring of slots
+in a multiprocessing.shared_memory block; ShmReader attaches to it by name and
+hands out zero-copy numpy views:
+
+    eve.start_shm_publisher('eve_frames')
+
+    # other process
+    reader = ShmReader('eve_frames')
+    frame = reader.read_next(timeout=1.0)
+    image = frame.image                  # read-only view into shared memory
+    metadata = frame.metadata().parsed()
+    if not frame.is_valid():             # slot overwritten while it was used
+        ...
+
+Every slot is guarded by a seqlock: the publisher makes the slot's sequence
+odd before writing and even again afterwards. A reader takes the sequence
+before and after building its views and retries when it was odd or changed
+(torn read). Views stay zero-copy, so a consumer that keeps one while the ring
+wraps around sees new data; is_valid() tells whether the slot still holds the
+frame it was read as. The publisher never waits for readers.
+
+numpy has no atomics or fences, so the seqlock counter and the slot data are
+plain memory accesses. x86-64 keeps stores in order and loads in order, which
+is all the seqlock needs; weakly ordered CPUs (ARM) do not, so both sides put a
+lock round trip (_fence) between the counter and the data: its atomic
+acquire/release operations keep the accesses on either side from being
+reordered across it.
+
+Layout (little endian, native alignment):
+
+    header : magic 'EVESHM01', version, slots, slot size, metadata and image
+             capacities, frames published, publisher process id
+    slot   : seqlock u64, frame number, frame id, publish time (monotonic ns),
+             image height/width/channels, metadata kind and size, then the
+             metadata bytes and the image bytes
+"""
+
+import json
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from fpga_metadata import FpgaMetadataFrame
+from metadata import MetadataFrame
+
+MAGIC = b'EVESHM01'
+VERSION = 2
+ALIGN = 64
+
+# 800px wide (default max_width) 4:3 BGR frames, and plenty for large JSON payloads
+DEFAULT_IMAGE_BYTES = 800 * 600 * 3
+DEFAULT_METADATA_BYTES = 256 * 1024
+
+# Metadata kinds: no metadata, FpgaReadJson() text, EveGetFpgaData() CFpgaData bytes
+METADATA_NONE = 0
+METADATA_JSON = 1
+METADATA_FPGA = 2
+
+HEADER_DTYPE = np.dtype({
+    'names': ['magic', 'version', 'slots', 'slot_size', 'metadata_bytes', 'image_bytes', 'published', 'pid'],
+    'formats': ['S8', '<u4', '<u4', '<u8', '<u8', '<u8', '<u8', '<u8'],
+    'offsets': [0, 8, 12, 16, 24, 32, 40, 48],
+    'itemsize': ALIGN,
+})
+
+_SLOT_FIELDS = {
+    'names': ['lock', 'number', 'frame_id', 'published_ns', 'height', 'width', 'channels',
+              'metadata_kind', 'metadata_size'],
+    'formats': ['<u8', '<u8', '<i8', '<i8', '<u4', '<u4', '<u4', '<u4', '<u8'],
+    'offsets': [0, 8, 16, 24, 32, 36, 40, 44, 48],
+}
+
+
+def _aligned(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+_fence_lock = threading.Lock()
+
+
+def _fence():
+    """Memory barrier between the seqlock counter and the slot data (see the module docstring)"""
+    _fence_lock.acquire()
+    _fence_lock.release()
+
+
+def _slot_dtype(slot_size):
+    """Slot header dtype spanning a whole slot, so that an array of it strides over the ring"""
+    return np.dtype(dict(_SLOT_FIELDS, itemsize=slot_size))
+
+
+class _Ring:
+    """Numpy views onto a shared memory block laid out as a frame ring"""
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        if self.header['magic'] != MAGIC:
+            raise ValueError(f"Shared memory '{shm.name}' is not an EVE frame ring")
+        if self.header['version'] != VERSION:
+            raise ValueError(f"Unsupported EVE frame ring version {int(self.header['version'])}")
+        self.slots = int(self.header['slots'])
+        self.slot_size = int(self.header['slot_size'])
+        self.metadata_bytes = int(self.header['metadata_bytes'])
+        self.image_bytes = int(self.header['image_bytes'])
+        self.publisher_pid = int(self.header['pid'])
+        self.slot_headers = np.ndarray((self.slots,), dtype=_slot_dtype(self.slot_size),
+                                       buffer=shm.buf, offset=ALIGN)
+        self.locks = self.slot_headers['lock']
+        self.numbers = self.slot_headers['number']
+
+    def metadata_buffer(self, slot):
+        offset = ALIGN + slot * self.slot_size + ALIGN
+        return np.ndarray((self.metadata_bytes,), dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+
+    def image_buffer(self, slot, shape):
+        offset = ALIGN + slot * self.slot_size + ALIGN + _aligned(self.metadata_bytes)
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+
+    def release(self):
+        # Views must be dropped before the block can be closed
+        self.header = self.slot_headers = self.locks = self.numbers = None
+
+
+class ShmPublisher:
+    """Writes published frames into a shared memory ring"""
+
+    def __init__(self, name, slots=4, imageBytes=DEFAULT_IMAGE_BYTES, metadataBytes=DEFAULT_METADATA_BYTES):
+        """
+        Args:
+            name: str, shared memory name readers attach to (a stale block of that name is replaced)
+            slots: int, frames kept in the ring
+            imageBytes: int, largest image accepted (larger ones are published without image)
+            metadataBytes: int, largest metadata payload accepted
+        """
+        if slots < 2:
+            raise ValueError(f"Shared memory ring needs at least 2 slots, got {slots}")
+        slot_size = ALIGN + _aligned(metadataBytes) + _aligned(imageBytes)
+        size = ALIGN + slots * slot_size
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        header['version'] = VERSION
+        header['slots'] = slots
+        header['slot_size'] = slot_size
+        header['metadata_bytes'] = metadataBytes
+        header['image_bytes'] = imageBytes
+        header['published'] = 0
+        header['pid'] = os.getpid()
+        header['magic'] = MAGIC
+        del header
+        self._ring = _Ring(shm)
+        self._lock = threading.Lock()
+        self._published = 0
+        self._oversize = 0
+
+    @property
+    def name(self):
+        return self._ring.shm.name
+
+    def publish(self, frame_id, metadata, image):
+        """
+        Write a frame into the next slot.
+
+        Args:
+            frame_id: int, frame id of the data
+            metadata: MetadataFrame / FpgaMetadataFrame or None
+            image: ndarray (height, width, channels) uint8 or None
+        """
+        with self._lock:
+            ring = self._ring
+            if ring is None:
+                return
+            raw = metadata.raw if metadata is not None else None
+            if raw is not None and len(raw) > ring.metadata_bytes:
+                self._oversize += 1
+                raw = None
+            if image is not None and image.nbytes > ring.image_bytes:
+                self._oversize += 1
+                image = None
+
+            number = self._published + 1
+            slot = (number - 1) % ring.slots
+            header = ring.slot_headers[slot]
+            ring.locks[slot] += 1
+            _fence()
+            header['number'] = number
+            header['frame_id'] = frame_id
+            header['published_ns'] = time.monotonic_ns()
+            if raw is not None:
+                ring.metadata_buffer(slot)[:len(raw)] = np.frombuffer(raw, dtype=np.uint8)
+                header['metadata_kind'] = METADATA_FPGA if isinstance(metadata, FpgaMetadataFrame) else METADATA_JSON
+                header['metadata_size'] = len(raw)
+            else:
+                header['metadata_kind'] = METADATA_NONE
+                header['metadata_size'] = 0
+            if image is not None:
+                height, width, channels = image.shape if image.ndim == 3 else (*image.shape, 1)
+                np.copyto(ring.image_buffer(slot, image.shape), image)
+                header['height'], header['width'], header['channels'] = height, width, channels
+            else:
+                header['height'] = header['width'] = header['channels'] = 0
+            _fence()
+            ring.locks[slot] += 1
+            ring.header['published'] = number
+            self._published = number
+
+    def stats(self):
+        """
+        Get publisher counters.
+
+        Returns:
+            dict: shared memory name, slots, frames published and payloads too large for a slot
+        """
+        with self._lock:
+            return {
+                'name': self._ring.shm.name if self._ring is not None else None,
+                'slots': self._ring.slots if self._ring is not None else 0,
+                'published': self._published,
+                'oversize': self._oversize,
+            }
+
+    def close(self, unlink=True):
+        """
+        Release the shared memory block.
+
+        Returns:
+            dict: final stats()
+        """
+        stats = self.stats()
+        with self._lock:
+            ring, self._ring = self._ring, None
+        if ring is not None:
+            shm = ring.shm
+            ring.release()
+            shm.close()
+            if unlink:
+                shm.unlink()
+        return stats
+
+
+class ShmFrame:
+    """Zero-copy views onto one ring slot, as read by ShmReader"""
+
+    __slots__ = ('number', 'frame_id', 'published_ns', 'image', 'metadata_kind', 'metadata_bytes',
+                 '_ring', '_slot', '_lock')
+
+    def __init__(self, ring, slot, lock, header):
+        self._ring = ring
+        self._slot = slot
+        self._lock = lock
+        self.number = int(header['number'])
+        self.frame_id = int(header['frame_id'])
+        self.published_ns = int(header['published_ns'])
+        self.metadata_kind = int(header['metadata_kind'])
+        size = int(header['metadata_size'])
+        self.metadata_bytes = ring.metadata_buffer(slot)[:size] if self.metadata_kind != METADATA_NONE else None
+        self.image = None
+        if header['height']:
+            image = ring.image_buffer(slot, (int(header['height']), int(header['width']), int(header['channels'])))
+            image.flags.writeable = False
+            self.image = image
+
+    def is_valid(self):
+        """True while the slot still holds this frame (not being or already overwritten)"""
+        locks = self._ring.locks
+        return locks is not None and int(locks[self._slot]) == self._lock
+
+    def metadata(self, decode=json.loads):
+        """
+        Copy the metadata bytes out of the slot.
+
+        Returns:
+            MetadataFrame: JSON text or CFpgaData bytes parsed on demand, or None
+                           (also when the slot was overwritten meanwhile)
+        """
+        if self.metadata_bytes is None:
+            return None
+        raw = self.metadata_bytes.tobytes()
+        _fence()
+        if not self.is_valid():
+            return None
+        if self.metadata_kind == METADATA_FPGA:
+            return FpgaMetadataFrame(raw, self.frame_id)
+        return MetadataFrame(raw, self.frame_id, decode)
+
+
+class ShmReader:
+    """Attaches to a ShmPublisher ring by name and reads its frames"""
+
+    def __init__(self, name, retries=3, pollInterval=0.001):
+        """
+        Args:
+            name: str, shared memory name of the publisher
+            retries: int, read attempts of a slot being written before giving up
+            pollInterval: float, sleep between checks while waiting for a new frame
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            self._ring = _Ring(shm)
+        except ValueError:
+            shm.close()
+            raise
+        if self._ring.publisher_pid != os.getpid():
+            self._untrack(shm)
+        self._retries = retries
+        self._pollInterval = pollInterval
+        self._last = 0
+        self._read = 0
+        self._missed = 0
+        self._torn = 0
+
+    @property
+    def published(self):
+        """Number of frames published so far"""
+        return int(self._ring.header['published'])
+
+    def read_latest(self):
+        """
+        Read the newest frame.
+
+        Returns:
+            ShmFrame: newest frame, or None if none was published or it could not be read
+        """
+        number = self.published
+        if number == 0:
+            return None
+        return self._read_number(number)
+
+    def read_next(self, timeout=None):
+        """
+        Read the oldest frame not read yet that is still in the ring.
+
+        Frames overwritten before they could be read are counted as missed.
+
+        Args:
+            timeout: float, maximum wait for a new frame in seconds (None waits forever)
+
+        Returns:
+            ShmFrame: next frame, or None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            published = self.published
+            if published > self._last:
+                number = max(self._last + 1, published - self._ring.slots + 2)
+                frame = self._read_number(number)
+                if frame is not None:
+                    return frame
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self._pollInterval)
+
+    def stats(self):
+        """
+        Get reader counters.
+
+        Returns:
+            dict: frames published, read, missed (overwritten unread) and torn reads retried
+        """
+        return {
+            'published': self.published,
+            'read': self._read,
+            'missed': self._missed,
+            'torn': self._torn,
+        }
+
+    def close(self):
+        """Detach from the shared memory (frames read so far must not be used afterwards)"""
+        ring, self._ring = self._ring, None
+        if ring is not None:
+            shm = ring.shm
+            ring.release()
+            shm.close()
+
+    def _read_number(self, number):
+        """Read frame `number` under the slot's seqlock; None if it was overwritten or stays torn"""
+        ring = self._ring
+        slot = (number - 1) % ring.slots
+        for _ in range(self._retries):
+            before = int(ring.locks[slot])
+            if before & 1:
+                self._torn += 1
+                time.sleep(0)
+                continue
+            _fence()
+            header = ring.slot_headers[slot].copy()
+            if int(header['number']) != number:
+                break
+            frame = ShmFrame(ring, slot, before, header)
+            _fence()
+            if int(ring.locks[slot]) != before:
+                self._torn += 1
+                continue
+            self._missed += max(0, number - self._last - 1)
+            self._last = max(self._last, number)
+            self._read += 1
+            return frame
+        # Overwritten (or written continuously): skip past it
+        if number > self._last:
+            self._missed += number - self._last
+            self._last = number
+        return None
+
+    @staticmethod
+    def _untrack(shm):
+        """
+        Keep this process's resource tracker from unlinking the publisher's block at exit.
+
+        Only for a reader in a different process from the publisher: the tracker keeps one
+        registration per name, so unregistering it in the publisher's process would
+        leave its unlink() without one (a KeyError warning from the tracker).
+        """
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
@@ -0,0 +1,557 @@
+"""
+Offline simulator of the EVE SDK.
+
+EveSimSDK implements the interface of eve_sdk.EveSDK in Python so the wrappers
+can run without libEveSDK.so, an FPGA camera or I2C: a callback thread fires the
+registered data callback at a configurable rate, and the callback-only getters
+(FpgaReadJson, EveGetFpgaData, EveGetProcessedImage, ...) return ctypes structs
+pointing into the current frame's buffers, like the native library does.
+
+Frames come from any sequence of SimFrame objects: SyntheticFrames generates
+images and matching JSON/CFpgaData metadata, and recorded sessions can be
+replayed the same way. Settings sent with SendSetSetting() or queried with
+QueryFpgaSettings() are answered through PopQueuedSetting().
+
+    sim = EveSimSDK(SyntheticFrames(width=1600, height=1200, users=3), fps=30)
+    eve.init(useMetadataCamera=False, sdkBackend=sim)
+"""
+
+import collections
+import ctypes
+import json
+import threading
+import time
+
+import numpy as np
+
+from eve.eve_python import eve_sdk as sdk
+from fpga_metadata import FPGA_DATA_SIZE, decode_fpga_data
+
+structs = sdk.structs
+
+NO_ERROR = structs.EveError.EVE_ERROR_NO_ERROR
+
+_SERIAL_READ_TIME_OFFSET = structs.CFpgaData.message.offset + structs.CFpgaMessage.serialReadTimeNano.offset
+
+# Settings reported by the simulated FPGA until changed with SendSetSetting()
+DEFAULT_SETTINGS = {
+    (pipeline, setting): value
+    for pipeline in (structs.pipeline_config_type_t.PT_FD, structs.pipeline_config_type_t.PT_LM_FV,
+                     structs.pipeline_config_type_t.PT_FID, structs.pipeline_config_type_t.PT_PD,
+                     structs.pipeline_config_type_t.PT_HD)
+    for setting, value in ((structs.setting_type_t.CS_ENABLED, 1), (structs.setting_type_t.CS_IPS, 30))
+}
+
+
+class SimFrame:
+    """
+    One simulated frame.
+
+    Attributes:
+        image: (height, width, channels) uint8 ndarray, or None for metadata-only frames
+        json: 1-D uint8 ndarray holding the FpgaReadJson text, or None
+        fpga: 1-D uint8 ndarray holding a CFpgaData struct, or None
+        timestamp: int, EveProcessedImage.timestamp (None: stamped when delivered)
+        frame_time: float, EveGetProcessedFrameTime() value
+        callback_ns: int, monotonic time the frame was delivered when it was recorded, or None
+    """
+
+    __slots__ = ('image', 'json', 'fpga', 'timestamp', 'frame_time', 'callback_ns')
+
+    def __init__(self, image=None, json=None, fpga=None, timestamp=None, frame_time=0.0, callback_ns=None):
+        self.image = image
+        self.json = json
+        self.fpga = fpga
+        self.timestamp = timestamp
+        self.frame_time = frame_time
+        self.callback_ns = callback_ns
+
+
+def synthetic_fpga_data(users, offset=0, width=1600, height=1200):
+    """
+    Build a CFpgaData with `users` fully populated users.
+
+    Args:
+        users: int, number of users (at most EVE_FPGA_MAX_USERS)
+        offset: int, horizontal shift of every user, to make consecutive frames differ
+        width, height: int, image dimensions reported in the pipeline data
+    """
+    data = structs.CFpgaData()
+    data.message.serialStatus = structs.EveFpgaSerialStatus.EVE_FPGA_SUCCESS
+    data.message.serialReadTimeNano = time.monotonic_ns()
+    pipeline = data.pipelineData
+    pipeline.pipelineType = structs.EveFpgaPipelineType.EVE_HMI_PIPELINE
+    pipeline.imageDimensions.width = width
+    pipeline.imageDimensions.height = height
+    pipeline.dataContent.numberOfUsers = users
+    pipeline.dataContent.isUsersDataAvilable = True
+    pipeline.dataContent.isFaceIdDataAvailable = True
+    for i in range(users):
+        user = pipeline.userData[i]
+        user.id = i
+        user.isIdValid = True
+        face = user.faceData
+        face.faceConfidence = 0.9
+        face.faceDistance = 100 + 25 * i
+        face.faceIDStatus = structs.EvePersonRegistrationStatus.EVE_REGISTERED
+        face.isStatusAvailable = True
+        face.anglesICS.yaw = face.anglesCCS.yaw = (offset % 20) - 10.0
+        face.numberOfFaceLandmarkPoints = structs.EVE_FPGA_LANDMARKS
+        left = 200 * i + offset
+        for j in range(structs.EVE_FPGA_LANDMARKS):
+            face.landmarks[j].x = left + 5 * j
+            face.landmarks[j].y = 300 + 3 * j
+            face.landmarks[j].z = 600
+        face.faceBox.left, face.faceBox.top = left, 250
+        face.faceBox.right, face.faceBox.bottom = left + 150, 420
+        person = user.personData
+        person.isPersonDataAvailable = True
+        person.numberOfPersonLandmarkPoints = structs.EVE_FPGA_LANDMARKS
+    return data
+
+
+def synthetic_image(width, height, channels, offset=0):
+    """
+    Build a gradient image with a bright square at `offset`.
+
+    Args:
+        channels: int, 2 for YUYV (as delivered by the FPGA camera), 1 or 3 (BGR)
+    """
+    luma = np.empty((height, width), dtype=np.uint8)
+    luma[:] = (np.arange(width, dtype=np.uint32) * 255 // max(1, width - 1)).astype(np.uint8)
+    size = max(1, min(width, height) // 4)
+    left = offset % max(1, width - size)
+    luma[height // 3:height // 3 + size, left:left + size] = 235
+    if channels == 1:
+        return luma[:, :, None].copy()
+    if channels == 2:
+        image = np.full((height, width, 2), 128, dtype=np.uint8)
+        image[:, :, 0] = luma
+        return image
+    return np.repeat(luma[:, :, None], channels, axis=2)
+
+
+class SyntheticFrames:
+    """Precomputed synthetic frames, generated once so the simulator adds no per-frame cost"""
+
+    def __init__(self, width=1600, height=1200, channels=2, users=2, frames=30, images=4):
+        """
+        Args:
+            width, height, channels: int, processed image format (channels=2 is YUYV)
+            users: int, users in every frame's metadata
+            frames: int, number of distinct metadata frames
+            images: int, number of distinct images, reused across the metadata frames
+        """
+        users = max(0, min(users, structs.EVE_FPGA_MAX_USERS))
+        step = max(1, width // (4 * max(1, images)))
+        pictures = [synthetic_image(width, height, channels, i * step) for i in range(max(1, images))]
+        self._frames = []
+        for i in range(max(1, frames)):
+            data = synthetic_fpga_data(users, 4 * i, width, height)
+            raw = ctypes.string_at(ctypes.addressof(data), FPGA_DATA_SIZE)
+            text = json.dumps(decode_fpga_data(raw)).encode()
+            self._frames.append(SimFrame(
+                image=pictures[i % len(pictures)],
+                json=np.frombuffer(text, dtype=np.uint8),
+                fpga=np.frombuffer(bytearray(raw), dtype=np.uint8),
+            ))
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, index):
+        return self._frames[index]
+
+
+def _camera(index, pid, vid, name):
+    camera = structs.EveCamera()
+    camera.data.id = index
+    camera.data.pid[:len(pid)] = list(pid)
+    camera.data.vid[:len(vid)] = list(vid)
+    camera.data.name[:len(name)] = list(name)
+    camera.data.isFpgaCamera = 1
+    camera.error = NO_ERROR
+    return camera
+
+
+class EveSimSDK:
+    """Drop-in replacement of eve_sdk.EveSDK driven by a frame sequence"""
+
+    # Camera 0 streams images, camera 1 is the metadata-only (sensing) camera
+    STREAM_CAMERA_ID = 0
+    METADATA_CAMERA_ID = 1
+    # True when the callback may wait for the wrapper: its pipeline then blocks instead of dropping frames.
+    # The simulator stands in for a camera, which does not wait.
+    lossless = False
+
+    def __init__(self, frames=None, fps=30.0, loop=True):
+        """
+        Args:
+            frames: sequence of SimFrame, defaults to SyntheticFrames()
+            fps: float, callback rate; 0 fires callbacks back to back
+            loop: bool, restart from the first frame at the end of the sequence
+        """
+        self._frames = frames if frames is not None else SyntheticFrames()
+        self._fps = fps
+        self._loop = loop
+        self._cameras = [
+            _camera(self.STREAM_CAMERA_ID, b'FPGA', b'EVE', b'Simulated FPGA camera'),
+            _camera(self.METADATA_CAMERA_ID, b'DATA', b'META', b'Simulated metadata camera'),
+        ]
+        self._cameraId = -1
+        self._callback = None
+        self._created = False
+        self._thread = None
+        self._stop = threading.Event()
+        self._callback_thread_id = None
+        self._frame = None
+        self._timestamp = 0
+        self._return_data = structs.EveProcessingCallbackReturnData()
+        self._settings = dict(DEFAULT_SETTINGS)
+        self._settings_lock = threading.Lock()
+        self._responses = collections.deque()
+        self.commands = []
+        self.options = {}
+        self.callbacks = 0
+        self.finished = threading.Event()
+
+    # EveCamera.h
+    def EveGetFormats(self, cameraId, filter):
+        formats = structs.EveCameraFormats()
+        image = self._first_image()
+        if image is not None:
+            f = formats.formats[0]
+            f.resolution.width = image.shape[1]
+            f.resolution.height = image.shape[0]
+            f.fps = self._fps
+            formats.formatsCount = 1
+        formats.error = NO_ERROR
+        return formats
+
+    def EveGetCamera(self, cameraId):
+        if 0 <= cameraId < len(self._cameras):
+            return self._cameras[cameraId]
+        return structs.EveCamera(error=structs.EveError.EVE_INVALID_CAMERA_ID)
+
+    def EveSetCamera(self, cameraId, filter):
+        if not 0 <= cameraId < len(self._cameras):
+            return structs.EveError.EVE_INVALID_CAMERA_ID
+        self._cameraId = cameraId
+        return NO_ERROR
+
+    # EveControlInterface.h
+    def CreateEve(self, options):
+        self._created = True
+        return NO_ERROR
+
+    def EveRegisterDataCallback(self, callback):
+        if not self._created:
+            return structs.EveError.EVE_ERROR_NOT_CREATED
+        self._callback = callback
+        return NO_ERROR
+
+    def StartEve(self):
+        if not self._created:
+            return structs.EveError.EVE_ERROR_NOT_CREATED
+        if self._callback is None:
+            return structs.EveError.EVE_ERROR_NO_CALLBACK
+        if self._thread is None:
+            self._stop.clear()
+            self.finished.clear()
+            self._thread = threading.Thread(target=self._run, name='eve-sim-callback', daemon=True)
+            self._thread.start()
+        return NO_ERROR
+
+    def EveSendImageForProcessing(self, image):
+        return NO_ERROR
+
+    def EveSendFpgaDataManually(self, image):
+        return NO_ERROR
+
+    def ShutdownEve(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(5.0)
+        self._thread = None
+        self._created = False
+        return NO_ERROR
+
+    # EveFaceId.h
+    def EveConfigureFaceId(self, options):
+        return self._configure('face_id', options)
+
+    def EveFaceIdCalibrateCurrent(self):
+        return self._command('EveFaceIdCalibrateCurrent')
+
+    def EveFaceIdCalibrateNew(self):
+        return self._command('EveFaceIdCalibrateNew')
+
+    def EveFaceIdForceIdentify(self):
+        return self._command('EveFaceIdForceIdentify')
+
+    def EveFaceIdRemoveCurrent(self):
+        return self._command('EveFaceIdRemoveCurrent')
+
+    def EveFaceIdRemoveAll(self):
+        return self._command('EveFaceIdRemoveAll')
+
+    def EveFaceIdReloadGallery(self):
+        return self._command('EveFaceIdReloadGallery')
+
+    def EveFaceIdCommandWaiting(self):
+        return 0
+
+    def EveGetFaceIdData(self):
+        return structs.EveFaceIdData(error=NO_ERROR)
+
+    # EveFaceTracker.h
+    def EveConfigureFaceTracker(self, mode):
+        self.options['face_tracker'] = mode
+        return NO_ERROR
+
+    # EveFpga.h
+    def EveGetFpgaData(self):
+        data = self._current('fpga')
+        if data is None:
+            return structs.EveFpgaData(error=self._missing_error())
+        return structs.EveFpgaData(data=ctypes.cast(data.ctypes.data, ctypes.POINTER(structs.CFpgaData)), error=NO_ERROR)
+
+    def EveConfigureFpga(self, options):
+        self.options['fpga'] = options
+        options.error = NO_ERROR
+        return options
+
+    def EveConfigureFpgaDebug(self, options):
+        self.options['fpga_debug'] = options
+        options.error = NO_ERROR
+        return options
+
+    def QueryFpgaSetting(self, command, notify):
+        if notify:
+            with self._settings_lock:
+                key = (command.type, command.setting.settingType)
+                self._respond(structs.response_type_t.RT_GET, key[0], key[1], self._settings.get(key, 0))
+        return NO_ERROR
+
+    def QueryFpgaSettings(self, typeMask, settingsMask, notify):
+        if notify:
+            with self._settings_lock:
+                for (pipeline, setting), value in sorted(self._settings.items()):
+                    if typeMask & (1 << pipeline) and settingsMask & (1 << setting):
+                        self._respond(structs.response_type_t.RT_GET, pipeline, setting, value)
+        return NO_ERROR
+
+    def SendSetSetting(self, command):
+        pipeline, setting, value = command.type, command.setting.settingType, command.setting.value
+        with self._settings_lock:
+            if structs.setting_type_t.CS_COMMAND <= setting < structs.setting_type_t.CS_CUSTOM:
+                self.commands.append((pipeline, setting, value))
+            else:
+                self._settings[(pipeline, setting)] = value
+            self._respond(structs.response_type_t.RT_ACK, pipeline, setting, value)
+        return NO_ERROR
+
+    def PopQueuedSetting(self):
+        try:
+            return self._responses.popleft()
+        except IndexError:
+            response = structs.CFpgaGetSetting()
+            response.message.responseType = structs.response_type_t.RT_NONE
+            return response
+
+    def FpgaReadJson(self):
+        text = self._current('json')
+        if text is None:
+            return structs.EveFpgaJsonMetadata(errorCode=self._missing_error())
+        return structs.EveFpgaJsonMetadata(
+            textStart=ctypes.cast(text.ctypes.data, ctypes.POINTER(ctypes.c_byte)),
+            textSize=text.size,
+            errorCode=NO_ERROR)
+
+    # EveKarolinksa.h
+    def EveConfigureKarolinska(self, parameters):
+        return self._configure('karolinska', parameters)
+
+    def EveGetKarolinskaData(self):
+        return structs.EveKarolinskaData(error=NO_ERROR)
+
+    # EveImage.h
+    def EveGetProcessedImage(self):
+        image = self._current('image')
+        if image is None:
+            return structs.EveProcessedImage(error=self._missing_error())
+        return structs.EveProcessedImage(
+            data=ctypes.cast(image.ctypes.data, ctypes.POINTER(ctypes.c_ubyte)),
+            width=image.shape[1], height=image.shape[0], channels=image.shape[2],
+            timestamp=self._timestamp, error=NO_ERROR)
+
+    def EveGetProcessedFrameTime(self):
+        if not self._in_callback():
+            return structs.EveProcessedFrameTime(error=structs.EveError.EVE_ERROR_NOT_ACCESSED_FROM_CALLBACK)
+        return structs.EveProcessedFrameTime(frameTime=self._frame.frame_time, error=NO_ERROR)
+
+    # EveObjectDetection.h
+    def EveConfigureObjectDetection(self, enabled):
+        return self._configure('object_detection', enabled)
+
+    def EveConfigurePersonDetection(self, enabled):
+        return self._configure('person_detection', enabled)
+
+    def EveGetObjectDetectionData(self):
+        return structs.EveDetectionData(error=NO_ERROR)
+
+    def EveCopyObjectDetectionData(self):
+        return structs.EveDetectionData(error=NO_ERROR)
+
+    def EveGetPersonDetectionData(self):
+        return structs.EveDetectionData(error=NO_ERROR)
+
+    def EveCopyPersonDetectionData(self):
+        return structs.EveDetectionData(error=NO_ERROR)
+
+    def DeleteDetectionData(self, data):
+        return NO_ERROR
+
+    # EveROI.h
+    def EveConfigureROIs(self, options):
+        self.options['rois'] = options
+        return NO_ERROR
+
+    def EveGetROIScoreData(self):
+        return structs.EveROIScoreData(error=NO_ERROR)
+
+    # EveHandGesture.h
+    def EveConfigureHandGesture(self, options):
+        return self._configure('hand_gesture', options)
+
+    def EveGetHandGestureData(self):
+        return structs.EveHandGestureData(errorCode=NO_ERROR)
+
+    def EveCopyHandGestureData(self):
+        return structs.EveHandGestureData(errorCode=NO_ERROR)
+
+    def EveDeleteHandGestureData(self, data):
+        return NO_ERROR
+
+    def EveGetStaticGestureDetections(self):
+        return structs.EveStaticGestureData(errorCode=NO_ERROR)
+
+    def EveGetDynamicGestureDetections(self):
+        return structs.EveDynamicGestureData(errorCode=NO_ERROR)
+
+    # Simulator helpers
+    @property
+    def running(self):
+        """True while the callback thread is delivering frames"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_finished(self, timeout=None):
+        """Wait until the callback thread has stopped (end of a non-looping sequence or STOP requested)"""
+        return self.finished.wait(timeout)
+
+    def _first_image(self):
+        for frame in self._frames:
+            if frame.image is not None:
+                return frame.image
+            break
+        return None
+
+    def _in_callback(self):
+        return self._frame is not None and threading.get_ident() == self._callback_thread_id
+
+    def _current(self, name):
+        """Buffer of the frame being delivered, or None outside the callback or when absent"""
+        if not self._in_callback():
+            return None
+        if name == 'image' and self._cameraId == self.METADATA_CAMERA_ID:
+            return None
+        return getattr(self._frame, name)
+
+    def _missing_error(self):
+        if not self._in_callback():
+            return structs.EveError.EVE_ERROR_NOT_ACCESSED_FROM_CALLBACK
+        return structs.EveError.EVE_NO_MORE_DATA
+
+    def _configure(self, name, options):
+        self.options[name] = options
+        for field in ('error', 'errorCode'):
+            if hasattr(options, field):
+                setattr(options, field, NO_ERROR)
+        return options
+
+    def _command(self, name):
+        with self._settings_lock:
+            self.commands.append(name)
+        return NO_ERROR
+
+    def _respond(self, responseType, pipeline, setting, value):
+        response = structs.CFpgaGetSetting()
+        response.message.responseType = responseType
+        response.message.serialStatus = structs.EveFpgaSerialStatus.EVE_FPGA_SUCCESS
+        response.message.serialReadTimeNano = time.monotonic_ns()
+        response.type = pipeline
+        response.setting = setting
+        response.value = value
+        self._responses.append(response)
+
+    def _deliver(self, frame):
+        """Stamp a frame with its delivery time when it has no recorded timestamp"""
+        if frame.timestamp is not None:
+            return frame.timestamp
+        now = time.monotonic_ns()
+        fpga = frame.fpga
+        if fpga is not None and fpga.flags.writeable:
+            ctypes.c_longlong.from_address(fpga.ctypes.data + _SERIAL_READ_TIME_OFFSET).value = now
+        return now
+
+    def _interval(self, index):
+        """Seconds to wait before delivering the frame at `index` (the next one)"""
+        return 1.0 / self._fps if self._fps > 0 else 0.0
+
+    def deliver(self, index):
+        """
+        Fire the registered callback once, synchronously, with the frame at `index`.
+
+        Lets benchmarks and tests drive the callback from their own thread instead
+        of the simulator's callback thread (do not mix both on one instance).
+
+        Returns:
+            bool: False if the callback requested EVE_REQUESTED_PROCESSING_STATE_STOP
+        """
+        if self._callback is None:
+            raise RuntimeError("No data callback registered")
+        frame = self._frames[index % len(self._frames)]
+        self._callback_thread_id = threading.get_ident()
+        self._timestamp = self._deliver(frame)
+        self._frame = frame
+        try:
+            self._callback(ctypes.pointer(self._return_data))
+        finally:
+            self._frame = None
+        self.callbacks += 1
+        return self._return_data.requestedState != structs.EveRequestedProcessingState.EVE_REQUESTED_PROCESSING_STATE_STOP
+
+    def _run(self):
+        next_time = time.perf_counter()
+        index = 0
+        try:
+            while not self._stop.is_set():
+                if index >= len(self._frames):
+                    if not self._loop or not len(self._frames):
+                        break
+                    index = 0
+                if not self.deliver(index):
+                    break
+                index += 1
+
+                interval = self._interval(index)
+                if interval > 0:
+                    next_time += interval
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                    else:
+                        next_time = time.perf_counter()
+        finally:
+            self.finished.set()
@@ -3,8 +3,9 @@ Extended EVE Wrapper with thread-safe improvements and additional functionality.
 This class inherits from the EVE library's EveWrapper without modifying the library itself.
 
 Key enhancements:
-- Thread-safe data access using RLock for concurrent operations
+- Lock-free frame data access: every reader shares the latest immutable FrameRecord
 - Atomic frame data retrieval to ensure consistency
+- Staged frame pipeline with lazy metadata parsing and JPEG encoding
 - Improved shutdown sequence with proper resource cleanup
 - Enhanced error handling and logging
 """
@@ -19,16 +20,248 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'eve'))
 
 from eve.eve_wrapper import EveWrapper
 from eve.eve_python import eve_sdk as sdk
+from frame_pipeline import FramePipeline
+from frame_record import FrameRecord
+from frame_ring import FrameRing
+from image_converter import COLOR_PATHS, ImageConverter
+from jpeg_cache import JpegCache
+from metadata import MetadataFrame, get_decoder, scan_frame_number, scan_serial_status
+from fpga_metadata import (FPGA_DATA_SIZE, FpgaMetadataFrame, read_fpga_bytes, read_serial_read_time,
+                           serial_read_time, serial_status)
+from metadata_ring import MetadataRing, RingFpgaMetadataFrame, RingMetadataFrame
+from perf_stats import PerfStats
+from frame_tensors import FrameTensors
+from frame_timing import FrameTiming
+from frame_sequence import STREAMS, SequenceTracker
+from eve_record import SessionRecorder
+from metadata_triggers import MetadataTriggers
+from frame_hub import FrameHub
+from frame_stream import FrameStream
+from eve_shm import DEFAULT_IMAGE_BYTES, DEFAULT_METADATA_BYTES, ShmPublisher
+from yuv_jpeg import YuvJpegEncoder
+
+# Where frame metadata is read from: FpgaReadJson() text or EveGetFpgaData() struct
+METADATA_SOURCES = ('json', 'binary')
+
+# Options of the extended wrapper and their defaults, named as in config.yaml's eve section
+OPTIONS = {
+    'frame_slots': 4,                   # preallocated image buffers shared with readers
+    'pipeline_workers': 1,              # post-processing threads, 0 processes in the callback
+    'pipeline_queue_size': 2,
+    'pipeline_policy': 'drop_oldest',   # one of frame_pipeline.POLICIES
+    'json_decoder': 'json',             # one of metadata.available_decoders()
+    'metadata_source': 'json',          # one of METADATA_SOURCES
+    'perf_stats': False,                # stage timing histograms, switchable at runtime
+    'latency_window': 300,              # frames of latency statistics, 0 disables them
+    'metadata_only': False,             # metadata ring only, no image path or worker threads
+    'metadata_slots': 32,
+    'color_path': 'bgr',                # one of image_converter.COLOR_PATHS
+    'yuv_jpeg': None,                   # JPEG encoder working on the YUV planes, or None
+    'demand_mode': False,               # process images only when requested
+}
+
+
+def _options(options):
+    """Complete an options mapping with the defaults, rejecting unknown names"""
+    options = dict(options or {})
+    unknown = set(options).difference(OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown options {sorted(unknown)}, expected some of {list(OPTIONS)}")
+    return {**OPTIONS, **options}
+
+
+class _FrameJob:
+    """Data copied out of the SDK by one callback, waiting for post-processing"""
+
+    __slots__ = ('seq', 'metadata', 'raw', 'timing', 'demanded')
+
+    def __init__(self, seq, metadata, raw, timing, demanded=False):
+        self.seq = seq
+        self.metadata = metadata
+        self.raw = raw
+        # (capture_ns, serial_ns, callback_ns, frame_time) for FrameTiming
+        self.timing = timing
+        # The image was read for a pending demand-mode request
+        self.demanded = demanded
+
+
+class _MetadataSample:
+    """JSON text and CFpgaData bytes of one frame, captured on request by the callback"""
+
+    __slots__ = ('event', 'json', 'fpga')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.json = None
+        self.fpga = None
+
+
+class _CallbackPlan:
+    """SDK reads eve_callback performs for each frame, derived from the configuration"""
+
+    __slots__ = ('image', 'gestures')
+
+    def __init__(self, image=True, gestures=True):
+        self.image = image
+        self.gestures = gestures
 
 
 class EveWrapperExt(EveWrapper):
     """Extended EVE Wrapper with thread-safe operations and enhanced functionality"""
     
-    def __init__(self, comport, i2cAdapter, i2cDevice, i2cIRQ, pipelineVersion, evePath, toJpg, copyImage, maxWidth, driverPath, objectDetection):
-        """Initialize the extended wrapper with a thread-safe lock"""
+    def __init__(self, comport, i2cAdapter, i2cDevice, i2cIRQ, pipelineVersion, evePath, toJpg, copyImage, maxWidth, driverPath, objectDetection, options=None):
+        """
+        Initialize the extended wrapper with a thread-safe lock, the frame ring and the post-processing pipeline
+
+        Args:
+            options: mapping of OPTIONS names (the keys of config.yaml's eve section) to values,
+                     missing names take their default
+        """
+        options = _options(options)
         super().__init__(comport, i2cAdapter, i2cDevice, i2cIRQ, pipelineVersion, evePath, toJpg, copyImage, maxWidth, driverPath, objectDetection)
-        # Add reentrant lock for thread safety
+        # Guards consumer state changes (recorder, shm publisher)
         self._data_lock = threading.RLock()
+        # Latest FrameRecord, replaced (never mutated) by the writers and read without a lock.
+        # Writers (pipeline workers, metadata-only and remote callbacks) are serialized by
+        # _publish_lock, which no getter takes.
+        self._record = FrameRecord()
+        self._publish_lock = threading.Lock()
+        # Notified after a publication when someone waits, for wait_for_frame()/wait_for_new_metadata()
+        self._frame_cond = threading.Condition(threading.Lock())
+        self._waiters = 0
+        # Callbacks entered and left, so stop() can wait for the SDK thread to be idle
+        self._callbacks_entered = 0
+        self._callbacks_left = 0
+        # Per-stage timing histograms of the callback and the pipeline
+        self._perf = PerfStats(options['perf_stats'])
+        # Reusable image buffers; published images are read-only views onto them
+        self._image_ring = FrameRing(options['frame_slots'])
+        colorPath = options['color_path']
+        if colorPath not in COLOR_PATHS:
+            raise ValueError(f"Unknown colour path '{colorPath}', expected one of {COLOR_PATHS}")
+        if options['yuv_jpeg'] and colorPath != 'yuv':
+            raise ValueError(f"JPEG encoding from YUV needs the 'yuv' colour path, got '{colorPath}'")
+        # Downscaled YUYV frames, kept alongside the images only to encode JPEGs from them
+        self._yuv_ring = FrameRing(options['frame_slots']) if options['yuv_jpeg'] and toJpg else None
+        self._converter = ImageConverter(self._image_ring, maxWidth, self._perf, colorPath=colorPath,
+                                         yuvRing=self._yuv_ring)
+        # Metadata frames keep the raw JSON or CFpgaData bytes, parsed on demand
+        self._metadataSource = options['metadata_source']
+        if self._metadataSource not in METADATA_SOURCES:
+            raise ValueError(f"Unknown metadata source '{self._metadataSource}', expected one of {METADATA_SOURCES}")
+        self._decode = get_decoder(options['json_decoder'])
+        # Metadata-only mode: metadata frames live in a preallocated ring, no image path
+        self._metadata_ring = MetadataRing(options['metadata_slots']) if options['metadata_only'] else None
+        self._jpeg_cache = JpegCache(yuvEncoder=YuvJpegEncoder(options['yuv_jpeg']) if self._yuv_ring is not None else None)
+        # Staged post-processing: the callback hands raw data to worker threads
+        self._pipelinePolicy = options['pipeline_policy']
+        if self._pipelinePolicy == 'block':
+            raise ValueError("The 'block' pipeline policy would stall the SDK callback, it is only used for lossless replays")
+        self._pipeline = FramePipeline(self._process_frame, options['pipeline_workers'], options['pipeline_queue_size'],
+                                       options['pipeline_policy'], onDrop=self._drop_job)
+        self._raw_ring = FrameRing(options['pipeline_queue_size'] + options['pipeline_workers'] + 1)
+        self._job_seq = 0
+        self._published_seq = 0
+        self._stale_frames = 0
+        self._sdkBackend = None
+        self._recorder = None
+        self._shm = None
+        self._timing = FrameTiming(options['latency_window'])
+        # Stream name -> SequenceTracker (callbacks, metadata, images)
+        self._sequences = {name: SequenceTracker() for name in STREAMS}
+        # Feature name -> enabled, as last requested or reported by the FPGA
+        self._features = {}
+        # Replaced (never mutated) by _update_plan(); read once per callback
+        self._plan = _CallbackPlan()
+        self._triggers = MetadataTriggers()
+        # Demand mode: images are processed only for pending requests or image consumers.
+        # _demand_frames is changed under _demand_lock; the callback reserves one per image
+        # it reads for a request, and gets it back if that image is never published.
+        self._demandMode = options['demand_mode']
+        self._demand_lock = threading.Lock()
+        self._demand_frames = 0
+        self._demand_requests = 0
+        self._demand_skipped = 0
+        # Set by capture_metadata_sample(), taken by the next callback
+        self._sample_request = None
+        # Per-consumer fan-out of published frames; JPEG encodes go through the shared cache.
+        # Metadata-only mode, the inline pipeline and the FPGA plugin path publish from the
+        # SDK callback thread, which must not wait for a 'block' subscriber.
+        from eve.eve_wrapper import LOCAL_PIPELINE
+        publishOnCallback = options['metadata_only'] or not self._pipeline.threaded or not LOCAL_PIPELINE
+        # Image subscribers change what the callback reads: re-plan when subscriptions change
+        self._hub = FrameHub(self._jpeg_cache.get if toJpg else None, allowBlock=not publishOnCallback,
+                             onChange=self._update_plan)
+        if self._metadata_ring is None:
+            self._pipeline.start()
+
+    def init(self, useMetadataCamera: bool, sdkBackend=None):
+        """
+        Initialize EVE, optionally on a given SDK backend.
+
+        Without a backend the library's init loads libEveSDK.so and prepares the camera
+        hardware. With one (e.g. eve_sim.EveSimSDK) only the SDK call sequence is run:
+        no library loading, camera power or ULP pin changes.
+
+        Args:
+            useMetadataCamera: bool, select the metadata (sensing) camera instead of the image one
+            sdkBackend: object implementing the eve_sdk.EveSDK interface, or None for the real SDK
+        """
+        if sdkBackend is None:
+            # The library starts EVE itself: plan the first callbacks from the requested camera
+            self._update_plan(useMetadataCamera)
+            result = super().init(useMetadataCamera)
+            self._update_plan()
+            return result
+
+        import eve.eve_wrapper as ew
+
+        print("Initializing EVE on a custom SDK backend")
+        self._sdkBackend = sdkBackend
+        ew.eve_sdk = sdkBackend
+        # A backend that can be paused (replay at full speed) waits for the workers instead of losing frames
+        self._pipeline.set_policy('block' if getattr(sdkBackend, 'lossless', False) else self._pipelinePolicy)
+        ew.requested_state = sdk.structs.EveRequestedProcessingState.EVE_REQUESTED_PROCESSING_STATE_CONTINUE
+
+        err = sdkBackend.CreateEve(sdk.structs.EveStartupParameters(gpuPreference=sdk.structs.EveGpuPreference.EVE_NO_GPU))
+        if err != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
+            raise RuntimeError(f"CreateEve error code: {err}")
+
+        i = 0
+        while True:
+            cameraInfo = sdkBackend.EveGetCamera(i)
+            if cameraInfo.error == sdk.structs.EveError.EVE_INVALID_CAMERA_ID or cameraInfo.error == sdk.structs.EveError.EVE_NO_MORE_DATA:
+                break
+            if cameraInfo.data.isFpgaCamera == 1:
+                pid = bytes(cameraInfo.data.pid).rstrip(b'\0')
+                vid = bytes(cameraInfo.data.vid).rstrip(b'\0')
+                if self._metaDataFpgaCameraId == -1 and vid == b'META' and pid == b'DATA':
+                    self._metaDataFpgaCameraId = i
+                elif self._fpgaCameraId == -1:
+                    self._fpgaCameraId = i
+            i += 1
+        if self._fpgaCameraId == -1 and self._metaDataFpgaCameraId == -1:
+            raise RuntimeError("No FPGA camera found")
+        self._usedCameraId = self._metaDataFpgaCameraId if useMetadataCamera else self._fpgaCameraId
+
+        formats = sdkBackend.EveGetFormats(self._usedCameraId, sdk.structs.CCameraFormat())
+        cameraFormat = formats.formats[0] if formats.formatsCount > 0 else sdk.structs.CCameraFormat()
+        errorCode = sdkBackend.EveSetCamera(self._usedCameraId, cameraFormat)
+        if errorCode != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
+            raise RuntimeError(f"Could't set camera {errorCode}")
+
+        self.initFpga(useMetadataCamera=useMetadataCamera)
+        self._update_plan()
+
+        ew.callback = sdk.EveProcessingCallbackFn(self.eve_callback)
+        err = sdkBackend.EveRegisterDataCallback(ew.callback)
+        if err != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
+            raise RuntimeError(f"EveRegisterDataCallback error code: {err}")
+        err = sdkBackend.StartEve()
+        if err != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
+            raise RuntimeError(f"StartEve error code: {err}")
+        self.querySettings()
+        print("EVE initialized")
     
     # configure features method
     def set_features(self, features, wait=10):
@@ -47,158 +280,1023 @@ class EveWrapperExt(EveWrapper):
         else:
             self.configure(features)
 
-    # Override getter methods to be thread-safe
+    def configure(self, feats):
+        """Configure the SDK features and update the callback plan"""
+        result = super().configure(feats)
+        self._note_features(feats)
+        return result
+
+    def configureFpga(self, feats):
+        """Configure the FPGA pipelines and update the callback plan"""
+        result = super().configureFpga(feats)
+        self._note_features(feats)
+        return result
+
+    def poll_settings(self):
+        """Apply the queued settings responses and follow the FPGA-reported feature state"""
+        super().poll_settings()
+        for name, state in self.getFpgaState().items():
+            self._features[name] = state.get("enabled", False)
+        self._update_plan()
+
+    def get_callback_plan(self):
+        """
+        Get the per-frame SDK reads of the callback.
+
+        Returns:
+            dict: 'image' (EveGetProcessedImage) and 'gestures' (EveGetStaticGestureDetections)
+        """
+        plan = self._plan
+        return {'image': plan.image, 'gestures': plan.gestures}
+
+    def _note_features(self, feats):
+        for name, f in feats.items():
+            if "enabled" in f:
+                self._features[name] = bool(f["enabled"])
+        self._update_plan()
+
+    def _update_plan(self, useMetadataCamera=None):
+        """
+        Precompute what the callback reads from the SDK for each frame.
+
+        Gestures are read unless hand_landmarks is known to be disabled. The image is
+        read unless the metadata camera or the metadata-only mode is used, or nothing
+        consumes it (no copy_image, to_jpg, image subscription, shared memory publisher
+        or recording).
+
+        Args:
+            useMetadataCamera: bool, camera to plan for before one is selected, or None
+                               to use the selected camera
+        """
+        if useMetadataCamera is None:
+            useMetadataCamera = self.isUsingMetadata()
+        image = (self._metadata_ring is None and not useMetadataCamera
+                 and (self._converts_images() or self._recorder is not None))
+        gestures = self._features.get("hand_landmarks", True)
+        self._plan = _CallbackPlan(image, gestures)
+
+    # Override getter methods to be thread-safe: each reads the latest frame record, lock-free
     def get_frame_id(self):
         """Get the current frame ID in a thread-safe manner"""
-        with self._data_lock:
-            return self._frame_id
+        return self._record.frame_id
     
     def get_json(self):
-        """Get a copy of the JSON metadata in a thread-safe manner"""
-        with self._data_lock:
-            return self._json.copy() if self._json else None
+        """Get a copy of the JSON metadata in a thread-safe manner (parsed on first request)"""
+        return self._metadata_copy(self._record.metadata)
+
+    def get_metadata_frame(self):
+        """
+        Get the latest metadata frame without parsing or copying it.
+
+        Returns:
+            MetadataFrame: raw JSON bytes and frame id, parsed lazily via .parsed()
+        """
+        return self._record.metadata
     
     def get_json_str(self):
-        """Get the JSON string in a thread-safe manner"""
-        with self._data_lock:
-            return self._jsonStr
+        """
+        Get the JSON string in a thread-safe manner.
+
+        With the binary metadata source there is no JSON text from the SDK, so the
+        decoded metadata of the latest frame is serialized instead.
+        """
+        record = self._record
+        if self._metadataSource == 'json' and self._metadata_ring is None:
+            return record.json_str
+        metadata = record.metadata
+        if metadata is None:
+            return record.json_str
+        if self._metadataSource == 'json':
+            return metadata.raw
+        import json
+        return json.dumps(metadata.parsed()).encode()
     
     def get_image_jpg(self):
-        """Get the JPEG-encoded image in a thread-safe manner"""
-        with self._data_lock:
-            return self._image
+        """
+        Get the JPEG-encoded image in a thread-safe manner.
+
+        The latest frame is encoded on the first request for its frame id; later and
+        concurrent requests for the same frame share that single encode.
+        """
+        record = self._record
+        if record.image_view is None or not self._toJpg:
+            return None
+        t = self._perf.start()
+        data = record.jpeg()
+        self._perf.lap('imencode', t)
+        return data
+
+    def get_jpeg_stats(self):
+        """Get lazy JPEG encoding counters (hits, shared in-flight encodes, misses)"""
+        return self._jpeg_cache.stats()
     
     def get_image(self):
-        """Get a copy of the image in a thread-safe manner"""
-        with self._data_lock:
-            return self._imageClone.copy() if self._imageClone is not None else None
+        """
+        Get the latest image in a thread-safe manner.
+
+        Returns a read-only FrameView (tagged with `frame_id`) onto the frame ring
+        instead of a copy; call .copy() on it if a writable image is needed.
+        """
+        return self._record.image
     
     def get_frame_data(self):
         """
         Thread-safe method to get consistent frame data (metadata, image, frame_id) atomically.
         This ensures that the metadata, image, and frame_id all come from the same frame.
+
+        Compatibility shim over get_frame_record(), which returns the same data
+        without building a dictionary and copying the metadata per call.
         
         Returns:
             dict: A dictionary containing:
                 - 'metadata': Copy of JSON metadata (or None)
-                - 'image': Copy of the image (or None)
+                - 'image': Read-only view of the image (or None)
                 - 'frame_id': Current frame ID
         """
-        with self._data_lock:
+        return self._frame_data(self._record, self._record.image)
+
+    def get_frame_record(self):
+        """
+        Get the record of the latest frame, shared with every other reader.
+
+        Returns:
+            FrameRecord: immutable frame ids, timestamps, lazily parsed metadata,
+                         image view and JPEG handle of the latest published frame
+        """
+        return self._record
+
+    def _frame_data(self, record, image):
+        return {
+            'metadata': self._metadata_copy(record.metadata),
+            'image': image,
+            'frame_id': record.frame_id
+        }
+
+    def get_frame_tensors(self, out=None):
+        """
+        Get the latest metadata as fixed-shape per-user numpy arrays.
+
+        Pass the FrameTensors returned by a previous call as `out` to refill it in
+        place; it is left untouched if it already holds the latest frame.
+
+        Args:
+            out: FrameTensors, optional arrays to refill instead of allocating new ones
+
+        Returns:
+            FrameTensors: landmarks, angles, boxes and validity mask of the latest frame
+        """
+        if out is None:
+            out = FrameTensors()
+        while True:
+            metadata = self._record.metadata
+            if metadata is None:
+                out.clear()
+                return out
+            if out.frame_id == metadata.frame_id or out.fill(metadata) is not None:
+                return out
+            # The metadata ring slot was reused meanwhile, so a newer frame has been published
+
+    def wait_for_frame(self, after_id=None, timeout=None):
+        """
+        Block until a frame newer than `after_id` has been published.
+
+        Args:
+            after_id: int, last frame id seen by the caller (default: the current frame id)
+            timeout: float, maximum wait in seconds (None waits forever)
+
+        Returns:
+            dict: get_frame_data() of the new frame, or None on timeout
+        """
+        if after_id is None:
+            after_id = self._record.frame_id
+        record = self._wait_record(lambda record: record.frame_id > after_id, timeout)
+        if record is None:
+            return None
+        return self._frame_data(record, record.image)
+
+    def request_snapshot(self, frames=1, timeout=5.0):
+        """
+        Ask for the image of the next frames and wait for the first one.
+
+        Compatibility shim over request_frame_record().
+
+        Args:
+            frames: int, number of frames whose image should be processed
+            timeout: float, maximum wait in seconds (0 only registers the demand,
+                     None waits forever)
+
+        Returns:
+            dict: 'metadata' (copy), 'image' (read-only view, even without copy_image)
+                  and 'frame_id' of a frame with an image newer than the call, or
+                  None on timeout or when no image is read at all (metadata camera,
+                  metadata-only mode, neither copy_image nor to_jpg)
+        """
+        record = self.request_frame_record(frames, timeout)
+        if record is None:
+            return None
+        return self._frame_data(record, record.image_view)
+
+    def request_frame_record(self, frames=1, timeout=5.0):
+        """
+        Ask for the image of the next frames and wait for the first one.
+
+        In demand mode the callback only processes images while such requests are
+        pending (or an image consumer is active); otherwise this simply waits for
+        the next processed image.
+
+        Args:
+            frames: int, number of frames whose image should be processed
+            timeout: float, maximum wait in seconds (0 only registers the demand,
+                     None waits forever)
+
+        Returns:
+            FrameRecord: record of a frame with an image (image_view, even without
+                         copy_image) newer than the call, or None on timeout or when
+                         no image is read at all (metadata camera, metadata-only mode,
+                         neither copy_image nor to_jpg)
+        """
+        if frames < 1:
+            raise ValueError(f"Snapshot needs at least 1 frame, got {frames}")
+        if not self._plan.image:
+            return None
+        image = self._record.image_view
+        after_id = image.frame_id if image is not None else 0
+        with self._demand_lock:
+            if self._demandMode:
+                self._demand_frames += frames
+            self._demand_requests += 1
+        if timeout == 0:
+            return None
+        return self._wait_record(
+            lambda record: record.image_view is not None and record.image_view.frame_id > after_id, timeout)
+
+    def capture_metadata_sample(self, timeout=5.0):
+        """
+        Read the FpgaReadJson text and the EveGetFpgaData struct of the same frame.
+
+        Both sources are read by the next callback, whatever the metadata source,
+        so the JSON produced by the firmware can be recorded next to the struct it
+        was built from (test fixtures for decode_fpga_data()).
+
+        Args:
+            timeout: float, maximum wait in seconds for the next callback
+
+        Returns:
+            dict: 'json' (bytes) and 'fpga' (CFpgaData bytes), either None when the
+                  SDK had none, or None on timeout
+        """
+        sample = _MetadataSample()
+        self._sample_request = sample
+        if not sample.event.wait(timeout):
+            self._sample_request = None
+            return None
+        return {'json': sample.json, 'fpga': sample.fpga}
+
+    def get_demand_stats(self):
+        """
+        Get the demand mode counters.
+
+        Returns:
+            dict: whether demand mode is on, frames still requested, snapshot
+                  requests, continuous image consumers and callbacks whose image
+                  was skipped for lack of demand
+        """
+        with self._demand_lock:
             return {
-                'metadata': self._json.copy() if self._json else None,
-                'image': self._imageClone.copy() if self._imageClone is not None else None,
-                'frame_id': self._frame_id
+                'demand_mode': self._demandMode,
+                'pending_frames': self._demand_frames,
+                'requests': self._demand_requests,
+                'consumers': self._image_consumers(),
+                'skipped': self._demand_skipped,
             }
-    
-    def readJson(self):
+
+    def _reserve_demand(self):
+        """Take one pending demand-mode frame for the image being read; False when none is pending"""
+        if not self._demand_frames:
+            return False
+        with self._demand_lock:
+            if not self._demand_frames:
+                return False
+            self._demand_frames -= 1
+            return True
+
+    def _return_demand(self):
+        """Give back a reserved frame whose image will not be published"""
+        with self._demand_lock:
+            self._demand_frames += 1
+
+    def _drop_job(self, job):
+        """Pipeline backpressure dropped a job before processing it"""
+        if job.demanded:
+            self._return_demand()
+
+    def _converts_images(self):
+        """Whether read images are converted (getters, JPEGs, image subscriptions or shm)"""
+        return self._copyImage or self._toJpg or self._hub.wants_images or self._shm is not None
+
+    def _image_consumers(self):
+        """Whether a continuous image consumer is active (subscription, shm or recording)"""
+        return self._hub.wants_images or self._shm is not None or self._recorder is not None
+
+    def wait_for_new_metadata(self, timeout=None):
         """
-        Override readJson to return values instead of setting instance variables directly.
-        This allows for atomic updates in the callback function.
-        
+        Block until metadata newer than the current one has been published.
+
+        Args:
+            timeout: float, maximum wait in seconds (None waits forever)
+
+        Returns:
+            dict: copy of the new metadata (as get_json()), or None on timeout
+        """
+        current = self._record.metadata
+        record = self._wait_record(lambda record: record.metadata is not current, timeout)
+        if record is None:
+            return None
+        return self._metadata_copy(record.metadata)
+
+    def _wait_record(self, predicate, timeout):
+        """
+        Wait until the latest frame record satisfies `predicate`.
+
+        Registered waiters make the writers notify _frame_cond after each
+        publication; without waiters the writers never touch it.
+
+        Returns:
+            FrameRecord: the record satisfying the predicate, or None on timeout
+        """
+        with self._frame_cond:
+            self._waiters += 1
+            try:
+                if not self._frame_cond.wait_for(lambda: predicate(self._record), timeout):
+                    return None
+                return self._record
+            finally:
+                self._waiters -= 1
+
+    def _publish(self, record):
+        """Swap in a new frame record and wake the waiters (called with _publish_lock held)"""
+        self._record = record
+        # Checked after the swap: a waiter registering now sees the new record
+        if self._waiters:
+            with self._frame_cond:
+                self._frame_cond.notify_all()
+
+    def add_trigger(self, condition, frames=1, after_id=None):
+        """
+        Register a condition evaluated on every new metadata frame.
+
+        The latest frame counts as the first evaluated frame, so a condition that
+        already holds resolves immediately when frames=1. Pass the frame id read
+        before sending a command as `after_id` to only evaluate frames published
+        after it.
+
+        Args:
+            condition: callable(dict) -> bool, built with metadata_triggers.where(),
+                       any_user(), all_of(), any_of() or not_()
+            frames: int, consecutive frames the condition must hold for
+            after_id: int, only evaluate frames with a newer frame id, or None
+
+        Returns:
+            concurrent.futures.Future: resolved with the FrameRecord completing the run (its
+                                       metadata and the image published with it); cancel it
+                                       to drop the trigger
+        """
+        record = self._record
+        return self._triggers.add(condition, frames, record if record.metadata is not None else None, after_id)
+
+    def wait_until(self, condition, frames=1, timeout=None, after_id=None):
+        """
+        Block until a trigger condition holds (see add_trigger()).
+
+        Returns:
+            FrameRecord: frame completing the run, or None on timeout
+        """
+        import concurrent.futures
+
+        future = self.add_trigger(condition, frames, after_id)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return None
+
+    def get_trigger_stats(self):
+        """Get metadata trigger counters (pending, frames evaluated, resolved)"""
+        return self._triggers.stats()
+
+    def subscribe(self, fields=('metadata', 'image'), depth=1, policy='latest'):
+        """
+        Subscribe a consumer thread to every published frame.
+
+        Frames are shared with the other subscribers: the image is a read-only
+        ring view, the metadata a MetadataFrame parsed on demand and the JPEG
+        bytes are encoded once per frame.
+
+        Args:
+            fields: iterable of 'metadata', 'image' and 'jpeg'
+            depth: int, maximum number of frames queued for this consumer
+            policy: str, 'latest' (keep the newest frame only), 'drop_oldest' or
+                    'block' (the publisher waits for room, up to a timeout; refused
+                    when frames are published from the SDK callback thread: metadata-only
+                    mode, pipeline_workers 0 or the FPGA plugin path)
+
         Returns:
-            tuple: (json_data, frame_id, json_string)
+            Subscription: iterable of HubFrame (frame_id, metadata, image, jpeg) with
+                          get(timeout) and stats(); close() it to unsubscribe
         """
+        return self._hub.subscribe(fields, depth, policy)
+
+    def frames(self, maxsize=1, policy='latest', fields=('metadata', 'image')):
+        """
+        Subscribe an asyncio consumer to every published frame.
+
+        Must be called on the consumer's event loop, e.g.
+        `async for frame in eve.frames(maxsize=4, policy='drop_oldest'):`.
+        Arguments are those of subscribe().
+
+        Returns:
+            FrameStream: async iterator of HubFrame; close() it to unsubscribe
+        """
+        import asyncio
+
+        return FrameStream(asyncio.get_running_loop(), self._hub, fields, maxsize, policy)
+
+    async def next_metadata(self, timeout=None):
+        """
+        Wait on the event loop for the next published metadata.
+
+        Args:
+            timeout: float, maximum wait in seconds (None waits forever)
+
+        Returns:
+            dict: copy of the new metadata (as get_json()), or None on timeout or stop
+        """
+        import asyncio
+
+        stream = self.frames(fields=('metadata',))
+
+        async def first_metadata():
+            async for frame in stream:
+                if frame.metadata is not None:
+                    return frame.metadata
+            return None
+
+        try:
+            metadata = await asyncio.wait_for(first_metadata(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            stream.close()
+        return self._metadata_copy(metadata)
+
+    def get_hub_stats(self):
+        """Get frame hub counters: frames published, per-subscriber queue depth, lag and drops"""
+        return self._hub.stats()
+
+    def _metadata_copy(self, metadata):
+        """Parse (once per frame) and shallow-copy a metadata frame"""
+        if metadata is None:
+            return None
+        parsed = metadata.parsed()
+        return parsed.copy() if parsed else None
+
+    def start_recording(self, path, queueSize=16):
+        """
+        Start streaming every callback's raw image, metadata bytes and timestamps, and
+        the settings responses read by poll_setting(), to a recording file.
+
+        Args:
+            path: str, recording file to create
+            queueSize: int, records buffered for the writer thread before new ones are dropped
+        """
+        recorder = SessionRecorder(path, queueSize)
+        with self._data_lock:
+            previous, self._recorder = self._recorder, recorder
+        self._update_plan()
+        if previous is not None:
+            previous.close()
+
+    def stop_recording(self):
+        """
+        Stop recording and finalize the file.
+
+        Returns:
+            dict: recorder counters (frames, settings, bytes, dropped), or None if not recording
+        """
+        with self._data_lock:
+            recorder, self._recorder = self._recorder, None
+        if recorder is None:
+            return None
+        self._update_plan()
+        return recorder.close()
+
+    def start_shm_publisher(self, name='eve_frames', slots=4, imageBytes=DEFAULT_IMAGE_BYTES,
+                            metadataBytes=DEFAULT_METADATA_BYTES):
+        """
+        Start writing every published frame into a shared memory ring for other processes.
+
+        Args:
+            name: str, shared memory name passed to eve_shm.ShmReader
+            slots: int, frames kept in the ring
+            imageBytes: int, largest converted image accepted (see maxWidth)
+            metadataBytes: int, largest metadata payload accepted
+
+        Returns:
+            str: name of the shared memory block
+        """
+        publisher = ShmPublisher(name, slots, imageBytes, metadataBytes)
+        with self._data_lock:
+            previous, self._shm = self._shm, publisher
+        self._update_plan()
+        if previous is not None:
+            previous.close()
+        return publisher.name
+
+    def stop_shm_publisher(self):
+        """
+        Stop publishing to shared memory and unlink the block.
+
+        Returns:
+            dict: publisher counters (published, oversize), or None if not publishing
+        """
+        with self._data_lock:
+            publisher, self._shm = self._shm, None
+        if publisher is None:
+            return None
+        self._update_plan()
+        return publisher.close()
+
+    def get_perf_stats(self):
+        """Get per-stage callback and pipeline timing histograms (see perf_stats.PerfStats.snapshot())"""
+        return self._perf.snapshot()
+
+    def reset_perf_stats(self):
+        self._perf.reset()
+
+    def set_perf_enabled(self, enabled: bool):
+        """Switch stage timing on or off at runtime"""
+        self._perf.enabled = enabled
+
+    def get_latency_stats(self):
+        """
+        Get rolling latency and skew statistics of the published frames.
+
+        With latency_window 0 the statistics are disabled and the JSON metadata
+        path does not read the FPGA serial read time.
+
+        Returns:
+            dict: per metric (capture_to_callback, serial_to_callback, callback_to_publish,
+                  capture_to_publish, metadata_skew, frame_interval, frame_time) count,
+                  mean, std, min, p50, p99 and max in ms, plus the last frame's timestamps
+                  and the implausible values left out
+        """
+        return self._timing.stats()
+
+    def reset_latency_stats(self):
+        self._timing.reset()
+
+    def get_sequence_stats(self):
+        """
+        Get the callback, metadata and image sequence counters.
+
+        Returns:
+            dict: 'frame_id' plus SequenceTracker.stats() per stream (count, skipped,
+                  duplicates, drop_rate, longest gap, ...), see frame_sequence. In
+                  demand mode images are only read on request, so the 'images' stream
+                  is not tracked (the skipped frames would be counted as drops)
+        """
+        stats = {name: tracker.stats() for name, tracker in self._sequences.items()}
+        stats['frame_id'] = self.get_frame_id()
+        return stats
+
+    def reset_sequence_stats(self):
+        for tracker in self._sequences.values():
+            tracker.reset()
+
+    def get_metadata_history(self):
+        """
+        Get the metadata frames still held by the metadata-only ring.
+
+        Returns:
+            list: MetadataFrame objects, oldest first (parsed on demand), or None
+                  outside the metadata-only mode
+        """
+        ring = self._metadata_ring
+        if ring is None:
+            return None
+        with self._publish_lock:
+            entries = ring.history()
+        return [self._ring_frame(slot, frame_id) for slot, frame_id in entries]
+
+    def get_metadata_ring_stats(self):
+        """Get counters of the metadata-only ring (slots, capacity, frames written), or None"""
+        ring = self._metadata_ring
+        return ring.stats() if ring is not None else None
+
+    def get_ring_stats(self):
+        """Get usage counters of the image frame ring (slots busy, allocations, overflows)"""
+        return self._image_ring.stats()
+
+    def get_conversion_stats(self):
+        """
+        Get the allocation debug counters of the image conversion chain.
+
+        Returns:
+            dict: ImageConverter.stats() (steady_allocations_per_frame should be 0)
+                  plus 'staging_allocations' of the raw staging buffers
+        """
+        stats = self._converter.stats()
+        stats['staging_allocations'] = self._raw_ring.allocations
+        return stats
+
+    def get_pipeline_stats(self):
+        """
+        Get counters of the staged post-processing pipeline.
+
+        Returns:
+            dict: queue counters (submitted, processed, dropped, errors, depth) plus
+                  'stale', frames finished by a worker after a newer one was published
+        """
+        stats = self._pipeline.stats()
+        stats['stale'] = self._stale_frames
+        return stats
+
+    def _stage_image(self, processed_image):
+        """
+        View the SDK image buffer, copying it into a staging slot when worker
+        threads are going to process it after the callback has returned.
+
+        Returns:
+            ndarray: (height, width, channels) raw image
+        """
+        import numpy as np
+
+        raw = np.ctypeslib.as_array(processed_image.data, shape=(processed_image.height, processed_image.width, processed_image.channels))
+        if not self._pipeline.threaded:
+            return raw
+        slot = self._raw_ring.acquire(raw.shape)
+        np.copyto(slot.buffer, raw)
+        return self._raw_ring.publish(slot, None)
+
+    def _convert_image(self, raw):
+        """
+        Convert and rescale a raw image straight into a frame ring slot.
+
+        The raw buffer is only viewed (never copied with astype); the conversion
+        chain writes through persistent scratch buffers into the slot (see
+        image_converter), so the ring slot is the only copy of the converted image.
+
+        Returns:
+            tuple: (_Slot, _Slot) written but unpublished image ring slot (None for
+                   unsupported formats) and YUV ring slot of the frame (or None)
+        """
+        return self._converter.convert(raw)
+
+    def _read_json_bytes(self):
+        """
+        Copy the current FPGA JSON metadata out of the SDK buffer.
+
+        Returns:
+            bytes: raw JSON text, or None if no metadata is available
+        """
+        import ctypes
         # Import eve_sdk from parent's globals
         from eve.eve_wrapper import eve_sdk
-        
+
         if not eve_sdk:
             raise RuntimeError(f"Eve SDK not initialized")
-        
-        tmp_jsonStr_ = tmp_json = None
-        tmp_frame_id = self._frame_id
+
         fpgaJson = eve_sdk.FpgaReadJson()
-        if fpgaJson.textStart:
-            import ctypes
-            import json
-            jsonStr = ctypes.string_at(fpgaJson.textStart, fpgaJson.textSize)
-            tmp_jsonStr_ = jsonStr
-            dataJson = json.loads(jsonStr)
-            if dataJson and dataJson['serial_status'] == 'success':
-                tmp_frame_id += 1            
-                tmp_json = dataJson
-        return tmp_json, tmp_frame_id, tmp_jsonStr_
-    
+        if not fpgaJson.textStart:
+            return None
+        return ctypes.string_at(fpgaJson.textStart, fpgaJson.textSize)
+
+    def _read_metadata(self):
+        """
+        Copy the current frame metadata out of the SDK, without decoding it.
+
+        Returns:
+            MetadataFrame: JSON text or CFpgaData bytes depending on the metadata
+                           source (frame id not assigned yet), or None if unavailable
+        """
+        if self._metadataSource == 'binary':
+            from eve.eve_wrapper import eve_sdk
+
+            if not eve_sdk:
+                raise RuntimeError(f"Eve SDK not initialized")
+            raw = read_fpga_bytes(eve_sdk)
+            return FpgaMetadataFrame(raw, None) if raw is not None else None
+
+        jsonStr = self._read_json_bytes()
+        return MetadataFrame(jsonStr, None, self._decode) if jsonStr is not None else None
+
+    def _process_frame(self, job):
+        """
+        Post-process one callback's data and publish it atomically.
+
+        Runs on a pipeline worker thread (or inline in the callback when the
+        pipeline has no workers): checks the metadata serial status, converts and
+        rescales the image, then publishes the frame's FrameRecord. Metadata
+        decoding and JPEG encoding are left to the getters.
+        Results older than the last published frame are discarded.
+        Metadata triggers and hub subscribers are served after publication,
+        outside the publish lock.
+
+        Args:
+            job: _FrameJob handed over by eve_callback
+        """
+        perf = self._perf
+        start = perf.start()
+        tmp_metadata = slot = yuv_slot = img = None
+        if job.metadata is not None and job.metadata.is_success():
+            tmp_metadata = job.metadata
+        if job.raw is not None and self._converts_images():
+            slot, yuv_slot = self._convert_image(job.raw)
+        # Give the staging slot back as soon as it has been consumed
+        job.raw = None
+
+        # Atomic update of all frame data: one record swap, serialized between workers only
+        t = perf.start()
+        with self._publish_lock:
+            t = perf.lap('lock_wait', t)
+            if job.seq <= self._published_seq:
+                self._stale_frames += 1
+                if job.demanded:
+                    self._return_demand()
+                if slot is not None:
+                    self._image_ring.release(slot)
+                if yuv_slot is not None:
+                    self._yuv_ring.release(yuv_slot)
+                return
+            self._published_seq = job.seq
+
+            # Metadata and image of a job share a single frame id
+            previous = self._record
+            tmp_frame_id = previous.frame_id
+            if tmp_metadata is not None or slot is not None:
+                tmp_frame_id += 1
+            metadata = previous.metadata
+            if tmp_metadata is not None:
+                tmp_metadata.frame_id = tmp_frame_id
+                metadata = tmp_metadata
+            json_str = previous.json_str
+            if job.metadata is not None and self._metadataSource == 'json':
+                json_str = job.metadata.raw
+            capture_ns, serial_ns, callback_ns, frame_time = job.timing
+            image_view, image = previous.image_view, previous.image
+            if slot is not None:
+                img = self._image_ring.publish(slot, tmp_frame_id)
+                if yuv_slot is not None:
+                    img.yuv = self._yuv_ring.publish(yuv_slot, tmp_frame_id)
+                image_view = img
+                if self._copyImage:
+                    image = img
+            else:
+                capture_ns = previous.capture_ns
+            if tmp_metadata is None:
+                serial_ns = previous.serial_ns
+            record = FrameRecord(tmp_frame_id, metadata, json_str, image_view, image, capture_ns, serial_ns,
+                                 callback_ns, time.monotonic_ns(), self._jpeg_cache if self._toJpg else None)
+            self._publish(record)
+        if job.demanded and img is None:
+            # The image could not be converted: the request still waits for one
+            self._return_demand()
+        t = perf.lap('publish', t)
+        capture_ns, serial_ns, callback_ns, frame_time = job.timing
+        self._timing.record(capture_ns, serial_ns, callback_ns, record.publish_ns, frame_time)
+        if tmp_metadata is not None:
+            self._record_metadata_sequence(tmp_metadata.raw, serial_ns)
+        if img is not None and not self._demandMode:
+            self._sequences['images'].record(None, capture_ns)
+
+        if tmp_metadata is not None and self._triggers:
+            self._triggers.evaluate(record)
+            t = perf.lap('triggers', t)
+        if tmp_metadata is not None or img is not None:
+            if self._hub:
+                self._hub.publish(tmp_frame_id, tmp_metadata, img)
+                t = perf.lap('hub', t)
+            shm = self._shm
+            if shm is not None:
+                shm.publish(tmp_frame_id, tmp_metadata, img)
+                perf.lap('shm', t)
+        perf.lap('process', start)
+
     def eve_callback(self, return_data):
         """
-        Override the callback to implement thread-safe data updates.
-        Uses temporary variables and atomic lock-protected assignment.
+        Override the callback to keep the SDK thread's work bounded.
+
+        Only the raw image buffer and metadata bytes are copied here; conversion,
+        scaling, parsing and the atomic lock-protected update happen in
+        _process_frame on the pipeline workers. Which SDK reads are made follows
+        the plan precomputed by _update_plan() whenever the configuration changes.
         """
+        self._callbacks_entered += 1
+        try:
+            self._run_callback(return_data)
+        finally:
+            # Also when the callback raises or exits (e.g. sys.exit() on an SDK error)
+            self._callbacks_left += 1
+
+    def _run_callback(self, return_data):
+        """Body of eve_callback(), between the entered/left counters"""
         # Import required modules and globals
-        import cv2
-        import numpy as np
         import sys
         from eve.eve_wrapper import eve_sdk, LOCAL_PIPELINE, requested_state
         
-        if LOCAL_PIPELINE:
-            tmp_image = tmp_imageClone = None
-            tmp_json, tmp_frame_id, tmp_jsonStr = self.readJson()
-            processed_image = eve_sdk.EveGetProcessedImage()
-            if processed_image.error != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
-                print(f"EveGetProcessedImage() error code: {processed_image.error}")
+        callback_ns = time.monotonic_ns()
+        self._sequences['callbacks'].record(None, callback_ns)
+        perf = self._perf
+        t = start = perf.start()
+        sample = self._sample_request
+        if sample is not None and LOCAL_PIPELINE:
+            self._sample_request = None
+            sample.json = self._read_json_bytes()
+            sample.fpga = read_fpga_bytes(eve_sdk)
+            sample.event.set()
+        if LOCAL_PIPELINE and self._metadata_ring is not None:
+            self._read_metadata_only(eve_sdk, callback_ns)
+            t = perf.lap('metadata_only', t)
+            if self._plan.gestures:
+                self._read_gestures(eve_sdk)
+                t = perf.lap('gestures', t)
             else:
-                img = np.ctypeslib.as_array(processed_image.data, shape=(processed_image.height, processed_image.width, processed_image.channels)).astype(np.uint8)
-                
-                if processed_image.channels == 2:
-                    img = cv2.cvtColor(img, cv2.COLOR_YUV2BGR_YUYV)
-                    
-                if img.shape[2] == 1 or img.shape[2] == 3:
-                    # Rescale to self._maxWidth max width
-                    if self._maxWidth > 0:
-                        scaleFactor = self._maxWidth / processed_image.width
-                        if scaleFactor < 1:
-                            img = cv2.resize(img, (0, 0), fx=scaleFactor, fy=scaleFactor, interpolation=cv2.INTER_AREA)
-                    
-                    if self._toJpg:
-                        tmp_image = cv2.imencode('.jpg', img)[1].tobytes()
-                    if self._copyImage:
-                        tmp_imageClone = img.copy()
-                    tmp_frame_id += 1
-                    #print(f"Frame #{self._frame_id}")
+                self._data = None
+            return_data.contents.requestedState = requested_state
+
+        elif LOCAL_PIPELINE:
+            plan = self._plan
+            raw = capture_ns = processed_image = None
+            metadata = self._read_metadata()
+            t = perf.lap('read_metadata', t)
+            image = plan.image
+            demanded = False
+            if image and self._demandMode:
+                demanded = self._reserve_demand()
+                if not demanded and not self._image_consumers():
+                    self._demand_skipped += 1
+                    image = False
+            if image:
+                processed_image = eve_sdk.EveGetProcessedImage()
+                t = perf.lap('get_image', t)
+                if processed_image.error != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
+                    print(f"EveGetProcessedImage() error code: {processed_image.error}")
+                    if demanded:
+                        self._return_demand()
+                        demanded = False
+                else:
+                    capture_ns = processed_image.timestamp
+                    raw = self._stage_image(processed_image)
+                    t = perf.lap('stage_image', t)
         
             # Gestures only to test:
-            gestures_data = eve_sdk.EveGetStaticGestureDetections()
-            if gestures_data.errorCode != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
-                print(f"EveGetStaticGestureDetections() error code: {gestures_data.errorCode}")
-                sys.exit(gestures_data.errorCode)
-
-            data = gestures_data.gestures
-            if not data.count:
+            if plan.gestures:
+                self._read_gestures(eve_sdk)
+                t = perf.lap('gestures', t)
+            else:
                 self._data = None
-
-            for gesture in data.gestures[:data.count]:
-                if gesture.handId != 0:
-                    self._data = {'hand':{
-                        'available': True,
-                        'gesture': int(self.convert_gesture(gesture.type)) + 1}
-                    }
-                    break
-                    print(f"G: {gesture.handId} ({gesture.type})")
             
             return_data.contents.requestedState = requested_state
 
-            # Atomic update of all frame data under lock
-            with self._data_lock:
-                self._json = tmp_json if tmp_json is not None else self._json
-                self._jsonStr = tmp_jsonStr if tmp_jsonStr is not None else self._jsonStr
-                self._image = tmp_image if tmp_image is not None else self._image
-                self._imageClone = tmp_imageClone if tmp_imageClone is not None else self._imageClone
-                self._frame_id = tmp_frame_id
+            recorder = self._recorder
+            frame_time = None
+            if self._timing.enabled or recorder is not None:
+                # One more SDK call, only for the timing statistics and the recording
+                frameTime = eve_sdk.EveGetProcessedFrameTime()
+                if frameTime.error == sdk.structs.EveError.EVE_ERROR_NO_ERROR:
+                    frame_time = frameTime.frameTime
+            if isinstance(metadata, FpgaMetadataFrame):
+                serial_ns = serial_read_time(metadata.raw)
+            elif self._timing.enabled:
+                # The JSON text has no read time: one more SDK call, only for the timing statistics
+                serial_ns = read_serial_read_time(eve_sdk)
+            else:
+                serial_ns = None
+            t = perf.lap('timestamps', t)
+
+            if recorder is not None:
+                recorder.record_frame(processed_image, metadata, frameTime.frameTime)
+                t = perf.lap('record', t)
+
+            self._job_seq += 1
+            self._pipeline.submit(_FrameJob(self._job_seq, metadata, raw, (capture_ns, serial_ns, callback_ns, frame_time),
+                                            demanded))
+            perf.lap('submit', t)
 
         else:
             import ctypes
-            import json
             
             fpgaJson = eve_sdk.EveFpgaReadJson()
             if fpgaJson.textStart:
                 jsonStr = ctypes.string_at(fpgaJson.textStart, fpgaJson.textSize)
-                with self._data_lock:
-                    self._jsonStr = jsonStr
-                    dataJson = json.loads(jsonStr)
-                    if dataJson and dataJson['serial_status'] == 'success':
-                        self._frame_id += 1
-                        self._json = dataJson
+                metadata = MetadataFrame(jsonStr, None, self._decode)
+                success = metadata.is_success()
+                t = perf.lap('read_metadata', t)
+                with self._publish_lock:
+                    t = perf.lap('lock_wait', t)
+                    previous = self._record
+                    if success:
+                        metadata.frame_id = previous.frame_id + 1
+                        record = FrameRecord(metadata.frame_id, metadata, jsonStr, callback_ns=callback_ns,
+                                             publish_ns=time.monotonic_ns())
+                    else:
+                        record = previous.replace(json_str=jsonStr)
+                    self._publish(record)
+                if success:
+                    self._record_metadata_sequence(jsonStr, None)
+                    self._publish_metadata(record, None, callback_ns)
             return_data.contents.request = requested_state
+        perf.lap('callback', start)
+
+    def _read_gestures(self, eve_sdk):
+        """Read the static gesture detections of the current frame into self._data"""
+        import sys
+
+        gestures_data = eve_sdk.EveGetStaticGestureDetections()
+        if gestures_data.errorCode != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
+            print(f"EveGetStaticGestureDetections() error code: {gestures_data.errorCode}")
+            sys.exit(gestures_data.errorCode)
+
+        data = gestures_data.gestures
+        if not data.count:
+            self._data = None
+
+        for gesture in data.gestures[:data.count]:
+            if gesture.handId != 0:
+                self._data = {'hand':{
+                    'available': True,
+                    'gesture': int(self.convert_gesture(gesture.type)) + 1}
+                }
+                break
+                print(f"G: {gesture.handId} ({gesture.type})")
+
+    def _read_metadata_only(self, eve_sdk, callback_ns):
+        """
+        Metadata-only callback work: copy the metadata into the ring and publish it inline.
+
+        The payload is memmoved from the SDK buffer into the next ring slot and its
+        serial status is checked in place; frames are only copied out of the ring
+        and parsed when a consumer reads them. Only successful frames get a frame id.
+        """
+        import ctypes
+
+        ring = self._metadata_ring
+        if self._metadataSource == 'binary':
+            fpgaData = eve_sdk.EveGetFpgaData()
+            if fpgaData.error != sdk.structs.EveError.EVE_ERROR_NO_ERROR or not fpgaData.data:
+                return
+            slot = ring.write(ctypes.cast(fpgaData.data, ctypes.c_void_p).value, FPGA_DATA_SIZE)
+            data = ring.view(slot)
+            success = serial_status(data) == sdk.structs.EveFpgaSerialStatus.EVE_FPGA_SUCCESS
+            serial_ns = serial_read_time(data)
+        else:
+            fpgaJson = eve_sdk.FpgaReadJson()
+            if not fpgaJson.textStart:
+                return
+            slot = ring.write(ctypes.cast(fpgaJson.textStart, ctypes.c_void_p).value, fpgaJson.textSize)
+            status = scan_serial_status(ring.view(slot))
+            if status is None:
+                # serial_status beyond the scanned prefix: parse a copy
+                status = MetadataFrame(ring.view(slot).tobytes(), None, self._decode).parsed().get('serial_status')
+            success = status == 'success'
+            serial_ns = read_serial_read_time(eve_sdk) if success and self._timing.enabled else None
+        if not success:
+            return
+
+        with self._publish_lock:
+            previous = self._record
+            frame_id = previous.frame_id + 1
+            ring.commit(slot, frame_id)
+            metadata = self._ring_frame(slot, frame_id)
+            record = FrameRecord(frame_id, metadata, previous.json_str, serial_ns=serial_ns,
+                                 callback_ns=callback_ns, publish_ns=time.monotonic_ns())
+            self._publish(record)
+
+        self._record_metadata_sequence(ring.view(slot), serial_ns)
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.record_frame(None, metadata)
+        self._publish_metadata(record, serial_ns, callback_ns)
+
+    def _record_metadata_sequence(self, raw, serial_ns):
+        """Count a published metadata frame, by the JSON payload's frame number if it has one"""
+        number = scan_frame_number(raw) if self._metadataSource == 'json' else None
+        self._sequences['metadata'].record(number, serial_ns)
+
+    def _ring_frame(self, slot, frame_id):
+        if self._metadataSource == 'binary':
+            return RingFpgaMetadataFrame(self._metadata_ring, slot, frame_id)
+        return RingMetadataFrame(self._metadata_ring, slot, frame_id, self._decode)
+
+    def _publish_metadata(self, record, serial_ns, callback_ns):
+        """Serve a metadata-only record published from the callback to timing, triggers, hub and shm"""
+        self._timing.record(None, serial_ns, callback_ns, time.monotonic_ns())
+        self._triggers.evaluate(record)
+        metadata = record.metadata
+        self._hub.publish(metadata.frame_id, metadata, None)
+        shm = self._shm
+        if shm is not None:
+            shm.publish(metadata.frame_id, metadata, None)
     
     def stop(self):
         """
@@ -222,10 +1320,12 @@ class EveWrapperExt(EveWrapper):
             import eve.eve_wrapper as ew
             ew.requested_state = sdk.structs.EveRequestedProcessingState.EVE_REQUESTED_PROCESSING_STATE_STOP
             
-            # Wait for any ongoing callback operations to complete
-            # Use the data lock to ensure callback isn't in the middle of processing
-            with self._data_lock:
-                print("Acquired data lock - safe to shutdown")
+            # Wait for any ongoing callback operations to complete (readers and
+            # writers share no lock, so count the callbacks instead of taking one)
+            if self._wait_callbacks_idle(1.0):
+                print("Callback idle - safe to shutdown")
+            else:
+                print("Callback still running - shutting down anyway")
                 
             # Increased delay to ensure callback thread processes the stop state
             time.sleep(0.5)  # More time for callback to fully process stop signal
@@ -236,16 +1336,41 @@ class EveWrapperExt(EveWrapper):
             if err != sdk.structs.EveError.EVE_ERROR_NO_ERROR:
                 print(f"ShutdownEve error code: {err}")
             
+            # No more callbacks: stop the post-processing workers and the recorder
+            self._pipeline.stop()
+            self.stop_recording()
+            self.stop_shm_publisher()
+            self._triggers.cancel_all()
+            self._hub.close()
+
             # CRITICAL: Wait for EVE to release all video device handles
             # This prevents "media device still in use" errors on media0/media2
-            print("Waiting for video device handles to be released...")
-            time.sleep(2.0)  # Allow kernel time to cleanup video device references
+            if self._sdkBackend is None:
+                print("Waiting for video device handles to be released...")
+                time.sleep(2.0)  # Allow kernel time to cleanup video device references
             
             print("EVE shutdown complete")
         else:
             import eve.eve_wrapper as ew
             ew.requested_state = sdk.structs.EveFpgaConnectionRequest.EVE_FPGA_STOP
     
+    def _wait_callbacks_idle(self, timeout):
+        """Wait until no SDK callback is in progress; False if one still runs after `timeout` s"""
+        deadline = time.monotonic() + timeout
+        while self._callbacks_entered != self._callbacks_left:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def poll_setting(self):
+        """Pop the next queued settings response, recording it when a recording is active"""
+        setting = super().poll_setting()
+        recorder = self._recorder
+        if setting is not None and recorder is not None:
+            recorder.record_setting(setting)
+        return setting
+
     def getFpgaState(self):
         """
         Get the current FPGA state in a user-friendly format.
@@ -0,0 +1,239 @@
+"""
+Binary FPGA metadata path for the extended EVE wrapper.
+
+Instead of letting the SDK serialize the FPGA data to JSON text (FpgaReadJson)
+and parsing it back, the wrapper can copy the CFpgaData struct returned by
+EveGetFpgaData() and decode it into the same dictionary shape consumers read
+from the JSON metadata:
+
+    {
+        'serial_status': 'success',
+        'pipeline_data': {
+            'user_count': 2,
+            'users': [
+                {'id': 0, 'face_id_status': 'registered',
+                 'is_face_id_status_available': True,
+                 'face_data': {'distance': 120.0, ...}, ...},
+                ...
+            ],
+            ...
+        }
+    }
+
+The struct is copied out of the SDK buffer in the callback (a few kilobytes)
+and decoded lazily, like the JSON text.
+"""
+
+import ctypes
+
+import numpy as np
+
+from eve.eve_python import eve_sdk as sdk
+from eve_dtypes import dtype_for, unstructured
+from metadata import MetadataFrame
+
+structs = sdk.structs
+
+FPGA_DATA_SIZE = ctypes.sizeof(structs.CFpgaData)
+FPGA_DATA_DTYPE = dtype_for(structs.CFpgaData)
+_SERIAL_STATUS_OFFSET = structs.CFpgaData.message.offset + structs.CFpgaMessage.serialStatus.offset
+_SERIAL_READ_TIME_OFFSET = structs.CFpgaData.message.offset + structs.CFpgaMessage.serialReadTimeNano.offset
+
+# Status names as they appear in the JSON metadata
+SERIAL_STATUS_NAMES = {
+    status.value: status.name[len('EVE_FPGA_'):].lower()
+    for status in structs.EveFpgaSerialStatus
+}
+FACE_ID_STATUS_NAMES = {
+    status.value: status.name[len('EVE_'):].lower()
+    for status in structs.EvePersonRegistrationStatus
+}
+
+
+def read_fpga_bytes(eve_sdk):
+    """
+    Copy the current CFpgaData struct out of the SDK.
+
+    Args:
+        eve_sdk: EveSDK instance (only valid inside the data callback)
+
+    Returns:
+        bytes: raw CFpgaData, or None if no data is available
+    """
+    fpgaData = eve_sdk.EveGetFpgaData()
+    if fpgaData.error != structs.EveError.EVE_ERROR_NO_ERROR or not fpgaData.data:
+        return None
+    return ctypes.string_at(fpgaData.data, FPGA_DATA_SIZE)
+
+
+def serial_status(raw):
+    """Read message.serialStatus straight from the raw struct bytes"""
+    return ctypes.c_int.from_buffer_copy(raw, _SERIAL_STATUS_OFFSET).value
+
+
+def serial_read_time(raw):
+    """Read message.serialReadTimeNano straight from the raw struct bytes"""
+    return ctypes.c_longlong.from_buffer_copy(raw, _SERIAL_READ_TIME_OFFSET).value
+
+
+def read_serial_read_time(eve_sdk):
+    """
+    Read message.serialReadTimeNano of the current CFpgaData without copying the struct.
+
+    Args:
+        eve_sdk: EveSDK instance (only valid inside the data callback)
+
+    Returns:
+        int: FPGA serial read time (ns), or None if no data is available
+    """
+    fpgaData = eve_sdk.EveGetFpgaData()
+    if fpgaData.error != structs.EveError.EVE_ERROR_NO_ERROR or not fpgaData.data:
+        return None
+    return ctypes.c_longlong.from_address(ctypes.cast(fpgaData.data, ctypes.c_void_p).value + _SERIAL_READ_TIME_OFFSET).value
+
+
+_POINT = ('x', 'y', 'z')
+_ANGLES = ('pitch', 'yaw', 'roll')
+_RECT = ('left', 'top', 'right', 'bottom')
+
+
+def _records(array, names):
+    """Turn the named fields of a structured array into one dict per element"""
+    return [dict(zip(names, values)) for values in unstructured(array).tolist()]
+
+
+def _landmarks(points, counts):
+    """(n, EVE_FPGA_LANDMARKS) CPoint3i array -> per-element [[x, y, z], ...] lists"""
+    xyz = unstructured(points).tolist()
+    return [rows[:max(0, count)] for rows, count in zip(xyz, counts.tolist())]
+
+
+def _users(users):
+    face = users['faceData']
+    person = users['personData']
+    face_landmarks = _landmarks(face['landmarks'], face['numberOfFaceLandmarkPoints'])
+    person_landmarks = _landmarks(person['landmarks'], person['numberOfPersonLandmarkPoints'])
+    centers = _records(face['faceCenter'], _POINT)
+    angles_ics = _records(face['anglesICS'], _ANGLES)
+    angles_ccs = _records(face['anglesCCS'], _ANGLES)
+    face_boxes = _records(face['faceBox'], _RECT)
+    positions = _records(person['position'], _POINT)
+    person_boxes = _records(person['personBox'], _RECT)
+    face_id_status = [FACE_ID_STATUS_NAMES.get(status, 'unknown') for status in face['faceIDStatus'].tolist()]
+
+    columns = zip(
+        users['id'].tolist(), users['isIdValid'].tolist(), users['isIdealUser'].tolist(), users['status'].tolist(),
+        face['faceID'].tolist(), face_id_status, face['isStatusAvailable'].tolist(),
+        face['faceConfidence'].tolist(), face['faceDistance'].tolist(),
+        person['isPersonDataAvailable'].tolist(), person['personConfidence'].tolist(),
+        person['personDistance'].tolist(), person['personPosture'].tolist(),
+    )
+    decoded = []
+    for i, (id_, id_valid, ideal, status, face_id, fid_status, fid_available,
+            face_confidence, face_distance, has_person, person_confidence,
+            person_distance, posture) in enumerate(columns):
+        user = {
+            'id': id_,
+            'is_id_valid': id_valid,
+            'is_ideal_user': ideal,
+            'status': status,
+            'face_id': face_id,
+            'face_id_status': fid_status,
+            'is_face_id_status_available': fid_available,
+            'face_data': {
+                'confidence': face_confidence,
+                'distance': float(face_distance),
+                'center': centers[i],
+                'angles_ics': angles_ics[i],
+                'angles_ccs': angles_ccs[i],
+                'box': face_boxes[i],
+                'landmarks': face_landmarks[i],
+            },
+        }
+        if has_person:
+            user['person_data'] = {
+                'confidence': person_confidence,
+                'distance': float(person_distance),
+                'posture': posture,
+                'position': positions[i],
+                'box': person_boxes[i],
+                'landmarks': person_landmarks[i],
+            }
+        decoded.append(user)
+    return decoded
+
+
+def decode_fpga_data(raw):
+    """
+    Decode raw CFpgaData bytes into the JSON metadata dictionary shape.
+
+    The bytes are viewed through the CFpgaData numpy dtype, so the per-user
+    fields are read column-wise for all users at once.
+
+    Args:
+        raw: bytes, CFpgaData as returned by read_fpga_bytes()
+
+    Returns:
+        dict: metadata with 'serial_status' and 'pipeline_data'
+    """
+    data = np.frombuffer(raw, dtype=FPGA_DATA_DTYPE, count=1)[0]
+    message = data['message']
+    pipeline = data['pipelineData']
+    content = pipeline['dataContent']
+
+    user_count = max(0, min(int(content['numberOfUsers']), structs.EVE_FPGA_MAX_USERS))
+    pipeline_data = {
+        'pipeline_type': int(pipeline['pipelineType']),
+        'image_dimensions': {
+            'width': int(pipeline['imageDimensions']['width']),
+            'height': int(pipeline['imageDimensions']['height']),
+        },
+        'user_count': user_count,
+        'users': _users(pipeline['userData'][:user_count]),
+    }
+    if content['isIdealUserIndexValid']:
+        pipeline_data['ideal_user_index'] = int(content['idealUserIndex'])
+    if content['isNumberOfDetectedFacesAvailable']:
+        pipeline_data['face_count'] = int(content['numberOfDetectedFaces'])
+    if content['isNumberOfDetectedPersonsAvailable']:
+        pipeline_data['person_count'] = int(content['numberOfDetectedPersons'])
+    if content['isFaceIdDataAvailable']:
+        faceId = pipeline['faceId']
+        pipeline_data['face_id'] = {
+            'command': int(faceId['command']),
+            'user_id': int(faceId['userId']),
+            'status_code': int(faceId['statusCode']),
+            'face_id': int(faceId['faceId']),
+            'last_registered_face_id': int(faceId['lastRegisteredFaceID']),
+            'users_in_gallery': int(faceId['usersInGallery']),
+            'gallery_size': int(faceId['gallerySize']),
+        }
+    if content['isObjectDetectionAvailable']:
+        objectData = pipeline['objectData']
+        count = max(0, min(int(objectData['numberOfObjects']), structs.EVE_FPGA_MAX_OBJECT_DETECTION))
+        objects = objectData['objects'][:count]
+        pipeline_data['objects'] = [
+            {'class': objectClass, 'confidence': confidence, 'box': box}
+            for objectClass, confidence, box in zip(
+                objects['objectClass'].tolist(), objects['objectConfidence'].tolist(),
+                _records(objects['objectBox'], _RECT))
+        ]
+
+    return {
+        'serial_status': SERIAL_STATUS_NAMES.get(int(message['serialStatus']), 'unknown'),
+        'serial_read_time_ns': int(message['serialReadTimeNano']),
+        'pipeline_data': pipeline_data,
+    }
+
+
+class FpgaMetadataFrame(MetadataFrame):
+    """Raw CFpgaData bytes of one metadata frame, decoded on first access"""
+
+    __slots__ = ()
+
+    def __init__(self, raw, frame_id):
+        super().__init__(raw, frame_id, decode_fpga_data)
+
+    def is_success(self):
+        """Check message.serialStatus without decoding the struct"""
+        return serial_status(self.raw) == structs.EveFpgaSerialStatus.EVE_FPGA_SUCCESS
@@ -0,0 +1,285 @@
+"""
+Publish/subscribe fan-out of published frames for the extended EVE wrapper.
+
+The wrapper keeps a single "latest" frame for its getters, so a slow reader
+misses frames and a fast one reads the same frame twice. The hub gives every
+consumer its own bounded queue instead:
+
+    sub = eve.subscribe(fields=('metadata',), depth=8, policy='drop_oldest')
+    for frame in sub:                    # or sub.get(timeout)
+        users = frame.metadata.parsed()['pipeline_data']['users']
+
+Each subscription selects the fields it wants ('metadata', 'image', 'jpeg'),
+a queue depth and what happens when its queue is full:
+
+- 'latest': keep only the newest frame (default)
+- 'drop_oldest': discard the oldest queued frame to make room
+- 'block': make the publisher wait for room, up to the hub's block timeout,
+  then fall back to dropping the oldest frame. Only offered when the publisher
+  is a pipeline worker: a hub published from the SDK callback thread refuses
+  'block' subscriptions, as they would stall the callback
+
+Payloads are shared by reference, never copied per subscriber: the image is the
+read-only frame ring view (its slot is reused once the last subscriber drops
+it), the metadata the lazily parsed MetadataFrame, and the JPEG is encoded once
+per frame only when a subscriber asks for it. Frames without any requested
+field are not queued for a subscription.
+"""
+
+import collections
+import threading
+
+FIELDS = ('metadata', 'image', 'jpeg')
+POLICIES = ('latest', 'drop_oldest', 'block')
+
+
+class HubFrame:
+    """One published frame, shared by every subscription with the same fields"""
+
+    __slots__ = ('seq', 'frame_id', 'metadata', 'image', 'jpeg')
+
+    def __init__(self, seq, frame_id, metadata, image, jpeg):
+        self.seq = seq
+        self.frame_id = frame_id
+        self.metadata = metadata
+        self.image = image
+        self.jpeg = jpeg
+
+
+class Subscription:
+    """Bounded queue of frames for one consumer"""
+
+    def __init__(self, hub, fields, depth, policy, notify=None):
+        """
+        Args:
+            hub: FrameHub the subscription belongs to
+            fields: iterable of FIELDS names to receive
+            depth: int, maximum number of queued frames
+            policy: str, overflow policy, one of POLICIES
+            notify: callable invoked (from the publishing thread) after each queued frame
+        """
+        fields = frozenset(fields)
+        unknown = fields.difference(FIELDS)
+        if not fields or unknown:
+            raise ValueError(f"Unknown subscription fields {sorted(unknown)}, expected some of {FIELDS}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown subscription policy '{policy}', expected one of {POLICIES}")
+        if depth < 1:
+            raise ValueError(f"Subscription depth must be at least 1, got {depth}")
+        self.fields = fields
+        self.depth = depth
+        self.policy = policy
+        self._hub = hub
+        self._notify = notify
+        self._cond = threading.Condition(threading.Lock())
+        self._queue = collections.deque()
+        self._closed = False
+        self._offered = 0
+        self._delivered = 0
+        self._dropped = 0
+        self._blocked = 0
+        self._last_seq = hub.seq
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def lag(self):
+        """Frames published by the hub since the last frame this subscription received"""
+        return self._hub.seq - self._last_seq
+
+    def get(self, timeout=None):
+        """
+        Wait for the next frame.
+
+        Args:
+            timeout: float, maximum wait in seconds (None waits forever)
+
+        Returns:
+            HubFrame: next queued frame, or None on timeout or once closed and drained
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue or self._closed, timeout):
+                return None
+            return self._pop()
+
+    def poll(self):
+        """Get the next queued frame without waiting, or None"""
+        with self._cond:
+            return self._pop()
+
+    def close(self):
+        """Unsubscribe; frames already queued can still be read"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._hub._remove(self)
+        if self._notify is not None:
+            self._notify()
+
+    def stats(self):
+        """
+        Get subscription counters.
+
+        Returns:
+            dict: fields, policy, queue depth, lag and frames offered, delivered,
+                  dropped and blocked on
+        """
+        with self._cond:
+            return {
+                'fields': sorted(self.fields),
+                'policy': self.policy,
+                'depth': self.depth,
+                'queued': len(self._queue),
+                'lag': self.lag,
+                'offered': self._offered,
+                'delivered': self._delivered,
+                'dropped': self._dropped,
+                'blocked': self._blocked,
+            }
+
+    def __iter__(self):
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    def _pop(self):
+        if not self._queue:
+            return None
+        frame = self._queue.popleft()
+        self._delivered += 1
+        self._last_seq = frame.seq
+        if self.policy == 'block':
+            self._cond.notify_all()
+        return frame
+
+    def _offer(self, frame, blockTimeout):
+        """Queue a frame according to the policy (publishing thread)"""
+        with self._cond:
+            if self._closed:
+                return
+            self._offered += 1
+            if self.policy == 'latest':
+                self._dropped += len(self._queue)
+                self._queue.clear()
+            elif len(self._queue) >= self.depth:
+                if self.policy == 'block':
+                    self._blocked += 1
+                    self._cond.wait_for(lambda: len(self._queue) < self.depth or self._closed, blockTimeout)
+                    if self._closed:
+                        return
+                if len(self._queue) >= self.depth:
+                    self._queue.popleft()
+                    self._dropped += 1
+            self._queue.append(frame)
+            self._cond.notify_all()
+        if self._notify is not None:
+            self._notify()
+
+
+class FrameHub:
+    """Fans published frames out to the subscriptions"""
+
+    def __init__(self, encodeJpeg=None, blockTimeout=1.0, allowBlock=True, onChange=None):
+        """
+        Args:
+            encodeJpeg: callable(image) -> bytes, used once per frame for 'jpeg'
+                        subscribers (None disables the field)
+            blockTimeout: float, longest wait of the publisher on a 'block' subscription
+            allowBlock: bool, whether 'block' subscriptions are accepted (False when
+                        the publisher must never wait, e.g. the SDK callback thread)
+            onChange: callable() run after a subscription was added or removed
+        """
+        self._encodeJpeg = encodeJpeg
+        self._blockTimeout = blockTimeout
+        self._allowBlock = allowBlock
+        self._onChange = onChange
+        self._lock = threading.Lock()
+        # Replaced (never mutated) under the lock, read without it by publish()
+        self._subscriptions = ()
+        # Whether a subscription receives images or JPEGs, updated with the subscriptions
+        self.wants_images = False
+        self.seq = 0
+
+    def __bool__(self):
+        return bool(self._subscriptions)
+
+    def subscribe(self, fields=('metadata', 'image'), depth=1, policy='latest', notify=None):
+        """
+        Add a subscription.
+
+        Returns:
+            Subscription: see Subscription for the arguments; close() it to unsubscribe
+
+        Raises:
+            ValueError: for a 'block' subscription on a hub that does not allow them
+        """
+        if policy == 'block' and not self._allowBlock:
+            raise ValueError("'block' subscriptions are not available: frames are published "
+                             "from the SDK callback thread, which must not wait")
+        subscription = Subscription(self, fields, depth, policy, notify)
+        with self._lock:
+            self._set_subscriptions(self._subscriptions + (subscription,))
+        if self._onChange is not None:
+            self._onChange()
+        return subscription
+
+    def publish(self, frame_id, metadata, image):
+        """
+        Offer a published frame to every subscription.
+
+        Args:
+            frame_id: int, frame id of the data
+            metadata: MetadataFrame or None
+            image: FrameView or None
+        """
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        with self._lock:
+            self.seq += 1
+            seq = self.seq
+        available = {'metadata': metadata, 'image': image, 'jpeg': None}
+        frames = {}
+        for subscription in subscriptions:
+            fields = subscription.fields
+            frame = frames.get(fields)
+            if frame is None:
+                if 'jpeg' in fields and available['jpeg'] is None and image is not None and self._encodeJpeg:
+                    available['jpeg'] = self._encodeJpeg(image)
+                frame = HubFrame(seq, frame_id, *(available[name] if name in fields else None for name in FIELDS))
+                frames[fields] = frame
+            if frame.metadata is not None or frame.image is not None or frame.jpeg is not None:
+                subscription._offer(frame, self._blockTimeout)
+
+    def close(self):
+        """Close every subscription"""
+        for subscription in self._subscriptions:
+            subscription.close()
+
+    def stats(self):
+        """
+        Get hub counters.
+
+        Returns:
+            dict: frames published and the stats() of every subscription
+        """
+        return {
+            'published': self.seq,
+            'subscriptions': [subscription.stats() for subscription in self._subscriptions],
+        }
+
+    def _remove(self, subscription):
+        with self._lock:
+            self._set_subscriptions(tuple(s for s in self._subscriptions if s is not subscription))
+        if self._onChange is not None:
+            self._onChange()
+
+    def _set_subscriptions(self, subscriptions):
+        self._subscriptions = subscriptions
+        self.wants_images = any(not s.fields.isdisjoint(('image', 'jpeg')) for s in subscriptions)
@@ -0,0 +1,205 @@
+"""
+Staged frame pipeline used by the extended EVE wrapper.
+
+The SDK callback thread only hands raw frame data over to a bounded queue;
+a pool of worker threads does the expensive post-processing (colour
+conversion, scaling, encoding, JSON parsing). When the workers fall behind,
+the queue applies a backpressure policy instead of stalling the callback:
+
+- 'drop_oldest': discard the oldest queued frame to make room (default)
+- 'drop_newest': discard the incoming frame and keep the queued ones
+- 'block': wait until a worker takes a queued frame; only for frame sources
+  that can be paused, such as a replay delivering frames as fast as possible,
+  never for the real SDK callback
+
+With workers=0 the pipeline is disabled and submitted jobs are processed
+inline on the calling thread, which matches the original callback behaviour.
+"""
+
+import collections
+import threading
+
+POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class FramePipeline:
+    """Bounded handoff queue drained by a pool of worker threads"""
+
+    def __init__(self, process, workers=1, queueSize=2, policy='drop_oldest', name='eve-pipeline', onDrop=None):
+        """
+        Args:
+            process: callable invoked with each submitted job
+            workers: int, number of worker threads (0 processes jobs inline)
+            queueSize: int, maximum number of queued jobs
+            policy: str, backpressure policy, one of POLICIES
+            name: str, prefix for the worker thread names
+            onDrop: callable invoked with each job dropped without being processed, or None
+        """
+        _check_policy(policy)
+        if queueSize < 1:
+            raise ValueError(f"Pipeline queue size must be at least 1, got {queueSize}")
+        self._process = process
+        self._onDrop = onDrop
+        self._workers = workers
+        self._queueSize = queueSize
+        self._policy = policy
+        self._name = name
+        self._queue = collections.deque()
+        lock = threading.Lock()
+        self._cond = threading.Condition(lock)
+        # Signalled when a worker finishes a job, for join()
+        self._idle = threading.Condition(lock)
+        # Signalled when a worker takes a job, for 'block' submitters
+        self._room = threading.Condition(lock)
+        self._threads = []
+        self._running = False
+        self._submitted = 0
+        self._processed = 0
+        self._dropped = 0
+        self._errors = 0
+        self._max_depth = 0
+        self._active = 0
+
+    @property
+    def threaded(self):
+        """True when jobs are handed over to worker threads"""
+        return self._workers > 0
+
+    def start(self):
+        """Start the worker threads (no-op when running inline or already started)"""
+        with self._cond:
+            if self._running or not self.threaded:
+                return
+            self._running = True
+            self._threads = [
+                threading.Thread(target=self._run, name=f"{self._name}-{i}", daemon=True)
+                for i in range(self._workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop the workers, discarding any queued job"""
+        with self._cond:
+            self._running = False
+            self._dropped += len(self._queue)
+            dropped = list(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+            self._idle.notify_all()
+            self._room.notify_all()
+        for job in dropped:
+            self._drop(job)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def join(self, timeout=None):
+        """
+        Wait until every queued job has been processed.
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        with self._cond:
+            return self._idle.wait_for(lambda: not self._queue and not self._active, timeout)
+
+    def submit(self, job):
+        """
+        Hand a job over to the workers, applying the backpressure policy.
+
+        Returns:
+            bool: False if the submitted job itself was dropped
+        """
+        if not self.threaded:
+            self._submitted += 1
+            self._run_job(job)
+            return True
+
+        dropped = None
+        with self._cond:
+            self._submitted += 1
+            if self._policy == 'block':
+                self._room.wait_for(lambda: len(self._queue) < self._queueSize or not self._running)
+                if not self._running:
+                    dropped = job
+            if dropped is job:
+                self._dropped += 1
+            elif len(self._queue) >= self._queueSize:
+                self._dropped += 1
+                if self._policy == 'drop_newest':
+                    dropped = job
+                else:
+                    dropped = self._queue.popleft()
+            if dropped is not job:
+                self._queue.append(job)
+                if len(self._queue) > self._max_depth:
+                    self._max_depth = len(self._queue)
+                self._cond.notify()
+        if dropped is not None:
+            self._drop(dropped)
+        return dropped is not job
+
+    def set_policy(self, policy):
+        """Change the backpressure policy, one of POLICIES"""
+        _check_policy(policy)
+        with self._cond:
+            self._policy = policy
+            self._room.notify_all()
+
+    def stats(self):
+        """
+        Get pipeline counters.
+
+        Returns:
+            dict: submitted, processed, dropped and failed jobs, queue depth and policy
+        """
+        with self._cond:
+            return {
+                'workers': self._workers,
+                'policy': self._policy,
+                'queue_size': self._queueSize,
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self._max_depth,
+                'submitted': self._submitted,
+                'processed': self._processed,
+                'dropped': self._dropped,
+                'errors': self._errors,
+            }
+
+    def _drop(self, job):
+        if self._onDrop is not None:
+            self._onDrop(job)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                job = self._queue.popleft()
+                self._active += 1
+                self._room.notify()
+            try:
+                self._run_job(job)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._idle.notify_all()
+
+    def _run_job(self, job):
+        try:
+            self._process(job)
+        except Exception as e:
+            print(f"Frame pipeline error: {e}")
+            with self._cond:
+                self._errors += 1
+            return
+        with self._cond:
+            self._processed += 1
+
+
+def _check_policy(policy):
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown pipeline policy '{policy}', expected one of {POLICIES}")
@@ -0,0 +1,93 @@
+"""
+Immutable per-frame record of the extended EVE wrapper.
+
+Every publication creates exactly one FrameRecord, which becomes the wrapper's
+latest frame and is handed as is to every reader:
+
+    record = eve.get_frame_record()
+    users = record.parsed()['pipeline_data']['users']
+    image = record.image_view            # read-only frame ring view
+    data = record.jpeg()                 # encoded once per frame
+
+Nothing is copied per read. The metadata is the lazily parsed MetadataFrame
+(parsed at most once, on first access) and the image the read-only frame ring
+view, so the parsed dictionary and the image are shared and must not be
+modified; copy them first. get_frame_data() remains as a compatibility shim
+building its old dictionary from the record.
+
+Timestamps (time.monotonic_ns() domain, None when unknown) describe the data
+the record holds: the capture time of its image, the FPGA serial read time of
+its metadata, the callback that delivered the frame and the publication.
+"""
+
+_FIELDS = ('frame_id', 'metadata', 'json_str', 'image_view', 'image',
+           'capture_ns', 'serial_ns', 'callback_ns', 'publish_ns')
+
+
+class FrameRecord:
+    """One published frame: ids, timestamps, lazy metadata, image view and JPEG handle"""
+
+    __slots__ = _FIELDS + ('_jpeg_cache',)
+
+    def __init__(self, frame_id=0, metadata=None, json_str="", image_view=None, image=None,
+                 capture_ns=None, serial_ns=None, callback_ns=None, publish_ns=None, jpegCache=None):
+        """
+        Args:
+            frame_id: int, frame id of the record
+            metadata: MetadataFrame, latest successful metadata frame (parsed lazily), or None
+            json_str: bytes, latest JSON text read from the FPGA
+            image_view: FrameView, latest image (read-only ring view), or None
+            image: FrameView, image returned by get_image() (only with copyImage), or None
+            capture_ns: int, capture time of the image
+            serial_ns: int, FPGA serial read time of the metadata
+            callback_ns: int, entry time of the callback that delivered the frame
+            publish_ns: int, publication time
+            jpegCache: JpegCache encoding the image for jpeg(), or None without JPEG output
+        """
+        setattr_ = object.__setattr__
+        setattr_(self, 'frame_id', frame_id)
+        setattr_(self, 'metadata', metadata)
+        setattr_(self, 'json_str', json_str)
+        setattr_(self, 'image_view', image_view)
+        setattr_(self, 'image', image)
+        setattr_(self, 'capture_ns', capture_ns)
+        setattr_(self, 'serial_ns', serial_ns)
+        setattr_(self, 'callback_ns', callback_ns)
+        setattr_(self, 'publish_ns', publish_ns)
+        setattr_(self, '_jpeg_cache', jpegCache)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"FrameRecord is immutable, cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"FrameRecord is immutable, cannot delete '{name}'")
+
+    def __repr__(self):
+        return f"FrameRecord(frame_id={self.frame_id}, image={self.image_view is not None})"
+
+    def parsed(self):
+        """Get the decoded metadata (parsed once per frame and shared: do not modify), or None"""
+        metadata = self.metadata
+        if metadata is None:
+            return None
+        return metadata.parsed()
+
+    def jpeg(self):
+        """
+        Get the JPEG-encoded image.
+
+        The image is encoded on the first request for its frame id; later and
+        concurrent requests share that single encode.
+
+        Returns:
+            bytes: JPEG-encoded image, or None without an image or JPEG output
+        """
+        if self._jpeg_cache is None or self.image_view is None:
+            return None
+        return self._jpeg_cache.get(self.image_view)
+
+    def replace(self, **fields):
+        """Get a new record with some fields changed (the JPEG handle is kept)"""
+        values = {name: getattr(self, name) for name in _FIELDS}
+        values.update(fields)
+        return FrameRecord(**values, jpegCache=self._jpeg_cache)
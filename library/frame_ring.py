@@ -0,0 +1,162 @@
+"""
+Preallocated frame ring buffer used by the extended EVE wrapper.
+
+Frames are written into a fixed set of reusable numpy buffers instead of
+allocating a new array on every callback. Readers receive read-only views
+tagged with the frame id they belong to; a slot is only handed back to the
+writer once every view onto it has been released.
+
+Slot ownership is tracked through the reference count of the slot buffer:
+every numpy view keeps a reference to the buffer it was taken from, so a
+buffer whose reference count is back to its baseline has no readers left.
+This keeps the consumer side unchanged (no explicit release call is needed,
+dropping the array is enough).
+"""
+
+import sys
+import threading
+
+import numpy as np
+
+
+class FrameView(np.ndarray):
+    """Read-only numpy view onto a ring slot, tagged with its frame id"""
+
+    frame_id = None
+    # Downscaled YUYV FrameView of the same frame, when the wrapper keeps it
+    yuv = None
+
+    def __array_finalize__(self, obj):
+        if obj is not None:
+            self.frame_id = getattr(obj, 'frame_id', None)
+            self.yuv = getattr(obj, 'yuv', None)
+
+
+class _Slot:
+    """A single reusable buffer of the ring"""
+
+    __slots__ = ('buffer', 'baseline', 'writing')
+
+    def __init__(self, shape, dtype):
+        self.buffer = np.empty(shape, dtype=dtype)
+        # References held by the slot itself (plus the getrefcount argument)
+        self.baseline = sys.getrefcount(self.buffer)
+        self.writing = False
+
+    def is_free(self):
+        return not self.writing and sys.getrefcount(self.buffer) <= self.baseline
+
+
+class FrameRing:
+    """
+    Fixed-size ring of preallocated frame buffers.
+
+    The writer calls acquire() to get a free slot, fills slot.buffer in place
+    and then calls publish() to turn it into a read-only FrameView. Slots are
+    reallocated only when the requested shape changes, or when every slot is
+    still referenced by readers (counted as an overflow).
+    """
+
+    def __init__(self, slots=4, dtype=np.uint8):
+        if slots < 2:
+            raise ValueError(f"FrameRing needs at least 2 slots, got {slots}")
+        self._size = slots
+        self._dtype = dtype
+        self._slots = []
+        self._next = 0
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.overflows = 0
+
+    def acquire(self, shape):
+        """
+        Reserve the next free slot for writing.
+
+        Args:
+            shape: tuple, shape of the frame that will be written
+
+        Returns:
+            _Slot: slot whose `buffer` is a writable array of the given shape
+        """
+        with self._lock:
+            slot = self._find_free()
+            if slot is None:
+                if len(self._slots) < self._size:
+                    slot = _Slot(shape, self._dtype)
+                    self._slots.append(slot)
+                    self.allocations += 1
+                else:
+                    # Every slot still has readers: leave the old buffer to them
+                    # and give the next slot not being written a fresh one.
+                    slot = self._next_not_writing()
+                    slot.buffer = np.empty(shape, dtype=self._dtype)
+                    slot.baseline = sys.getrefcount(slot.buffer)
+                    self.allocations += 1
+                    self.overflows += 1
+            elif slot.buffer.shape != tuple(shape):
+                slot.buffer = np.empty(shape, dtype=self._dtype)
+                slot.baseline = sys.getrefcount(slot.buffer)
+                self.allocations += 1
+            slot.writing = True
+            return slot
+
+    def publish(self, slot, frame_id):
+        """
+        Mark a slot as written and return a read-only view onto it.
+
+        Args:
+            slot: _Slot returned by acquire()
+            frame_id: int, frame id the view is tagged with
+
+        Returns:
+            FrameView: read-only view, keeping the slot busy while referenced
+        """
+        view = slot.buffer.view(FrameView)
+        view.frame_id = frame_id
+        view.flags.writeable = False
+        with self._lock:
+            slot.writing = False
+        return view
+
+    def release(self, slot):
+        """Give back a slot acquired for writing without publishing it"""
+        with self._lock:
+            slot.writing = False
+
+    def stats(self):
+        """
+        Get ring usage counters.
+
+        Returns:
+            dict: slot count, slots currently referenced, allocations and overflows
+        """
+        with self._lock:
+            busy = sum(1 for slot in self._slots if not slot.is_free())
+            return {
+                'slots': self._size,
+                'allocated_slots': len(self._slots),
+                'busy_slots': busy,
+                'allocations': self.allocations,
+                'overflows': self.overflows,
+            }
+
+    def _find_free(self):
+        count = len(self._slots)
+        for i in range(count):
+            index = (self._next + i) % count
+            slot = self._slots[index]
+            if slot.is_free():
+                self._next = (index + 1) % count
+                return slot
+        return None
+
+    def _next_not_writing(self):
+        for _ in range(len(self._slots)):
+            slot = self._slots[self._next]
+            self._next = (self._next + 1) % len(self._slots)
+            if not slot.writing:
+                return slot
+        # More concurrent writers than slots: grow past the configured size
+        slot = _Slot((0,), self._dtype)
+        self._slots.append(slot)
+        return slot
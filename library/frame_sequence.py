@@ -0,0 +1,156 @@
+"""
+Sequence counters with gap and duplicate detection for the extended EVE wrapper.
+
+The wrapper's frame id only counts published frames, so it cannot tell a
+frame the sensor skipped from one the pipeline dropped, nor a metadata frame
+the SDK delivered twice. Each stream the wrapper sees is counted separately:
+
+- callbacks: every SDK data callback, stamped with its entry time
+- metadata: every published metadata frame, numbered by the payload's own
+  frame number when the JSON carries one, else stamped with its FPGA serial
+  read time
+- images: every published image, stamped with EveProcessedImage.timestamp
+
+A tracker detects a duplicate when a frame is not newer than the previous one
+(same number or timestamp). With frame numbers a gap is a jump of more than
+one; with timestamps alone it is an interval of more than `gapFactor` times the
+nominal frame period, estimated as the median of the last intervals so that a
+few jittery or skipped frames move it neither down nor up, and the number of
+skipped frames is the interval in periods minus one.
+"""
+
+import collections
+import statistics
+import threading
+
+STREAMS = ('callbacks', 'metadata', 'images')
+
+_NS_PER_MS = 1e6
+# Number of recent intervals the nominal period is the median of
+_PERIOD_WINDOW = 15
+
+
+class SequenceTracker:
+    """Counts one stream of frames and detects skipped and duplicated ones"""
+
+    def __init__(self, gapFactor=1.5):
+        """
+        Args:
+            gapFactor: float, interval (in nominal frame periods) above which frames
+                       are considered skipped when the stream has no frame numbers
+        """
+        if gapFactor <= 1.0:
+            raise ValueError(f"Gap factor must be above 1, got {gapFactor}")
+        self._gapFactor = gapFactor
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, number=None, timestamp_ns=None):
+        """
+        Add one frame of the stream.
+
+        Args:
+            number: int, frame number carried by the frame, or None
+            timestamp_ns: int, frame timestamp in ns, or None / 0 when unknown
+        """
+        timestamp = timestamp_ns or None
+        with self._lock:
+            self._count += 1
+            if number is not None:
+                self._numbered += 1
+                last = self._last_number
+                if last is not None and number <= last:
+                    self._duplicates += 1
+                    return
+                self._skip(number - last - 1 if last is not None else 0)
+                self._last_number = number
+                if timestamp is not None:
+                    self._interval(timestamp, False)
+            elif timestamp is not None:
+                self._interval(timestamp, True)
+            else:
+                self._frames += 1
+
+    def reset(self):
+        """Drop every recorded frame"""
+        with self._lock:
+            self._count = 0
+            self._frames = 0
+            self._numbered = 0
+            self._duplicates = 0
+            self._skipped = 0
+            self._gaps = 0
+            self._longest_gap_frames = 0
+            self._longest_gap_ns = 0
+            self._period = None
+            self._intervals = collections.deque(maxlen=_PERIOD_WINDOW)
+            self._last_number = None
+            self._last_timestamp = None
+
+    def stats(self):
+        """
+        Get the stream counters.
+
+        Returns:
+            dict: frames received ('count'), distinct 'frames', 'duplicates',
+                  'skipped' frames and the 'gaps' they fell in, 'drop_rate'
+                  (skipped / (frames + skipped)), the longest gap in frames and ms,
+                  the nominal frame period in ms and the sequence 'source'
+                  ('number', 'timestamp' or None)
+        """
+        with self._lock:
+            frames = self._frames
+            skipped = self._skipped
+            expected = frames + skipped
+            if self._numbered:
+                source = 'number'
+            elif self._last_timestamp is not None:
+                source = 'timestamp'
+            else:
+                source = None
+            return {
+                'count': self._count,
+                'frames': frames,
+                'duplicates': self._duplicates,
+                'skipped': skipped,
+                'gaps': self._gaps,
+                'drop_rate': skipped / expected if expected else 0.0,
+                'longest_gap_frames': self._longest_gap_frames,
+                'longest_gap_ms': self._longest_gap_ns / _NS_PER_MS,
+                'period_ms': self._period / _NS_PER_MS if self._period is not None else None,
+                'source': source,
+            }
+
+    def _skip(self, missed):
+        self._frames += 1
+        if missed > 0:
+            self._skipped += missed
+            self._gaps += 1
+            if missed > self._longest_gap_frames:
+                self._longest_gap_frames = missed
+
+    def _interval(self, timestamp, detect):
+        """Track the interval to the previous timestamp; `detect` counts gaps and duplicates from it"""
+        last = self._last_timestamp
+        if last is None:
+            self._last_timestamp = timestamp
+            if detect:
+                self._frames += 1
+            return
+        interval = timestamp - last
+        if interval <= 0:
+            if detect:
+                self._duplicates += 1
+            return
+        self._last_timestamp = timestamp
+        if interval > self._longest_gap_ns:
+            self._longest_gap_ns = interval
+        period = self._period
+        missed = 0
+        if period is not None and interval > self._gapFactor * period:
+            missed = int(interval / period + 0.5) - 1
+        # Gaps enter the window too, so a lasting change of frame rate is followed
+        self._intervals.append(interval)
+        self._period = statistics.median(self._intervals)
+        if detect:
+            self._skip(missed)
@@ -0,0 +1,97 @@
+"""
+asyncio streams of published frames for the extended EVE wrapper.
+
+A FrameStream is a frame_hub subscription drained on an asyncio event loop, so
+one process can serve many async consumers without a thread each:
+
+    async for frame in eve.frames(maxsize=4, policy='drop_oldest'):
+        users = frame.metadata.parsed()['pipeline_data']['users']
+
+    metadata = await eve.next_metadata()
+
+The publishing thread (pipeline worker or SDK callback) queues the frame on the
+subscription and wakes the loop through call_soon_threadsafe, at most once
+until the loop has run; queue depth, overflow policy and the shared payloads
+are those of the hub subscription.
+"""
+
+import threading
+
+
+class FrameStream:
+    """Async iterator over a hub subscription"""
+
+    def __init__(self, loop, hub, fields=('metadata', 'image'), maxsize=1, policy='latest'):
+        """
+        Args:
+            loop: asyncio event loop the consumer runs on
+            hub: FrameHub to subscribe to
+            fields: iterable of frame_hub.FIELDS names to receive
+            maxsize: int, maximum number of queued frames
+            policy: str, overflow policy, one of frame_hub.POLICIES
+        """
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._waiter = None
+        self._wakeup_pending = False
+        self._subscription = hub.subscribe(fields, maxsize, policy, notify=self._notify)
+
+    @property
+    def closed(self):
+        return self._subscription.closed
+
+    async def get(self):
+        """
+        Wait for the next frame.
+
+        Returns:
+            frame_hub.HubFrame: next queued frame
+
+        Raises:
+            StopAsyncIteration: when the stream is closed and drained
+        """
+        while True:
+            frame = self._subscription.poll()
+            if frame is not None:
+                return frame
+            if self._subscription.closed:
+                raise StopAsyncIteration
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+    def close(self):
+        """Unsubscribe; queued frames are still delivered before the iteration ends"""
+        self._subscription.close()
+
+    def stats(self):
+        """Get the counters of the underlying subscription"""
+        return self._subscription.stats()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    def _notify(self):
+        """Called from the publishing thread after a frame was queued or on close"""
+        with self._lock:
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup)
+        except RuntimeError:
+            # Event loop closed: nobody is left to consume the stream
+            self._subscription.close()
+
+    def _wakeup(self):
+        """Runs on the event loop: wake the consumer waiting in get()"""
+        with self._lock:
+            self._wakeup_pending = False
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
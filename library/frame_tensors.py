@@ -0,0 +1,193 @@
+"""
+Fixed-shape per-user arrays of one FPGA metadata frame.
+
+FrameTensors holds every user's landmarks, head pose and boxes as preallocated
+numpy arrays indexed by user slot, so geometry can be computed for all users
+with vectorized numpy code instead of walking dictionaries or ctypes objects:
+
+    tensors = eve.get_frame_tensors()
+    while running:
+        eve.get_frame_tensors(out=tensors)   # refilled in place, no allocation
+        faces = tensors.face_landmarks[tensors.valid]   # (users, 23, 3)
+
+Arrays are filled straight from the CFpgaData bytes with the binary metadata
+source, without decoding anything. The JSON source has no fixed layout to read
+from, so its text is decoded into the metadata dictionary first; that decode is
+the frame's memoized MetadataFrame.parsed(), done once per frame and shared with
+every other metadata reader. Slots past user_count and landmark rows past each
+user's landmark count are zeroed, and empty slots are marked invalid.
+"""
+
+import numpy as np
+
+from eve.eve_python import eve_sdk as sdk
+from eve_dtypes import unstructured
+from fpga_metadata import FPGA_DATA_DTYPE, FpgaMetadataFrame
+
+structs = sdk.structs
+
+MAX_USERS = structs.EVE_FPGA_MAX_USERS
+LANDMARKS = structs.EVE_FPGA_LANDMARKS
+
+_ANGLES = ('pitch', 'yaw', 'roll')
+_RECT = ('left', 'top', 'right', 'bottom')
+
+
+class FrameTensors:
+    """
+    Preallocated arrays of one metadata frame, one row per user slot.
+
+    Attributes:
+        frame_id: int, frame the arrays were filled from (-1 when empty)
+        user_count: int, number of valid user slots
+        valid: (MAX_USERS,) bool, slot holds a user
+        user_id: (MAX_USERS,) int32
+        face_distance: (MAX_USERS,) float32
+        face_landmarks: (MAX_USERS, LANDMARKS, 3) int32, x/y/z
+        face_landmark_count: (MAX_USERS,) int32, valid rows of face_landmarks
+        angles_ics: (MAX_USERS, 3) float32, pitch/yaw/roll in image coordinates
+        angles_ccs: (MAX_USERS, 3) float32, pitch/yaw/roll in camera coordinates
+        face_box: (MAX_USERS, 4) int32, left/top/right/bottom
+        person_valid: (MAX_USERS,) bool, person data available
+        person_landmarks: (MAX_USERS, LANDMARKS, 3) int32
+        person_landmark_count: (MAX_USERS,) int32
+        person_box: (MAX_USERS, 4) int32
+    """
+
+    _ARRAYS = ('valid', 'user_id', 'face_distance', 'face_landmarks', 'face_landmark_count',
+               'angles_ics', 'angles_ccs', 'face_box', 'person_valid', 'person_landmarks',
+               'person_landmark_count', 'person_box')
+
+    def __init__(self):
+        self.frame_id = -1
+        self.user_count = 0
+        self.valid = np.zeros(MAX_USERS, dtype=bool)
+        self.user_id = np.zeros(MAX_USERS, dtype=np.int32)
+        self.face_distance = np.zeros(MAX_USERS, dtype=np.float32)
+        self.face_landmarks = np.zeros((MAX_USERS, LANDMARKS, 3), dtype=np.int32)
+        self.face_landmark_count = np.zeros(MAX_USERS, dtype=np.int32)
+        self.angles_ics = np.zeros((MAX_USERS, 3), dtype=np.float32)
+        self.angles_ccs = np.zeros((MAX_USERS, 3), dtype=np.float32)
+        self.face_box = np.zeros((MAX_USERS, 4), dtype=np.int32)
+        self.person_valid = np.zeros(MAX_USERS, dtype=bool)
+        self.person_landmarks = np.zeros((MAX_USERS, LANDMARKS, 3), dtype=np.int32)
+        self.person_landmark_count = np.zeros(MAX_USERS, dtype=np.int32)
+        self.person_box = np.zeros((MAX_USERS, 4), dtype=np.int32)
+
+    def clear(self, start=0):
+        """Zero every user slot from `start` on"""
+        for name in self._ARRAYS:
+            getattr(self, name)[start:] = 0
+        if start == 0:
+            self.frame_id = -1
+            self.user_count = 0
+
+    def fill(self, metadata):
+        """
+        Refill the arrays from a metadata frame.
+
+        Args:
+            metadata: MetadataFrame (JSON, decoded once and memoized) or
+                      FpgaMetadataFrame (CFpgaData bytes, read without decoding)
+
+        Returns:
+            FrameTensors: self, or None when the frame has no data anymore (ring-backed
+                          frame whose slot was reused); the arrays are then left as they were
+        """
+        raw = metadata.raw
+        if raw is None:
+            return None
+        if isinstance(metadata, FpgaMetadataFrame):
+            return self.fill_from_struct(raw, metadata.frame_id)
+        return self.fill_from_dict(metadata.parsed(), metadata.frame_id)
+
+    def fill_from_struct(self, raw, frame_id):
+        """
+        Refill the arrays from raw CFpgaData bytes, column by column for all users.
+
+        Args:
+            raw: bytes, CFpgaData as returned by read_fpga_bytes()
+            frame_id: int, frame id of the data
+        """
+        pipeline = np.frombuffer(raw, dtype=FPGA_DATA_DTYPE, count=1)[0]['pipelineData']
+        count = max(0, min(int(pipeline['dataContent']['numberOfUsers']), MAX_USERS))
+        users = pipeline['userData'][:count]
+        face = users['faceData']
+        person = users['personData']
+
+        self.valid[:count] = True
+        self.user_id[:count] = users['id']
+        self.face_distance[:count] = face['faceDistance']
+        _set_point_rows(self.face_landmarks[:count], self.face_landmark_count[:count],
+                        unstructured(face['landmarks']), face['numberOfFaceLandmarkPoints'])
+        self.angles_ics[:count] = unstructured(face['anglesICS'])
+        self.angles_ccs[:count] = unstructured(face['anglesCCS'])
+        self.face_box[:count] = unstructured(face['faceBox'])
+        self.person_valid[:count] = person['isPersonDataAvailable']
+        _set_point_rows(self.person_landmarks[:count], self.person_landmark_count[:count],
+                        unstructured(person['landmarks']), person['numberOfPersonLandmarkPoints'])
+        self.person_box[:count] = unstructured(person['personBox'])
+
+        self.clear(count)
+        self.user_count = count
+        self.frame_id = frame_id
+        return self
+
+    def fill_from_dict(self, metadata, frame_id):
+        """
+        Refill the arrays from a decoded metadata dictionary.
+
+        Args:
+            metadata: dict, metadata with 'pipeline_data' (see decode_fpga_data())
+            frame_id: int, frame id of the data
+        """
+        pipeline = (metadata or {}).get('pipeline_data') or {}
+        users = (pipeline.get('users') or [])[:MAX_USERS]
+        count = len(users)
+
+        for i, user in enumerate(users):
+            face = user.get('face_data') or {}
+            person = user.get('person_data')
+            self.valid[i] = True
+            self.user_id[i] = user.get('id', i)
+            self.face_distance[i] = face.get('distance') or 0
+            self.face_landmark_count[i] = _set_points(self.face_landmarks[i], face.get('landmarks'))
+            _set_named(self.angles_ics[i], face.get('angles_ics'), _ANGLES)
+            _set_named(self.angles_ccs[i], face.get('angles_ccs'), _ANGLES)
+            _set_named(self.face_box[i], face.get('box'), _RECT)
+            self.person_valid[i] = person is not None
+            person = person or {}
+            self.person_landmark_count[i] = _set_points(self.person_landmarks[i], person.get('landmarks'))
+            _set_named(self.person_box[i], person.get('box'), _RECT)
+
+        self.clear(count)
+        self.user_count = count
+        self.frame_id = frame_id
+        return self
+
+
+def _set_point_rows(out, out_counts, points, counts):
+    """
+    Copy every user's landmark rows and counts at once, zeroing the rows past
+    each user's count as _set_points does for one user.
+    """
+    np.clip(counts, 0, LANDMARKS, out=out_counts)
+    out[:] = points
+    out[np.arange(LANDMARKS) >= out_counts[:, None]] = 0
+
+
+def _set_points(out, points):
+    """Copy up to LANDMARKS [x, y, z] rows into `out`, zeroing the rest; returns the row count"""
+    count = min(len(points), LANDMARKS) if points else 0
+    if count:
+        out[:count] = points[:count]
+    out[count:] = 0
+    return count
+
+
+def _set_named(out, values, names):
+    """Copy the named entries of a dict (e.g. pitch/yaw/roll) into `out`"""
+    if values:
+        out[:] = [values.get(name, 0) for name in names]
+    else:
+        out[:] = 0
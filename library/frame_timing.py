@@ -0,0 +1,170 @@
+"""
+End-to-end latency and skew of published frames.
+
+For every frame the extended wrapper keeps four timestamps, all in
+nanoseconds on the monotonic clock:
+
+- capture: EveProcessedImage.timestamp, when the sensor frame was captured
+- serial: CFpgaMessage.serialReadTimeNano, when the FPGA metadata was read
+  from the serial link
+- callback: entry of the SDK data callback
+- publish: end of the atomic frame update in the wrapper
+
+plus the SDK-reported EveGetProcessedFrameTime() value. The derived intervals
+split the latency between the FPGA link, the SoC pipeline and the Python code:
+
+    capture_to_callback   SoC pipeline (sensor to SDK callback)
+    serial_to_callback    FPGA link and SDK metadata handling
+    callback_to_publish   wrapper (copy, queueing, conversion, lock)
+    capture_to_publish    sensor to Python, end to end
+    metadata_skew         FPGA serial read time minus image capture time
+    frame_interval        time between consecutive captures
+    frame_time            EveGetProcessedFrameTime(), in the SDK's unit (not converted)
+
+Each is kept over a rolling window of the last frames in a preallocated array;
+statistics are only computed when requested. Intervals whose timestamps are
+missing (no image, no FPGA data, zero timestamp) are left out.
+
+The SDK timestamps are expected on the same clock as time.monotonic_ns(). A
+latency that is negative or above MAX_LATENCY_MS (or a skew beyond it either
+way) means one of its timestamps is from another clock or is corrupt: it is
+counted as implausible and left out of the statistics. A window of 0 disables
+the statistics, letting the wrapper skip reading the timestamps.
+"""
+
+import threading
+
+import numpy as np
+
+METRICS = ('capture_to_callback', 'serial_to_callback', 'callback_to_publish', 'capture_to_publish',
+           'metadata_skew', 'frame_interval', 'frame_time')
+TIMESTAMPS = ('capture_ns', 'serial_ns', 'callback_ns', 'publish_ns', 'frame_time')
+
+# Metrics that cannot be negative
+LATENCIES = ('capture_to_callback', 'serial_to_callback', 'callback_to_publish', 'capture_to_publish')
+# Latencies and skews beyond this are taken for timestamps on another clock
+MAX_LATENCY_MS = 10000.0
+
+_NS_PER_MS = 1e6
+_LATENCY_COLUMNS = [METRICS.index(name) for name in LATENCIES]
+_SKEW_COLUMN = METRICS.index('metadata_skew')
+
+
+class FrameTiming:
+    """Rolling latency, skew and interval statistics over the last published frames"""
+
+    def __init__(self, window=300):
+        """
+        Args:
+            window: int, number of frames the statistics are computed over (0 disables them)
+        """
+        if window < 0:
+            raise ValueError(f"Timing window must not be negative, got {window}")
+        self._window = window
+        self._lock = threading.Lock()
+        self._samples = np.full((window, len(METRICS)), np.nan)
+        self._implausible = np.zeros(len(METRICS), dtype=np.int64)
+        self._next = 0
+        self._count = 0
+        self._last_capture = None
+        self._latest = None
+
+    @property
+    def enabled(self):
+        """False when the window is 0 and frames are not recorded"""
+        return self._window > 0
+
+    def record(self, capture_ns, serial_ns, callback_ns, publish_ns, frame_time=None):
+        """
+        Add one published frame.
+
+        Args:
+            capture_ns: int, image capture timestamp, or None / 0 when unknown
+            serial_ns: int, FPGA serial read time, or None / 0 when unknown
+            callback_ns: int, SDK callback entry time
+            publish_ns: int, publication time
+            frame_time: float, EveGetProcessedFrameTime() value, or None
+        """
+        if not self._window:
+            return
+        capture = capture_ns or None
+        serial = serial_ns or None
+        row = [
+            _ms(callback_ns, capture),
+            _ms(callback_ns, serial),
+            _ms(publish_ns, callback_ns),
+            _ms(publish_ns, capture),
+            _ms(serial, capture),
+            np.nan,
+            np.nan if frame_time is None else frame_time,
+        ]
+        implausible = [i for i in _LATENCY_COLUMNS if not np.isnan(row[i]) and not 0.0 <= row[i] <= MAX_LATENCY_MS]
+        if abs(row[_SKEW_COLUMN]) > MAX_LATENCY_MS:
+            implausible.append(_SKEW_COLUMN)
+        for i in implausible:
+            row[i] = np.nan
+        with self._lock:
+            if capture is not None:
+                if self._last_capture is not None and capture > self._last_capture:
+                    row[5] = (capture - self._last_capture) / _NS_PER_MS
+                self._last_capture = capture
+            for i in implausible:
+                self._implausible[i] += 1
+            self._samples[self._next] = row
+            self._next = (self._next + 1) % self._window
+            self._count += 1
+            self._latest = (capture_ns, serial_ns, callback_ns, publish_ns, frame_time)
+
+    def reset(self):
+        """Drop every recorded frame"""
+        with self._lock:
+            self._samples.fill(np.nan)
+            self._implausible.fill(0)
+            self._next = 0
+            self._count = 0
+            self._last_capture = None
+            self._latest = None
+
+    def stats(self):
+        """
+        Get the rolling statistics.
+
+        Returns:
+            dict: 'frames' recorded in total, 'window', 'latest' timestamps of the last
+                  frame, 'implausible' values left out per metric since the last reset,
+                  and per metric count, mean, std, min, p50, p99 and max in ms
+        """
+        with self._lock:
+            samples = self._samples.copy()
+            implausible = self._implausible.tolist()
+            count = self._count
+            latest = self._latest
+        stats = {
+            'frames': count,
+            'window': self._window,
+            'latest': dict(zip(TIMESTAMPS, latest)) if latest is not None else None,
+            'implausible': {name: implausible[METRICS.index(name)] for name in LATENCIES + ('metadata_skew',)},
+        }
+        for i, name in enumerate(METRICS):
+            values = samples[:, i]
+            values = values[~np.isnan(values)]
+            if not values.size:
+                stats[name] = None
+                continue
+            p50, p99 = np.percentile(values, (50, 99))
+            stats[name] = {
+                'count': int(values.size),
+                'mean_ms': float(values.mean()),
+                'std_ms': float(values.std()),
+                'min_ms': float(values.min()),
+                'p50_ms': float(p50),
+                'p99_ms': float(p99),
+                'max_ms': float(values.max()),
+            }
+        return stats
+
+
+def _ms(end, start):
+    if end is None or start is None:
+        return np.nan
+    return (end - start) / _NS_PER_MS
@@ -0,0 +1,241 @@
+"""
+Allocation-free image conversion chain for the extended EVE wrapper.
+
+Every raw SDK image goes through the same chain: an optional YUYV to BGR
+conversion, an optional downscale to the configured maximum width, and a write
+into a frame ring slot. YUYV images follow one of the COLOR_PATHS:
+
+- 'bgr': convert the full frame to BGR, then downscale
+- 'yuv': downscale in the YUV domain, then convert only the output pixels to
+  BGR (at 1600x1200 to 800x600, a quarter of the colour conversion work). The
+  packed YUYV frame is resized as a (height, width / 2, 4) image of Y0 U Y1 V
+  pixel pairs, which keeps the chroma of each pair with its lumas; the
+  downscaled YUYV frame can be kept for JPEG encoding without colour conversion
+- 'gray': downscale in the YUV domain and only extract the Y plane, for
+  consumers that need luminance (1-channel output)
+
+Each step writes into a buffer that outlives the frame:
+
+- the conversion geometry (output size, which steps run) is computed once per
+  input resolution and only rebuilt when EveProcessedImage width, height or
+  channels change
+- the intermediate needed between two steps (full-resolution BGR or
+  downscaled YUYV) lives in a per-thread scratch buffer (pipeline workers
+  convert concurrently), written with OpenCV's dst argument
+- the last step always writes straight into the ring slot
+
+so in steady state a frame allocates nothing. The converter counts every
+buffer allocation it causes (scratch buffers and ring slots) as a debug
+counter; allocations after the warmup frames that follow a resolution change
+are reported as steady-state allocations per frame and should stay at 0.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from perf_stats import PerfStats
+
+COLOR_PATHS = ('bgr', 'yuv', 'gray')
+
+
+class _Geometry:
+    """Conversion steps for one input resolution"""
+
+    __slots__ = ('shape', 'out_shape', 'convert', 'resize', 'path')
+
+    def __init__(self, shape, maxWidth, colorPath):
+        height, width, channels = shape
+        self.convert = channels == 2
+        # Colour path only applies to YUYV input
+        self.path = colorPath if self.convert else 'bgr'
+        if not self.convert:
+            out_channels = channels
+        else:
+            out_channels = 1 if self.path == 'gray' else 3
+        # Rescale to maxWidth max width
+        out_width, out_height = width, height
+        if maxWidth > 0:
+            scaleFactor = maxWidth / width
+            if scaleFactor < 1:
+                out_width = int(width * scaleFactor + 0.5)
+                out_height = int(height * scaleFactor + 0.5)
+                if self.path != 'bgr':
+                    # Whole YUYV pixel pairs
+                    out_width -= out_width % 2
+        self.shape = shape
+        self.out_shape = (out_height, out_width, out_channels)
+        self.resize = (out_width, out_height) != (width, height)
+
+
+class ImageConverter:
+    """Converts raw SDK images into frame ring slots through persistent scratch buffers"""
+
+    def __init__(self, ring, maxWidth=0, perf=None, warmupFrames=8, colorPath='bgr', yuvRing=None):
+        """
+        Args:
+            ring: FrameRing the converted images are written to
+            maxWidth: int, maximum output width (0 keeps the input size)
+            perf: PerfStats the steps are timed with (untimed by default)
+            warmupFrames: int, frames after a resolution change whose allocations
+                          are not counted as steady-state
+            colorPath: str, how YUYV images are processed, one of COLOR_PATHS
+            yuvRing: FrameRing the downscaled YUYV frames of the 'yuv' path are
+                     kept in, or None to not keep them
+        """
+        if colorPath not in COLOR_PATHS:
+            raise ValueError(f"Unknown colour path '{colorPath}', expected one of {COLOR_PATHS}")
+        self._ring = ring
+        self._colorPath = colorPath
+        self._yuvRing = yuvRing if colorPath == 'yuv' else None
+        self._maxWidth = maxWidth
+        self._perf = perf if perf is not None else PerfStats()
+        self._warmupFrames = warmupFrames
+        # Replaced (never mutated) when the input resolution changes
+        self._geometry = None
+        self._scratch = threading.local()
+        # Debug counters, updated without a lock like PerfStats
+        self.frames = 0
+        self.allocations = 0
+        self.rebuilds = 0
+        self._steady_frames = 0
+        self._steady_allocations = 0
+        self._geometry_frames = 0
+
+    def convert(self, raw):
+        """
+        Convert and rescale a raw image straight into a ring slot.
+
+        Args:
+            raw: ndarray, (height, width, channels) raw image (only viewed)
+
+        Returns:
+            tuple: (_Slot, _Slot) written but unpublished image ring slot (None for
+                   unsupported formats) and YUV ring slot holding the downscaled
+                   YUYV frame (None unless kept)
+        """
+        geometry = self._geometry
+        if geometry is None or geometry.shape != raw.shape:
+            geometry = self._rebuild(raw.shape)
+        out_channels = geometry.out_shape[2]
+        if out_channels != 1 and out_channels != 3:
+            return None, None
+
+        allocations = self._ring.allocations
+        slot = self._ring.acquire(geometry.out_shape)
+        allocations = self._ring.allocations - allocations
+        yuv_slot = None
+        if geometry.path == 'yuv' and self._yuvRing is not None:
+            yuv_allocations = self._yuvRing.allocations
+            yuv_slot = self._yuvRing.acquire(geometry.out_shape[:2] + (2,))
+            allocations += self._yuvRing.allocations - yuv_allocations
+        perf = self._perf
+        t = perf.start()
+        try:
+            if geometry.path != 'bgr':
+                allocations += self._convert_yuv(raw, geometry, slot, yuv_slot)
+            elif geometry.convert and geometry.resize:
+                bgr, allocated = self._scratch_buffer(geometry.shape[:2] + (3,))
+                allocations += allocated
+                cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV, dst=bgr)
+                t = perf.lap('cvtColor', t)
+                cv2.resize(bgr, geometry.out_shape[1::-1], dst=slot.buffer, interpolation=cv2.INTER_AREA)
+                perf.lap('resize', t)
+            elif geometry.convert:
+                cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV, dst=slot.buffer)
+                perf.lap('cvtColor', t)
+            elif geometry.resize:
+                cv2.resize(raw, geometry.out_shape[1::-1], dst=slot.buffer, interpolation=cv2.INTER_AREA)
+                perf.lap('resize', t)
+            else:
+                np.copyto(slot.buffer, raw)
+                perf.lap('copy', t)
+        except Exception:
+            self._ring.release(slot)
+            if yuv_slot is not None:
+                self._yuvRing.release(yuv_slot)
+            raise
+        self._count(allocations)
+        return slot, yuv_slot
+
+    def stats(self):
+        """
+        Get the allocation debug counters.
+
+        Returns:
+            dict: frames converted, buffer allocations (scratch and ring slots),
+                  geometry rebuilds, the current input/output shapes and the
+                  steady-state allocations per frame (after the warmup frames)
+        """
+        geometry = self._geometry
+        steady_frames = self._steady_frames
+        return {
+            'frames': self.frames,
+            'allocations': self.allocations,
+            'rebuilds': self.rebuilds,
+            'color_path': self._colorPath,
+            'input_shape': geometry.shape if geometry is not None else None,
+            'output_shape': geometry.out_shape if geometry is not None else None,
+            'steady_frames': steady_frames,
+            'steady_allocations': self._steady_allocations,
+            'steady_allocations_per_frame': self._steady_allocations / steady_frames if steady_frames else 0.0,
+        }
+
+    def _convert_yuv(self, raw, geometry, slot, yuv_slot):
+        """
+        YUV-domain chain of the 'yuv' and 'gray' paths: downscale the packed
+        YUYV frame first, then convert (or extract Y from) the output pixels only.
+
+        Returns:
+            int: scratch buffers allocated
+        """
+        perf = self._perf
+        t = perf.start()
+        allocated = 0
+        yuyv = raw
+        if geometry.resize:
+            out_height, out_width = geometry.out_shape[:2]
+            if yuv_slot is not None:
+                yuyv = yuv_slot.buffer
+            else:
+                yuyv, allocated = self._scratch_buffer((out_height, out_width, 2))
+            height, width = raw.shape[:2]
+            # Y0 U Y1 V pixel pairs, so the chroma is averaged with its own lumas
+            cv2.resize(raw.reshape(height, width // 2, 4), (out_width // 2, out_height),
+                       dst=yuyv.reshape(out_height, out_width // 2, 4), interpolation=cv2.INTER_AREA)
+            t = perf.lap('resize_yuv', t)
+        elif yuv_slot is not None:
+            np.copyto(yuv_slot.buffer, raw)
+            yuyv = yuv_slot.buffer
+            t = perf.lap('copy_yuv', t)
+        if geometry.path == 'gray':
+            cv2.cvtColor(yuyv, cv2.COLOR_YUV2GRAY_YUYV, dst=slot.buffer[:, :, 0])
+            perf.lap('gray', t)
+        else:
+            cv2.cvtColor(yuyv, cv2.COLOR_YUV2BGR_YUYV, dst=slot.buffer)
+            perf.lap('cvtColor', t)
+        return allocated
+
+    def _rebuild(self, shape):
+        geometry = _Geometry(tuple(shape), self._maxWidth, self._colorPath)
+        self._geometry = geometry
+        self._geometry_frames = 0
+        self.rebuilds += 1
+        return geometry
+
+    def _scratch_buffer(self, shape):
+        """Get this thread's intermediate buffer, reallocated only for a new shape"""
+        buffer = getattr(self._scratch, 'buffer', None)
+        if buffer is not None and buffer.shape == shape:
+            return buffer, 0
+        buffer = self._scratch.buffer = np.empty(shape, dtype=np.uint8)
+        return buffer, 1
+
+    def _count(self, allocations):
+        self.frames += 1
+        self.allocations += allocations
+        self._geometry_frames += 1
+        if self._geometry_frames > self._warmupFrames:
+            self._steady_frames += 1
+            self._steady_allocations += allocations
@@ -0,0 +1,110 @@
+"""
+Lazy per-frame JPEG encoding for the extended EVE wrapper.
+
+Frames are no longer JPEG-encoded in the frame pipeline. The first request for
+a given frame id encodes it, the bytes are cached until a newer frame is
+requested, and concurrent requesters of a frame that is being encoded wait
+for that single encode instead of starting their own.
+
+Images carrying their downscaled YUYV frame (YUV colour path) are encoded from
+it by a YuvJpegEncoder when one is configured, skipping the colour conversion.
+"""
+
+import threading
+
+import cv2
+
+
+class _PendingEncode:
+    """An encode in flight, shared by every requester of the same frame"""
+
+    __slots__ = ('event', 'data', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.data = None
+        self.error = None
+
+
+class JpegCache:
+    """Single-flight JPEG cache keyed by frame id"""
+
+    def __init__(self, params=None, yuvEncoder=None):
+        """
+        Args:
+            params: list, optional cv2.imencode parameters (e.g. [cv2.IMWRITE_JPEG_QUALITY, 90])
+            yuvEncoder: YuvJpegEncoder used for images with a `yuv` frame, or None
+        """
+        self._params = params or []
+        self._yuvEncoder = yuvEncoder
+        self._lock = threading.Lock()
+        self._frame_id = None
+        self._data = None
+        self._pending = {}
+        self._hits = 0
+        self._shared = 0
+        self._misses = 0
+
+    def get(self, image):
+        """
+        Get the JPEG bytes of an image, encoding it only once per frame id.
+
+        Args:
+            image: FrameView, image tagged with its frame id
+
+        Returns:
+            bytes: JPEG-encoded image
+        """
+        frame_id = image.frame_id
+        with self._lock:
+            if self._data is not None and self._frame_id == frame_id:
+                self._hits += 1
+                return self._data
+            pending = self._pending.get(frame_id)
+            if pending is not None:
+                self._shared += 1
+                owner = False
+            else:
+                pending = self._pending[frame_id] = _PendingEncode()
+                self._misses += 1
+                owner = True
+
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.data
+
+        try:
+            yuv = image.yuv
+            if yuv is not None and self._yuvEncoder is not None:
+                pending.data = self._yuvEncoder.encode(yuv)
+            else:
+                pending.data = cv2.imencode('.jpg', image, self._params)[1].tobytes()
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[frame_id]
+                if pending.error is None and (self._frame_id is None or frame_id >= self._frame_id):
+                    self._frame_id = frame_id
+                    self._data = pending.data
+            pending.event.set()
+        return pending.data
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: hits (cached bytes reused), shared (waited on an in-flight encode),
+                  misses (encodes performed) and the frame id currently cached
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'shared': self._shared,
+                'misses': self._misses,
+                'frame_id': self._frame_id,
+            }
@@ -0,0 +1,181 @@
+"""
+Lazily parsed FPGA metadata for the extended EVE wrapper.
+
+The wrapper keeps only the raw JSON bytes and the frame id of each metadata
+frame; the text is decoded the first time a consumer asks for it and the
+result is memoized on the frame. Whether a frame is usable is decided by a
+cheap scan of the beginning of the text for its serial_status instead of a
+full parse.
+
+Decoding goes through a pluggable backend so faster decoders can be compared
+against the standard library. Optional backends are only imported when
+selected.
+"""
+
+import json
+import re
+
+
+def _stdlib_decoder():
+    return json.loads
+
+
+def _orjson_decoder():
+    import orjson
+    return orjson.loads
+
+
+def _ujson_decoder():
+    import ujson
+    return ujson.loads
+
+
+def _simdjson_decoder():
+    import simdjson
+    return simdjson.loads
+
+
+# Decoder name -> factory returning a callable(bytes) -> object
+JSON_DECODERS = {
+    'json': _stdlib_decoder,
+    'orjson': _orjson_decoder,
+    'ujson': _ujson_decoder,
+    'simdjson': _simdjson_decoder,
+}
+
+# serial_status is expected near the beginning of the payload
+SERIAL_STATUS_SCAN_BYTES = 256
+_SERIAL_STATUS = re.compile(rb'"serial_status"\s*:\s*"([^"]*)"')
+# Frame numbering the payload may carry, used for gap/duplicate detection
+_FRAME_NUMBER = re.compile(rb'"frame_(?:number|no|count)"\s*:\s*(\d+)')
+# Strings and brackets, to find the nesting depth of a key
+_JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+
+
+def register_decoder(name, factory):
+    """
+    Register an additional JSON decoder backend.
+
+    Args:
+        name: str, backend name used in config.yaml (eve.json_decoder)
+        factory: callable returning a callable(bytes) -> object
+    """
+    JSON_DECODERS[name] = factory
+
+
+def get_decoder(name):
+    """
+    Get the decode function of a JSON backend.
+
+    Raises:
+        ValueError: if the backend is unknown
+        RuntimeError: if the backend's package is not installed
+    """
+    factory = JSON_DECODERS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown JSON decoder '{name}', expected one of {list(JSON_DECODERS)}")
+    try:
+        return factory()
+    except ImportError as e:
+        raise RuntimeError(f"JSON decoder '{name}' is not available: {e}")
+
+
+def available_decoders():
+    """Get the names of the JSON backends that can be imported here"""
+    names = []
+    for name, factory in JSON_DECODERS.items():
+        try:
+            factory()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def scan_serial_status(raw):
+    """
+    Find the serial_status value in the first bytes of a JSON payload.
+
+    Returns:
+        str: the status, or None if it is not within the scanned prefix
+    """
+    match = _SERIAL_STATUS.search(raw, 0, SERIAL_STATUS_SCAN_BYTES)
+    if match is None:
+        return None
+    return match.group(1).decode('ascii', 'replace')
+
+
+def scan_frame_number(raw):
+    """
+    Find the payload's own frame number in a JSON payload.
+
+    Only a top-level key counts: frame numbers nested in users, objects or
+    sub-pipelines are not the payload's.
+
+    Returns:
+        int: the frame number, or None if the payload carries none
+    """
+    for match in _FRAME_NUMBER.finditer(raw):
+        if _is_top_level_key(raw, match.start()):
+            return int(match.group(1))
+    return None
+
+
+def _is_top_level_key(raw, position):
+    """Check that the string starting at `position` is a key of the root object"""
+    depth = 0
+    for token in _JSON_TOKEN.finditer(raw):
+        start = token.start()
+        if start == position:
+            return depth == 1
+        if token.end() > position:
+            # `position` lies inside a string
+            return False
+        bracket = token.group()
+        if bracket in (b'{', b'['):
+            depth += 1
+        elif bracket in (b'}', b']'):
+            depth -= 1
+    return False
+
+
+class MetadataFrame:
+    """Raw JSON bytes of one metadata frame, parsed on first access"""
+
+    __slots__ = ('raw', 'frame_id', '_decode', '_parsed')
+
+    def __init__(self, raw, frame_id, decode=json.loads):
+        """
+        Args:
+            raw: bytes, JSON text as read from the FPGA
+            frame_id: int, frame id the metadata belongs to
+            decode: callable(bytes) -> object, JSON decoder backend
+        """
+        self.raw = raw
+        self.frame_id = frame_id
+        self._decode = decode
+        self._parsed = None
+
+    @property
+    def is_parsed(self):
+        return self._parsed is not None
+
+    def parsed(self):
+        """Get the decoded metadata, parsing the raw bytes only once"""
+        parsed = self._parsed
+        if parsed is None:
+            parsed = self._parsed = self._decode(self.raw)
+        return parsed
+
+    def is_success(self):
+        """
+        Check that the frame's serial_status is 'success'.
+
+        Uses a prefix scan of the raw bytes and only falls back to a full
+        (memoized) parse when serial_status is not near the beginning.
+        """
+        status = scan_serial_status(self.raw)
+        if status is None:
+            parsed = self.parsed()
+            status = parsed.get('serial_status') if parsed else None
+        return status == 'success'
@@ -0,0 +1,180 @@
+"""
+Compact preallocated ring of raw metadata frames for the metadata-only mode.
+
+In sensing mode (metadata camera, possibly always-on under ULP) only the FPGA
+metadata matters. The callback copies the JSON text or CFpgaData struct
+straight from the SDK buffer into the next slot of a fixed two-dimensional
+byte array with ctypes.memmove, so a callback allocates no payload bytes:
+
+    ring = MetadataRing(slots=32, capacity=16384)
+    slot = ring.write(address, size)
+    status = scan_serial_status(ring.view(slot))
+    ring.commit(slot, frame_id)
+
+Frames are handed out as ring-backed MetadataFrames whose raw bytes are only
+copied out of the slot (and then parsed) when a consumer reads them. A slot is
+reused `slots` frames later; a frame that has not been read by then has no
+data anymore (raw and parsed() return None).
+"""
+
+import ctypes
+
+import numpy as np
+
+from fpga_metadata import FpgaMetadataFrame, decode_fpga_data
+from metadata import MetadataFrame
+
+
+class MetadataRing:
+    """Fixed number of fixed-capacity byte slots, written in turn by a single writer"""
+
+    def __init__(self, slots=32, capacity=16384):
+        """
+        Args:
+            slots: int, frames kept
+            capacity: int, initial slot size in bytes (grown when a larger frame arrives)
+        """
+        if slots < 2:
+            raise ValueError(f"MetadataRing needs at least 2 slots, got {slots}")
+        self._slots = slots
+        self._allocate(capacity)
+        self._sizes = np.zeros(slots, dtype=np.int64)
+        # Frame id held by each slot, -1 while empty or being written
+        self._frame_ids = np.full(slots, -1, dtype=np.int64)
+        self._next = 0
+        self._written = 0
+        self.allocations = 1
+
+    @property
+    def slots(self):
+        return self._slots
+
+    def write(self, address, size):
+        """
+        Copy a payload from SDK memory into the next slot.
+
+        Args:
+            address: int, address of the payload
+            size: int, payload size in bytes
+
+        Returns:
+            int: slot index, to be passed to view() and commit()
+        """
+        if size > self._capacity:
+            self._grow(size)
+        slot = self._next
+        self._next = (slot + 1) % self._slots
+        self._frame_ids[slot] = -1
+        ctypes.memmove(self._address + slot * self._capacity, address, size)
+        self._sizes[slot] = size
+        self._written += 1
+        return slot
+
+    def view(self, slot):
+        """Zero-copy view of a slot's payload (only valid until the slot is rewritten)"""
+        return self._data[slot, :self._sizes[slot]]
+
+    def commit(self, slot, frame_id):
+        """Tag a written slot with the frame id it is published as"""
+        self._frame_ids[slot] = frame_id
+
+    def read(self, slot, frame_id):
+        """
+        Copy a slot's payload out of the ring.
+
+        Returns:
+            bytes: payload, or None if the slot no longer holds `frame_id`
+        """
+        if self._frame_ids[slot] != frame_id:
+            return None
+        raw = self._data[slot, :self._sizes[slot]].tobytes()
+        if self._frame_ids[slot] != frame_id:
+            return None
+        return raw
+
+    def history(self):
+        """
+        Get the committed slots, oldest first.
+
+        Returns:
+            list: (slot, frame_id) pairs
+        """
+        entries = []
+        for i in range(self._slots):
+            slot = (self._next + i) % self._slots
+            frame_id = int(self._frame_ids[slot])
+            if frame_id >= 0:
+                entries.append((slot, frame_id))
+        return entries
+
+    def stats(self):
+        """
+        Get ring counters.
+
+        Returns:
+            dict: slots, slot capacity (bytes), frames written and allocations
+        """
+        return {
+            'slots': self._slots,
+            'capacity': self._capacity,
+            'written': self._written,
+            'allocations': self.allocations,
+        }
+
+    def _allocate(self, capacity):
+        self._capacity = capacity
+        self._data = np.zeros((self._slots, capacity), dtype=np.uint8)
+        self._address = self._data.ctypes.data
+
+    def _grow(self, size):
+        """Reallocate every slot to hold `size` bytes, keeping the frames already written"""
+        old = self._data
+        self._allocate(1 << (size - 1).bit_length())
+        self._data[:, :old.shape[1]] = old
+        self.allocations += 1
+
+
+class _RingBacked:
+    """Metadata frame whose raw bytes are copied out of a MetadataRing on first access"""
+
+    __slots__ = ()
+
+    def _init_ring(self, ring, slot, frame_id, decode):
+        self._ring = ring
+        self._slot = slot
+        self.frame_id = frame_id
+        self._decode = decode
+        self._parsed = None
+        MetadataFrame.raw.__set__(self, None)
+
+    @property
+    def raw(self):
+        raw = MetadataFrame.raw.__get__(self)
+        if raw is None:
+            raw = self._ring.read(self._slot, self.frame_id)
+            MetadataFrame.raw.__set__(self, raw)
+        return raw
+
+    def parsed(self):
+        """Get the decoded metadata, or None if the slot was reused before it was read"""
+        if self._parsed is None and self.raw is None:
+            return None
+        return MetadataFrame.parsed(self)
+
+
+class RingMetadataFrame(_RingBacked, MetadataFrame):
+    """JSON metadata frame held in a MetadataRing slot"""
+
+    __slots__ = ('_ring', '_slot')
+
+    def __init__(self, ring, slot, frame_id, decode):
+        self._init_ring(ring, slot, frame_id, decode)
+
+
+class RingFpgaMetadataFrame(_RingBacked, FpgaMetadataFrame):
+    """CFpgaData metadata frame held in a MetadataRing slot"""
+
+    __slots__ = ('_ring', '_slot')
+
+    def __init__(self, ring, slot, frame_id):
+        self._init_ring(ring, slot, frame_id, decode_fpga_data)
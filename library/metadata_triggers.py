@@ -0,0 +1,253 @@
+"""
+Declarative triggers evaluated on every new metadata frame.
+
+Instead of polling get_frame_data() and walking the metadata dictionary,
+consumers register a condition and get a concurrent.futures.Future that is
+resolved, with the frame that satisfied it, as soon as the condition has held
+for the requested number of consecutive frames. Frames are anything with a
+frame_id and parsed(): the wrapper evaluates its FrameRecords, so the future
+carries the metadata and the image published together:
+
+    registered = any_user(where('is_face_id_status_available', '==', True),
+                          where('face_id_status', '==', 'registered'))
+    future = eve.add_trigger(registered)
+    future = eve.add_trigger(where('pipeline_data.user_count', '==', 5), frames=10)
+    record = future.result(timeout=5)
+
+Field paths are split once when the condition is built; evaluating a frame is a
+few dictionary lookups per condition. Frames are only parsed while triggers are
+pending, and the parse is shared with every other consumer of the frame.
+Cancel a future to drop its trigger; done callbacks run on the thread that
+published the frame.
+"""
+
+import concurrent.futures
+import operator
+import threading
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, options: value in options,
+    'not in': lambda value, options: value not in options,
+}
+
+_MISSING = object()
+
+
+def _accessor(path):
+    """Compile a dotted path ('pipeline_data.users.0.id') into a getter returning _MISSING when absent"""
+    keys = tuple(int(key) if key.lstrip('-').isdigit() else key for key in path.split('.'))
+
+    def get(data):
+        for key in keys:
+            try:
+                data = data[key]
+            except (KeyError, IndexError, TypeError):
+                return _MISSING
+        return data
+    return get
+
+
+def where(path, op, value):
+    """
+    Condition on one field.
+
+    Args:
+        path: str, dotted path from the metadata root (or from the user for any_user())
+        op: str, one of OPERATORS
+        value: value compared with the field; a missing field never matches
+
+    Returns:
+        callable(dict) -> bool
+    """
+    compare = OPERATORS.get(op)
+    if compare is None:
+        raise ValueError(f"Unknown operator '{op}', expected one of {list(OPERATORS)}")
+    get = _accessor(path)
+
+    def condition(data):
+        field = get(data)
+        return field is not _MISSING and compare(field, value)
+    return condition
+
+
+def all_of(*conditions):
+    """Condition holding when every condition holds"""
+    def condition(data):
+        for c in conditions:
+            if not c(data):
+                return False
+        return True
+    return condition
+
+
+def any_of(*conditions):
+    """Condition holding when at least one condition holds"""
+    def condition(data):
+        for c in conditions:
+            if c(data):
+                return True
+        return False
+    return condition
+
+
+def not_(condition):
+    """Condition holding when `condition` does not"""
+    return lambda data: not condition(data)
+
+
+def any_user(*conditions, users='pipeline_data.users'):
+    """
+    Condition holding when one user satisfies all `conditions` (paths relative to the user).
+
+    Args:
+        users: str, path of the users list
+    """
+    get = _accessor(users)
+    match = all_of(*conditions)
+
+    def condition(data):
+        entries = get(data)
+        if entries is _MISSING or not entries:
+            return False
+        for user in entries:
+            if match(user):
+                return True
+        return False
+    return condition
+
+
+class _Trigger:
+    __slots__ = ('condition', 'frames', 'count', 'last_frame_id', 'future')
+
+    def __init__(self, condition, frames):
+        self.condition = condition
+        self.frames = frames
+        self.count = 0
+        self.last_frame_id = None
+        self.future = concurrent.futures.Future()
+
+
+class MetadataTriggers:
+    """Pending triggers of a wrapper, evaluated once per published metadata frame"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._triggers = []
+        self._last_frame_id = None
+        self._evaluated = 0
+        self._resolved = 0
+
+    def __bool__(self):
+        return bool(self._triggers)
+
+    def add(self, condition, frames=1, current=None, after_id=None):
+        """
+        Register a condition.
+
+        Args:
+            condition: callable(dict) -> bool, e.g. built with where() / any_user()
+            frames: int, consecutive frames the condition must hold for
+            current: MetadataFrame or FrameRecord, latest frame, counted as the first evaluated frame
+            after_id: int, frames up to this frame id (`current` included) are not evaluated
+
+        Returns:
+            concurrent.futures.Future: resolved with the frame completing the run
+        """
+        if frames < 1:
+            raise ValueError(f"frames must be at least 1, got {frames}")
+        trigger = _Trigger(condition, frames)
+        if after_id is not None:
+            trigger.last_frame_id = after_id
+        resolved = []
+        with self._lock:
+            if current is None or not self._update(trigger, current, current.parsed(), resolved):
+                self._triggers.append(trigger)
+        self._resolve(resolved)
+        return trigger.future
+
+    def evaluate(self, metadata):
+        """
+        Evaluate every pending trigger on a newly published frame.
+
+        Frames older than the last evaluated one (finished late by another
+        pipeline worker) are ignored.
+
+        Args:
+            metadata: MetadataFrame or FrameRecord with its frame id assigned
+        """
+        if not self._triggers:
+            return
+        resolved = []
+        with self._lock:
+            if self._last_frame_id is not None and metadata.frame_id <= self._last_frame_id:
+                return
+            self._last_frame_id = metadata.frame_id
+            self._evaluated += 1
+            data = metadata.parsed()
+            self._triggers = [trigger for trigger in self._triggers
+                              if not self._update(trigger, metadata, data, resolved)]
+        self._resolve(resolved)
+
+    def cancel_all(self):
+        """Cancel every pending trigger"""
+        with self._lock:
+            triggers, self._triggers = self._triggers, []
+        for trigger in triggers:
+            trigger.future.cancel()
+
+    def stats(self):
+        """
+        Get trigger counters.
+
+        Returns:
+            dict: pending triggers, frames evaluated and triggers resolved
+        """
+        with self._lock:
+            return {
+                'pending': len(self._triggers),
+                'evaluated': self._evaluated,
+                'resolved': self._resolved,
+            }
+
+    def _update(self, trigger, metadata, data, resolved):
+        """
+        Advance one trigger on a frame.
+
+        Completed triggers are appended to `resolved` with their outcome, to be
+        resolved once the lock is released (done callbacks may add triggers).
+
+        Returns:
+            bool: True when the trigger is finished (completed or cancelled)
+        """
+        if trigger.future.done():
+            return True
+        if trigger.last_frame_id is not None and metadata.frame_id <= trigger.last_frame_id:
+            return False
+        trigger.last_frame_id = metadata.frame_id
+        try:
+            matched = bool(data) and trigger.condition(data)
+        except Exception as e:
+            resolved.append((trigger.future, None, e))
+            return True
+        trigger.count = trigger.count + 1 if matched else 0
+        if trigger.count < trigger.frames:
+            return False
+        self._resolved += 1
+        resolved.append((trigger.future, metadata, None))
+        return True
+
+    @staticmethod
+    def _resolve(resolved):
+        for future, metadata, error in resolved:
+            if not future.set_running_or_notify_cancel():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(metadata)
@@ -0,0 +1,114 @@
+"""
+Low-overhead per-stage timing of the EVE callback hot path.
+
+Stages are timed with time.perf_counter_ns() and aggregated into fixed
+power-of-two histograms: bucket i counts durations in [2**(i-1), 2**i) ns, so
+recording a sample is a bit_length() and a list increment, with no allocation
+and no sorting. Timing is switched at runtime; when it is off the callback
+only tests one boolean per stage.
+
+    perf = PerfStats()
+    t = perf.start()
+    ...
+    t = perf.lap('read_json', t)
+
+Samples are recorded without a lock: concurrent updates from the callback and
+pipeline threads may very rarely lose a count, which is acceptable for
+statistics and keeps the hot path cheap.
+"""
+
+import time
+
+BUCKETS = 40  # last bucket collects everything above ~275 s
+
+
+class _Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+class PerfStats:
+    """Fixed-bucket duration histograms keyed by stage name"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._stages = {}
+
+    def start(self):
+        """Get the start time of a timed section, or 0 when timing is off"""
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def lap(self, stage, start):
+        """
+        Record the time elapsed since `start` for a stage.
+
+        Args:
+            stage: str, stage name
+            start: int, value of start() or of the previous lap()
+
+        Returns:
+            int: current time, start of the next stage (0 when timing is off)
+        """
+        if not self.enabled or not start:
+            return 0
+        now = time.perf_counter_ns()
+        self.record(stage, now - start)
+        return now
+
+    def record(self, stage, ns):
+        """Add one duration sample (ns) to a stage's histogram"""
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages.setdefault(stage, _Histogram())
+        histogram.counts[min(ns.bit_length(), BUCKETS - 1)] += 1
+        histogram.count += 1
+        histogram.total += ns
+        if ns > histogram.max:
+            histogram.max = ns
+
+    def reset(self):
+        """Drop every recorded sample"""
+        self._stages = {}
+
+    def snapshot(self):
+        """
+        Get the statistics of every stage.
+
+        Percentiles are the upper bound of the histogram bucket they fall in.
+
+        Returns:
+            dict: stage -> count, mean/max/p50/p90/p99 in microseconds and the
+                  non-empty buckets as [upper bound ns, count] pairs
+        """
+        stats = {}
+        for stage, histogram in list(self._stages.items()):
+            counts = list(histogram.counts)
+            count = sum(counts)
+            if not count:
+                continue
+            stats[stage] = {
+                'count': count,
+                'mean_us': histogram.total / histogram.count / 1000.0,
+                'max_us': histogram.max / 1000.0,
+                'p50_us': _percentile(counts, count, 0.50) / 1000.0,
+                'p90_us': _percentile(counts, count, 0.90) / 1000.0,
+                'p99_us': _percentile(counts, count, 0.99) / 1000.0,
+                'buckets': [[1 << i, n] for i, n in enumerate(counts) if n],
+            }
+        return stats
+
+
+def _percentile(counts, count, q):
+    """Upper bound (ns) of the bucket holding the q-quantile"""
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(counts):
+        seen += n
+        if seen >= rank:
+            return 1 << i
+    return 1 << (len(counts) - 1)
@@ -0,0 +1,126 @@
+"""
+JPEG encoding straight from YUYV images for the extended EVE wrapper.
+
+JPEG stores YCbCr, so encoding a BGR image makes the encoder convert the
+colours back. When the wrapper keeps the downscaled YUYV frame (YUV colour
+path), a backend that accepts YUV planes can encode it without any colour
+conversion: the packed YUYV pixels are only split into 4:2:2 Y, U and V planes
+(reused per thread) and handed to the encoder.
+
+JPEG stores full-range YCbCr while OpenCV's YUYV to BGR conversion assumes
+video range (16-235), so a video-range camera frame encoded this way has
+slightly flatter contrast than the same frame encoded through the BGR path.
+
+Backends are optional packages, imported only when selected:
+
+- 'simplejpeg': simplejpeg.encode_jpeg_yuv_planes
+- 'turbojpeg': PyTurboJPEG TurboJPEG.encode_from_yuv (needs libturbojpeg)
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+def _simplejpeg_encoder():
+    import simplejpeg
+
+    def encode(planes, quality):
+        return simplejpeg.encode_jpeg_yuv_planes(planes.y, planes.u, planes.v, quality=quality)
+    return encode
+
+
+def _turbojpeg_encoder():
+    from turbojpeg import TJSAMP_422, TurboJPEG
+    jpeg = TurboJPEG()
+
+    def encode(planes, quality):
+        return jpeg.encode_from_yuv(planes.buffer, planes.height, planes.width, quality=quality,
+                                    jpeg_subsample=TJSAMP_422, align=1)
+    return encode
+
+
+# Backend name -> factory returning a callable(_Planes, quality) -> bytes
+YUV_JPEG_ENCODERS = {
+    'simplejpeg': _simplejpeg_encoder,
+    'turbojpeg': _turbojpeg_encoder,
+}
+
+
+def available_yuv_encoders():
+    """Get the names of the YUV JPEG backends that can be used here"""
+    names = []
+    for name, factory in YUV_JPEG_ENCODERS.items():
+        try:
+            factory()
+        except (ImportError, OSError, RuntimeError):
+            continue
+        names.append(name)
+    return names
+
+
+class _Planes:
+    """Contiguous 4:2:2 planar buffer (Y, then U, then V) for one image size"""
+
+    __slots__ = ('height', 'width', 'buffer', 'y', 'u', 'v')
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.buffer = np.empty(height * width * 2, dtype=np.uint8)
+        size = height * width
+        self.y = self.buffer[:size].reshape(height, width)
+        self.u = self.buffer[size:size + size // 2].reshape(height, width // 2)
+        self.v = self.buffer[size + size // 2:].reshape(height, width // 2)
+
+    def fill(self, yuyv):
+        """Split a packed (height, width, 2) YUYV image into the planes"""
+        yuyv = yuyv.view(np.ndarray)
+        cv2.extractChannel(yuyv, 0, dst=self.y)
+        # Y0 U Y1 V pixel pairs
+        pairs = yuyv.reshape(self.height, self.width // 2, 4)
+        cv2.extractChannel(pairs, 1, dst=self.u)
+        cv2.extractChannel(pairs, 3, dst=self.v)
+
+
+class YuvJpegEncoder:
+    """Encodes packed YUYV images to JPEG through a YUV-planar backend"""
+
+    def __init__(self, name, quality=95):
+        """
+        Args:
+            name: str, backend name, one of YUV_JPEG_ENCODERS
+            quality: int, JPEG quality (cv2.imencode's default is 95)
+
+        Raises:
+            ValueError: if the backend is unknown
+            RuntimeError: if the backend's package or library is not installed
+        """
+        factory = YUV_JPEG_ENCODERS.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown YUV JPEG encoder '{name}', expected one of {list(YUV_JPEG_ENCODERS)}")
+        try:
+            self._encode = factory()
+        except (ImportError, OSError, RuntimeError) as e:
+            raise RuntimeError(f"YUV JPEG encoder '{name}' is not available: {e}")
+        self.name = name
+        self.quality = quality
+        self._planes = threading.local()
+
+    def encode(self, yuyv):
+        """
+        Encode a YUYV image.
+
+        Args:
+            yuyv: ndarray, (height, width, 2) packed YUYV image, even width
+
+        Returns:
+            bytes: JPEG-encoded image
+        """
+        height, width = yuyv.shape[:2]
+        planes = getattr(self._planes, 'planes', None)
+        if planes is None or planes.height != height or planes.width != width:
+            planes = self._planes.planes = _Planes(height, width)
+        planes.fill(yuyv)
+        return self._encode(planes, self.quality)
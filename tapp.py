@@ -10,6 +10,7 @@ from conftest import config, eve
 from conftest import saveimage
 from conftest import savemeta
 from library.photo import Photo
+from library.metadata_triggers import any_user, not_, where
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
@@ -20,6 +21,8 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 # General
 logger = logging.getLogger(__name__)
+# Longest wait in __fetch for the image of the next frame (seconds)
+SNAPSHOT_TIMEOUT = 2.0
 
 # ████████╗███████╗███████╗████████╗     ██╗███╗   ██╗██╗████████╗
 # ╚══██╔══╝██╔════╝██╔════╝╚══██╔══╝     ██║████╗  ██║██║╚══██╔══╝
@@ -52,12 +55,20 @@ def __fetch(eve):
 		return None, None
 	
 	try:
-		# Get consistent frame data atomically to avoid race conditions
-		frame_data = eve.get_frame_data()
+		record = None
+		if eve.get_demand_stats()['demand_mode']:
+			# Images are only processed on request: ask for the image of the next frame
+			# (None without images, e.g. on the metadata camera)
+			record = eve.request_frame_record(timeout=SNAPSHOT_TIMEOUT)
+		if record is not None:
+			frame_ = record.image_view
+		else:
+			# Consistent metadata, image and frame_id of one frame, shared with other readers
+			record = eve.get_frame_record()
+			frame_ = record.image
         
-		meta_json = frame_data['metadata']
-		frame_ = frame_data['image']
-		frame_id = frame_data['frame_id']
+		meta_json = record.parsed()
+		frame_id = record.frame_id
         
 		if not meta_json:
 			logger.debug("No metadata available from EVE")
@@ -67,7 +78,8 @@ def __fetch(eve):
 		logger.debug(f"Raw EVE JSON: {meta_json}")
 		logger.debug(f"EVE JSON keys: {list(meta_json.keys()) if isinstance(meta_json, dict) else 'Not a dict'}")
         
-		# Use EVE metadata directly with minimal processing
+		# Use EVE metadata directly with minimal processing (the parsed metadata is
+		# shared by every reader of the frame, so only this copy gets frame_info)
 		meta_ = meta_json.copy()
         
 		# Create frame_info with frame_id only
@@ -81,6 +93,43 @@ def __fetch(eve):
 		logger.error(f"Error fetching metadata from EVE: {e}")
 		return None, None
 
+def __wait_for_metadata(eve, condition, timeout, after_id=None):
+	"""
+	Wait until a metadata trigger condition holds, evaluated by EVE on every new frame.
+	
+	Args:
+		eve: EVE wrapper instance from the eve fixture
+		condition: metadata trigger condition (library.metadata_triggers)
+		timeout: float, maximum wait in seconds
+		after_id: int, frame id read before sending a command: only frames published
+			after it are evaluated (None also evaluates the current frame)
+	
+	Returns:
+		tuple: (metadata_dict, frame_array) of the frame satisfying the condition,
+		both from its frame record, or of the latest frame on timeout
+	"""
+	if eve is None:
+		logger.error("EVE wrapper not available")
+		return None, None
+	
+	demand_mode = eve.get_demand_stats()['demand_mode']
+	# In demand mode images are only processed on request: an image subscriber while
+	# waiting makes every frame, and so the one satisfying the condition, carry its image
+	subscription = eve.subscribe(fields=('image',)) if demand_mode else None
+	try:
+		record = eve.wait_until(condition, timeout=timeout, after_id=after_id)
+	finally:
+		if subscription is not None:
+			subscription.close()
+	if record is None or not record.parsed():
+		return __fetch(eve)
+	
+	meta_ = record.parsed().copy()
+	meta_["frame_info"] = {
+		"frame_no": record.frame_id
+	}
+	return meta_, record.image_view if demand_mode else record.image
+
 def __generate_unique_id(test_name=None):
 	"""
 	Generate a unique ID using the current timestamp in the format YYYY-MM-DD_HH-MM-SS.
@@ -143,12 +192,13 @@ def test_live(config, options, eve):
 			frame_info = meta_.get("frame_info", {}) if meta_ else {}
 			user_count = meta_.get("pipeline_data", {}).get("user_count", 0) if meta_ else 0
 	
-			# Calculate FPS based on frame_no increments
+			# Calculate FPS based on frame_no increments (one per frame, frames skipped by this loop included)
 			frame_no = frame_info.get("frame_no", None)
 			if prev_frame is not None and frame_no != prev_frame:
 				if prev_fps is not None:
 					period = curr_time - prev_fps
-					fps = 1.0 / period if period > 0 else 0.0
+					frames = frame_no - prev_frame if frame_no is not None and frame_no > prev_frame else 1
+					fps = frames / period if period > 0 else 0.0
 				prev_fps = curr_time
 			elif prev_fps is None:
 				prev_fps = curr_time
@@ -307,6 +357,11 @@ class FaceIDError(Exception):
 	"""Custom exception for Face ID operations."""
 	pass
 
+# Any user with a face ID status reported as registered (trigger form of __check_registered_faces)
+REGISTERED_FACE = any_user(
+	where("is_face_id_status_available", "==", True),
+	where("face_id_status", "==", "registered"))
+
 def __check_registered_faces(meta_):
 	"""
 	Common helper function to check if any registered faces exist in metadata.
@@ -363,11 +418,12 @@ def __unregister(eve, registered_face_path, display_photo):
 		max_retries = 3
 		for attempt in range(1, max_retries + 1):
 			# Clear existing Face IDs from gallery
+			frame_id = eve.get_frame_id()
 			eve.clearFaceID()
-			time.sleep(3)  # Allow time for clear command to process
 
-			# Fetch metadata to verify the clear operation
-			meta_, frame_ = __fetch(eve)
+			# Fetch metadata until the clear operation shows up (up to 3s for the command to process),
+			# only looking at frames published after the command
+			meta_, frame_ = __wait_for_metadata(eve, not_(REGISTERED_FACE), 3, after_id=frame_id)
 
 			# Check if any registered faces still exist using common helper
 			if not __check_registered_faces(meta_):
@@ -422,11 +478,12 @@ def __register(eve, registered_face_path):
 		max_retries = 3
 		for attempt in range(1, max_retries + 1):
 			# Register the displayed face
+			frame_id = eve.get_frame_id()
 			eve.registerFaceID()
-			time.sleep(5)  # Allow time for registration to complete
 
-			# Fetch metadata to verify registration
-			meta_, frame_ = __fetch(eve)
+			# Fetch metadata until the registration shows up (up to 5s for registration to complete),
+			# only looking at frames published after the command
+			meta_, frame_ = __wait_for_metadata(eve, REGISTERED_FACE, 5, after_id=frame_id)
 
 			# Check if face was successfully registered using common helper
 			if __check_registered_faces(meta_):
@@ -540,14 +597,9 @@ def test_fid(config, display_photo, registered_faces, test_scenario_index, test_
 			# Fetch metadata from EVE
 			#meta_, frame_ = __fetch(eve)
 
-			meta_, frame_ = None, None
-			for attempt in range(10):  # up to 10 retries (10 seconds total)
-				meta_, frame_ = __fetch(eve)
-				if meta_:
-					registered_face_detected = __check_registered_faces(meta_)
-					if registered_face_detected == expected_result:
-						break  # Pipeline stabilized, exit early
-				time.sleep(1)  # short wait before next attempt
+			# Check every new frame for up to 10 seconds, exit as soon as the pipeline stabilizes
+			meta_, frame_ = __wait_for_metadata(
+				eve, REGISTERED_FACE if expected_result else not_(REGISTERED_FACE), 10)
 
 			
 			if meta_:
@@ -649,3 +701,37 @@ def test_fid(config, display_photo, registered_faces, test_scenario_index, test_
 
 	# Assert the test result
 	assert (test_result == "Pass"), f"FID test failed for {test_scenario} with registered face {registered_face_path}. Error occurred during task execution."
+
+def test_record_metadata_sample(request, eve):
+	"""
+	Record the firmware's JSON metadata and the CFpgaData struct of one frame, with
+	at least one user in view, over the metadata sample the unit tests compare with
+	decode_fpga_data():
+
+		pytest tapp.py::test_record_metadata_sample --record-metadata tests/fixtures
+	"""
+	directory = request.config.getoption("--record-metadata")
+	if not directory:
+		pytest.skip("no --record-metadata directory given")
+	if eve is None:
+		pytest.skip("EVE wrapper not available")
+
+	from library.fpga_metadata import decode_fpga_data
+
+	sample = None
+	for _ in range(100):
+		sample = eve.capture_metadata_sample(timeout=5.0)
+		assert sample is not None, "No EVE callback within 5 s"
+		assert sample['json'] and sample['fpga'], "FpgaReadJson or EveGetFpgaData returned no data"
+		decoded = decode_fpga_data(sample['fpga'])
+		if decoded['serial_status'] == 'success' and decoded['pipeline_data']['user_count'] > 0:
+			break
+	else:
+		pytest.fail("No successful frame with a user in view in 100 frames")
+
+	os.makedirs(directory, exist_ok=True)
+	with open(os.path.join(directory, "metadata_sample.json"), "wb") as f:
+		f.write(sample['json'])
+	with open(os.path.join(directory, "metadata_sample.bin"), "wb") as f:
+		f.write(sample['fpga'])
+	logger.info(f"Recorded firmware metadata sample into {directory}")
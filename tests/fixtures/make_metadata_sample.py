@@ -0,0 +1,98 @@
+"""
+Write metadata_sample.bin: the CFpgaData struct matching metadata_sample.json.
+
+The struct is filled field by field from the C definitions, independently of
+fpga_metadata.decode_fpga_data(), so the tests comparing the two sample files
+check the decoder against JSON written by hand. Two users (one with person
+data), face ID data and one detected object. A sample recorded from the camera
+replaces both files:
+
+    pytest tapp.py::test_record_metadata_sample --record-metadata tests/fixtures
+
+Usage:
+    python tests/fixtures/make_metadata_sample.py
+"""
+
+import ctypes
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'library'))
+
+from eve.eve_python import eve_sdk as sdk
+
+structs = sdk.structs
+
+
+def _set(target, **values):
+    for name, value in values.items():
+        setattr(target, name, value)
+
+
+def _points(array, points):
+    for point, (x, y, z) in zip(array, points):
+        _set(point, x=x, y=y, z=z)
+
+
+def build():
+    data = structs.CFpgaData()
+    _set(data.message, responseType=1, responseVersion=1, serialStatus=structs.EveFpgaSerialStatus.EVE_FPGA_SUCCESS,
+         serialReadTimeNano=1234567890123)
+    pipeline = data.pipelineData
+    pipeline.pipelineType = structs.EveFpgaPipelineType.EVE_FACE_ID_PIPELINE
+    _set(pipeline.imageDimensions, width=1600, height=1200)
+    _set(pipeline.dataContent, numberOfUsers=2, idealUserIndex=0, numberOfDetectedFaces=2, numberOfDetectedPersons=1,
+         isIdealUserIndexValid=True, isNumberOfDetectedFacesAvailable=True, isNumberOfDetectedPersonsAvailable=True,
+         isUsersDataAvilable=True, isFaceIdDataAvailable=True, isObjectDetectionAvailable=True)
+
+    user = pipeline.userData[0]
+    _set(user, id=3, status=1, isIdealUser=True, isIdValid=True)
+    face = user.faceData
+    _set(face, faceConfidence=0.875, faceDistance=120, numberOfFaceLandmarkPoints=3, faceID=7,
+         faceIDStatus=structs.EvePersonRegistrationStatus.EVE_REGISTERED, isStatusAvailable=True)
+    _set(face.faceCenter, x=12, y=-8, z=1200)
+    _set(face.anglesICS, pitch=1.5, yaw=-2.25, roll=0.5)
+    _set(face.anglesCCS, pitch=2.0, yaw=-3.5, roll=0.25)
+    # Only the first numberOfFaceLandmarkPoints landmarks are valid
+    _points(face.landmarks, [(100, 200, 0), (140, 200, 0), (120, 240, 5), (999, 999, 999)])
+    _set(face.faceBox, left=80, top=150, right=180, bottom=280)
+    person = user.personData
+    _set(person, isPersonDataAvailable=True, personConfidence=0.75, personDistance=130, personPosture=0,
+         numberOfPersonLandmarkPoints=2)
+    _set(person.position, x=10, y=-20, z=1300)
+    _points(person.landmarks, [(90, 300, 0), (150, 300, 0)])
+    _set(person.personBox, left=40, top=120, right=240, bottom=700)
+
+    user = pipeline.userData[1]
+    _set(user, id=5, status=0, isIdealUser=False, isIdValid=True)
+    face = user.faceData
+    _set(face, faceConfidence=0.5, faceDistance=250, numberOfFaceLandmarkPoints=0, faceID=-1,
+         faceIDStatus=structs.EvePersonRegistrationStatus.EVE_UNREGISTERED, isStatusAvailable=False)
+    _set(face.faceCenter, x=-300, y=10, z=2500)
+    _set(face.anglesICS, pitch=-4.0, yaw=12.5, roll=1.0)
+    _set(face.anglesCCS, pitch=-3.0, yaw=10.75, roll=1.25)
+    _set(face.faceBox, left=900, top=180, right=960, bottom=250)
+
+    # A third user past numberOfUsers must not be decoded
+    pipeline.userData[2].id = 9
+
+    _set(pipeline.faceId, command=1, userId=3, statusCode=0, faceId=7, lastRegisteredFaceID=7, usersInGallery=1,
+         gallerySize=10)
+    pipeline.objectData.numberOfObjects = 1
+    detection = pipeline.objectData.objects[0]
+    _set(detection, objectClass=structs.EveFpgaObjectClass.EVE_FPGA_OBJECT_CLASS_PERSON, objectConfidence=0.625)
+    _set(detection.objectBox, left=40, top=120, right=240, bottom=700)
+    return data
+
+
+def main():
+    data = build()
+    with open(os.path.join(HERE, 'metadata_sample.bin'), 'wb') as file_:
+        file_.write(ctypes.string_at(ctypes.addressof(data), ctypes.sizeof(data)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+from eve_record import Recording, ReplaySDK
+from eve_sim import EveSimSDK, SyntheticFrames
+from eve_wrapper_ext import EveWrapperExt
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAMES = 30
+
+
+def _wrapper():
+    return EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                         toJpg=False, copyImage=True, maxWidth=0, driverPath=ROOT, objectDetection=False)
+
+
+def _record(path, frames):
+    wrapper = _wrapper()
+    wrapper.start_recording(path, queueSize=FRAMES)
+    sim = EveSimSDK(frames, fps=100, loop=False)
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=sim)
+        assert sim.wait_finished(10)
+    finally:
+        stats = wrapper.stop_recording()
+        wrapper.stop()
+    return stats
+
+
+def _wait_for_id(wrapper, frame_id, timeout=10):
+    while wrapper.get_frame_id() < frame_id:
+        if wrapper.wait_for_frame(timeout=timeout) is None:
+            break
+    return wrapper.get_frame_id()
+
+
+def _check_recording(path, frames):
+    recording = Recording(path)
+    assert recording.indexed
+    assert len(recording) == len(frames)
+    for recorded, frame in zip(recording, frames):
+        assert recorded.json.tobytes() == frame.json.tobytes()
+        np.testing.assert_array_equal(recorded.image, frame.image)
+        assert recorded.callback_ns > 0
+    del recorded
+    recording.close()
+
+
+def test_recording_round_trip(tmp_path):
+    frames = SyntheticFrames(width=1280, height=960, users=2, frames=FRAMES)
+    path = str(tmp_path / 'session.everec')
+    stats = _record(path, frames)
+    assert stats['frames'] == FRAMES
+    assert stats['dropped'] == 0
+    _check_recording(path, frames)
+
+    wrapper = _wrapper()
+    subscription = wrapper.subscribe(fields=('metadata', 'image'), depth=FRAMES, policy='drop_oldest')
+    replay = ReplaySDK(path, speed='max')
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=replay)
+        assert replay.wait_finished(10)
+        # Every recorded frame is published: at full speed the pipeline waits instead of dropping
+        assert _wait_for_id(wrapper, FRAMES) == FRAMES
+        replayed = [subscription.get(timeout=1) for _ in range(FRAMES)]
+        assert wrapper.get_pipeline_stats()['dropped'] == 0
+    finally:
+        wrapper.stop()
+
+    assert [frame.frame_id for frame in replayed] == list(range(1, FRAMES + 1))
+    for frame, recorded in zip(replayed, frames):
+        assert frame.metadata.raw == recorded.json.tobytes()
+        assert frame.image.shape[:2] == (960, 1280)
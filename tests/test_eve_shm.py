@@ -0,0 +1,151 @@
+import ctypes
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+import numpy as np
+import pytest
+
+import eve_shm
+from eve_sim import synthetic_fpga_data
+from eve_shm import ShmPublisher, ShmReader
+from fpga_metadata import FPGA_DATA_SIZE, FpgaMetadataFrame
+from metadata import MetadataFrame
+
+LIBRARY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'library')
+
+
+@pytest.fixture
+def publisher():
+    publisher = ShmPublisher('eve_test_' + uuid.uuid4().hex[:8], slots=3, imageBytes=64 * 48 * 3,
+                             metadataBytes=FPGA_DATA_SIZE)
+    yield publisher
+    publisher.close()
+
+
+def _image(value, height=48, width=64):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def _json(frame_id):
+    return MetadataFrame(json.dumps({'frame': frame_id}).encode(), frame_id)
+
+
+def test_round_trip(publisher):
+    reader = ShmReader(publisher.name)
+    try:
+        assert reader.read_latest() is None
+        publisher.publish(7, _json(7), _image(7))
+        frame = reader.read_next(timeout=1)
+        assert (frame.number, frame.frame_id) == (1, 7)
+        assert frame.metadata().parsed() == {'frame': 7}
+        np.testing.assert_array_equal(frame.image, _image(7))
+        assert not frame.image.flags.writeable
+
+        raw = ctypes.string_at(ctypes.addressof(synthetic_fpga_data(2)), FPGA_DATA_SIZE)
+        publisher.publish(8, FpgaMetadataFrame(raw, 8), None)
+        frame = reader.read_next(timeout=1)
+        assert frame.image is None
+        assert isinstance(frame.metadata(), FpgaMetadataFrame)
+        assert frame.metadata().raw == raw
+        assert reader.read_next(timeout=0.01) is None
+        assert reader.stats() == {'published': 2, 'read': 2, 'missed': 0, 'torn': 0}
+    finally:
+        reader.close()
+
+
+def test_oversize_payloads_are_left_out(publisher):
+    reader = ShmReader(publisher.name)
+    try:
+        publisher.publish(1, _json(1), _image(1, height=96))
+        frame = reader.read_latest()
+        assert frame.image is None and frame.metadata() is not None
+        assert publisher.stats()['oversize'] == 1
+    finally:
+        reader.close()
+
+
+def test_overwritten_frames_are_missed_and_invalidated(publisher):
+    reader = ShmReader(publisher.name)
+    try:
+        publisher.publish(1, _json(1), _image(1))
+        first = reader.read_latest()
+        for frame_id in range(2, 7):
+            publisher.publish(frame_id, _json(frame_id), _image(frame_id))
+        # Frame 1's slot was written again: the views no longer hold it
+        assert not first.is_valid()
+        assert first.metadata() is None
+        assert reader.read_next(timeout=1).frame_id == 5
+        assert reader.read_next(timeout=1).frame_id == 6
+        assert reader.stats()['missed'] == 3
+    finally:
+        reader.close()
+
+
+def test_slot_being_written_is_retried_then_skipped(publisher):
+    reader = ShmReader(publisher.name, retries=3)
+    try:
+        publisher.publish(1, _json(1), None)
+        reader._ring.locks[0] += 1
+        assert reader.read_latest() is None
+        assert reader.stats()['torn'] == 3
+        # Readable again once the write completed
+        reader._ring.locks[0] += 1
+        assert reader.read_latest().frame_id == 1
+    finally:
+        reader.close()
+
+
+def test_torn_read_is_retried(publisher, monkeypatch):
+    reader = ShmReader(publisher.name)
+    publisher.publish(1, _json(1), _image(1))
+    frame_type = eve_shm.ShmFrame
+    writes = []
+
+    def overwritten_while_read(ring, slot, lock, header):
+        frame = frame_type(ring, slot, lock, header)
+        if not writes:
+            # A publish of the same frame completes while the views are built
+            writes.append(1)
+            ring.locks[slot] += 2
+        return frame
+
+    monkeypatch.setattr(eve_shm, 'ShmFrame', overwritten_while_read)
+    try:
+        frame = reader.read_next(timeout=1)
+        assert frame.frame_id == 1 and frame.is_valid()
+        assert reader.stats()['torn'] == 1
+    finally:
+        reader.close()
+
+
+def test_same_process_reader_keeps_the_tracker_registration(publisher, monkeypatch):
+    untracked = []
+    monkeypatch.setattr(ShmReader, '_untrack', staticmethod(untracked.append))
+    ShmReader(publisher.name).close()
+    assert untracked == []
+
+
+def test_reader_in_another_process(publisher):
+    publisher.publish(3, _json(3), _image(3))
+    script = (
+        'import sys; sys.path.insert(0, sys.argv[1])\n'
+        'from eve_shm import ShmReader\n'
+        'reader = ShmReader(sys.argv[2])\n'
+        'frame = reader.read_latest()\n'
+        'print(frame.frame_id, int(frame.image.sum()), frame.metadata().parsed()["frame"])\n'
+        'del frame\n'
+        'reader.close()\n'
+    )
+    result = subprocess.run([sys.executable, '-c', script, LIBRARY, publisher.name],
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['3', str(int(_image(3).sum())), '3']
+    # The reader's resource tracker did not unlink the block when it exited
+    reader = ShmReader(publisher.name)
+    try:
+        assert reader.read_latest().frame_id == 3
+    finally:
+        reader.close()
@@ -0,0 +1,165 @@
+import os
+import uuid
+
+import pytest
+
+from eve_shm import ShmReader
+from eve_sim import EveSimSDK, SyntheticFrames
+from eve_wrapper_ext import EveWrapperExt
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _wrapper(toJpg=True, copyImage=True, **options):
+    return EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                         toJpg=toJpg, copyImage=copyImage, maxWidth=0, driverPath=ROOT, objectDetection=False,
+                         options=options)
+
+
+def _sim(frames=3, fps=0, width=320, height=240):
+    return EveSimSDK(SyntheticFrames(width=width, height=height, users=1, frames=frames), fps=fps)
+
+
+def test_metadata_camera_plan_applies_from_the_first_callback():
+    wrapper = _wrapper()
+    sim = _sim()
+    reads = []
+    get_image = sim.EveGetProcessedImage
+    sim.EveGetProcessedImage = lambda: reads.append(1) or get_image()
+    try:
+        wrapper.init(useMetadataCamera=True, sdkBackend=sim)
+        assert wrapper.wait_for_frame(timeout=5) is not None
+    finally:
+        wrapper.stop()
+    assert sim.callbacks > 0
+    assert reads == []
+    assert wrapper.get_callback_plan()['image'] is False
+
+
+def test_image_subscribers_and_shm_read_images_without_copy_image():
+    wrapper = _wrapper(toJpg=False, copyImage=False)
+    sim = _sim(fps=100)
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=sim)
+        assert wrapper.get_callback_plan()['image'] is False
+
+        subscription = wrapper.subscribe(fields=('image',))
+        assert wrapper.get_callback_plan()['image'] is True
+        frame = subscription.get(timeout=5)
+        assert frame is not None and frame.image.shape == (240, 320, 3)
+        subscription.close()
+        assert wrapper.get_callback_plan()['image'] is False
+
+        reader = ShmReader(wrapper.start_shm_publisher('eve_test_' + uuid.uuid4().hex[:8]))
+        try:
+            assert wrapper.get_callback_plan()['image'] is True
+            # Frames read from the SDK before the publisher started carry no image
+            images = []
+            for _ in range(10):
+                frame = reader.read_next(timeout=5)
+                if frame.image is not None:
+                    images.append(frame.image.shape)
+                    break
+            del frame
+            assert images == [(240, 320, 3)]
+        finally:
+            reader.close()
+            wrapper.stop_shm_publisher()
+        assert wrapper.get_callback_plan()['image'] is False
+    finally:
+        wrapper.stop()
+
+
+def test_callback_that_exits_is_not_left_in_progress(monkeypatch):
+    wrapper = _wrapper()
+
+    def exit_(return_data):
+        raise SystemExit(1)
+
+    monkeypatch.setattr(wrapper, '_run_callback', exit_)
+    try:
+        with pytest.raises(SystemExit):
+            wrapper.eve_callback(None)
+        assert wrapper._wait_callbacks_idle(0.1)
+    finally:
+        wrapper._pipeline.stop()
+
+
+@pytest.mark.parametrize('latency_window, reads', [(0, False), (300, True)])
+def test_serial_read_time_only_read_for_timing(latency_window, reads):
+    wrapper = _wrapper(metadata_only=True, latency_window=latency_window)
+    sim = _sim()
+    calls = []
+    get_fpga_data = sim.EveGetFpgaData
+    sim.EveGetFpgaData = lambda: calls.append(1) or get_fpga_data()
+    try:
+        wrapper.init(useMetadataCamera=True, sdkBackend=sim)
+        assert wrapper.wait_for_frame(timeout=5) is not None
+    finally:
+        wrapper.stop()
+    assert bool(calls) == reads
+    assert (wrapper.get_latency_stats()['serial_to_callback'] is not None) == reads
+
+
+@pytest.mark.parametrize('metadata_camera, latency_window, recording, reads', [
+    (False, 0, False, False), (True, 0, False, False), (False, 300, False, True), (False, 0, True, True)])
+def test_frame_time_only_read_for_timing_or_recording(tmp_path, metadata_camera, latency_window, recording, reads):
+    wrapper = _wrapper(latency_window=latency_window)
+    sim = _sim()
+    calls = []
+    get_frame_time = sim.EveGetProcessedFrameTime
+    sim.EveGetProcessedFrameTime = lambda: calls.append(1) or get_frame_time()
+    if recording:
+        wrapper.start_recording(str(tmp_path / 'session.everec'))
+    try:
+        wrapper.init(useMetadataCamera=metadata_camera, sdkBackend=sim)
+        assert wrapper.wait_for_frame(timeout=5) is not None
+    finally:
+        if recording:
+            wrapper.stop_recording()
+        wrapper.stop()
+    assert bool(calls) == reads
+
+
+def test_demand_mode_processes_only_requested_images():
+    wrapper = _wrapper(demand_mode=True)
+    # Callbacks back to back, faster than the worker converts the images
+    sim = _sim(width=1600, height=1200)
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=sim)
+        assert wrapper.wait_for_frame(timeout=5) is not None
+        assert wrapper.get_conversion_stats()['frames'] == 0
+        record = wrapper.request_frame_record(frames=3, timeout=5)
+        assert record is not None and record.image_view is not None
+        frame_id = wrapper.get_frame_id()
+        assert wrapper.wait_for_frame(after_id=frame_id + 5, timeout=5) is not None
+        stats = wrapper.get_demand_stats()
+        sequences = wrapper.get_sequence_stats()
+    finally:
+        wrapper.stop()
+    assert wrapper.get_conversion_stats()['frames'] == 3
+    assert stats['pending_frames'] == 0
+    assert stats['skipped'] > 0
+    # Frames skipped on purpose are not reported as image drops
+    assert sequences['images']['count'] == 0
+    assert sequences['images']['skipped'] == 0
+    assert sequences['callbacks']['count'] > 3
+
+
+def test_requests_without_demand_mode_leave_nothing_pending():
+    wrapper = _wrapper()
+    sim = _sim(fps=100)
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=sim)
+        assert wrapper.request_frame_record(frames=4, timeout=5) is not None
+        stats = wrapper.get_demand_stats()
+    finally:
+        wrapper.stop()
+    assert stats['demand_mode'] is False
+    assert stats['pending_frames'] == 0
+    assert stats['requests'] == 1
+
+
+def test_unknown_options_are_rejected():
+    with pytest.raises(ValueError, match='demandMode'):
+        _wrapper(demandMode=True)
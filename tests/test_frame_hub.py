@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from frame_hub import FrameHub
+
+
+def _publish(hub, frame_ids, image=None):
+    for frame_id in frame_ids:
+        hub.publish(frame_id, 'metadata %d' % frame_id, image)
+
+
+def test_every_subscription_gets_every_frame():
+    hub = FrameHub()
+    first = hub.subscribe(fields=('metadata',), depth=4, policy='drop_oldest')
+    second = hub.subscribe(fields=('metadata',), depth=4, policy='drop_oldest')
+    _publish(hub, (1, 2, 3))
+    for subscription in (first, second):
+        assert [subscription.poll().frame_id for _ in range(3)] == [1, 2, 3]
+        assert subscription.poll() is None
+        assert subscription.lag == 0
+
+
+def test_subscriptions_with_the_same_fields_share_the_frame():
+    hub = FrameHub(encodeJpeg=lambda image: b'jpeg ' + image)
+    encoded = []
+    encode = hub._encodeJpeg
+    hub._encodeJpeg = lambda image: encoded.append(image) or encode(image)
+    metadata = hub.subscribe(fields=('metadata',))
+    jpegs = [hub.subscribe(fields=('jpeg',)) for _ in range(2)]
+    hub.publish(1, 'metadata 1', b'image')
+    shared = jpegs[0].poll()
+    assert jpegs[1].poll() is shared
+    assert shared.jpeg == b'jpeg image' and shared.metadata is None and shared.image is None
+    assert encoded == [b'image']
+    assert metadata.poll().jpeg is None
+
+
+def test_frames_without_a_requested_field_are_not_queued():
+    hub = FrameHub()
+    images = hub.subscribe(fields=('image',))
+    hub.publish(1, 'metadata 1', None)
+    assert images.poll() is None
+    assert images.stats()['offered'] == 0
+
+
+def test_close_unsubscribes_and_keeps_the_queue():
+    hub = FrameHub()
+    kept = hub.subscribe(fields=('metadata',), depth=4, policy='drop_oldest')
+    closed = hub.subscribe(fields=('image',), depth=4, policy='drop_oldest')
+    assert hub.wants_images
+    _publish(hub, (1,), image=b'image')
+    closed.close()
+    assert closed.closed and not hub.wants_images
+    _publish(hub, (2,), image=b'image')
+    assert [frame.frame_id for frame in closed] == [1]
+    assert [subscription['fields'] for subscription in hub.stats()['subscriptions']] == [['metadata']]
+    kept.close()
+    assert not hub
+    _publish(hub, (3,))
+    assert hub.stats()['published'] == 2
+    assert [frame.frame_id for frame in kept] == [1, 2]
+
+
+def test_latest_keeps_only_the_newest_frame():
+    hub = FrameHub()
+    subscription = hub.subscribe(fields=('metadata',), depth=4, policy='latest')
+    _publish(hub, (1, 2, 3))
+    assert subscription.lag == 3
+    assert subscription.poll().frame_id == 3
+    assert subscription.lag == 0
+    stats = subscription.stats()
+    assert (stats['offered'], stats['delivered'], stats['dropped']) == (3, 1, 2)
+
+
+def test_drop_oldest_keeps_the_newest_depth_frames():
+    hub = FrameHub()
+    subscription = hub.subscribe(fields=('metadata',), depth=2, policy='drop_oldest')
+    _publish(hub, (1, 2, 3, 4))
+    assert subscription.stats()['queued'] == 2
+    assert [subscription.poll().frame_id for _ in range(2)] == [3, 4]
+    assert subscription.stats()['dropped'] == 2
+
+
+def test_block_waits_for_the_consumer():
+    hub = FrameHub(blockTimeout=5)
+    subscription = hub.subscribe(fields=('metadata',), depth=1, policy='block')
+    publisher = threading.Thread(target=_publish, args=(hub, (1, 2, 3)))
+    publisher.start()
+    received = []
+    while len(received) < 3:
+        frame = subscription.get(timeout=5)
+        assert frame is not None
+        received.append(frame.frame_id)
+        time.sleep(0.01)
+    publisher.join(5)
+    assert received == [1, 2, 3]
+    stats = subscription.stats()
+    assert stats['dropped'] == 0 and stats['blocked'] > 0
+
+
+def test_block_falls_back_to_dropping_after_the_timeout():
+    hub = FrameHub(blockTimeout=0.01)
+    subscription = hub.subscribe(fields=('metadata',), depth=1, policy='block')
+    _publish(hub, (1, 2))
+    assert subscription.poll().frame_id == 2
+    assert subscription.stats()['dropped'] == 1
+
+
+def test_close_wakes_a_blocked_publisher_and_waiting_get():
+    hub = FrameHub(blockTimeout=5)
+    subscription = hub.subscribe(fields=('metadata',), depth=1, policy='block')
+    _publish(hub, (1,))
+    publisher = threading.Thread(target=_publish, args=(hub, (2,)))
+    publisher.start()
+    time.sleep(0.05)
+    subscription.close()
+    publisher.join(1)
+    assert not publisher.is_alive()
+    assert subscription.get(timeout=1).frame_id == 1
+    assert subscription.get(timeout=5) is None
+
+
+def test_block_is_refused_on_a_callback_hub():
+    with pytest.raises(ValueError):
+        FrameHub(allowBlock=False).subscribe(policy='block')
+
+
+@pytest.mark.parametrize('arguments', [{'fields': ('pixels',)}, {'policy': 'newest'}, {'depth': 0}])
+def test_invalid_subscriptions(arguments):
+    with pytest.raises(ValueError):
+        FrameHub().subscribe(**arguments)
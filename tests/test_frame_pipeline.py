@@ -0,0 +1,146 @@
+import threading
+
+import pytest
+
+from frame_pipeline import FramePipeline
+
+
+class _Blocking:
+    """Job processor holding the worker on its first job until released"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.done = []
+
+    def __call__(self, job):
+        self.started.set()
+        self.release.wait(5)
+        self.done.append(job)
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        FramePipeline(print, policy='drop_random')
+
+
+def test_inline_without_workers():
+    done = []
+    pipeline = FramePipeline(done.append, workers=0)
+    assert not pipeline.threaded
+    for job in range(3):
+        assert pipeline.submit(job)
+    assert done == [0, 1, 2]
+    assert pipeline.stats()['processed'] == 3
+
+
+@pytest.mark.parametrize('policy, kept, accepted', [
+    ('drop_oldest', [0, 3, 4], [True, True, True, True]),
+    ('drop_newest', [0, 1, 2], [True, True, False, False]),
+])
+def test_backpressure_policy(policy, kept, accepted):
+    process = _Blocking()
+    pipeline = FramePipeline(process, workers=1, queueSize=2, policy=policy)
+    pipeline.start()
+    try:
+        pipeline.submit(0)
+        assert process.started.wait(5)
+        assert [pipeline.submit(job) for job in range(1, 5)] == accepted
+        stats = pipeline.stats()
+        assert stats['queue_depth'] == 2
+        assert stats['dropped'] == 2
+        process.release.set()
+        assert pipeline.join(5)
+    finally:
+        pipeline.stop()
+    assert process.done == kept
+    stats = pipeline.stats()
+    assert stats['submitted'] == 5
+    assert stats['processed'] == 3
+    assert stats['max_queue_depth'] == 2
+
+
+def test_errors_are_counted():
+    def fail(job):
+        raise RuntimeError(job)
+
+    pipeline = FramePipeline(fail, workers=0)
+    pipeline.submit(1)
+    stats = pipeline.stats()
+    assert stats['errors'] == 1
+    assert stats['processed'] == 0
+
+
+def test_stop_discards_queued_jobs():
+    process = _Blocking()
+    pipeline = FramePipeline(process, workers=1, queueSize=4)
+    pipeline.start()
+    pipeline.submit(0)
+    assert process.started.wait(5)
+    pipeline.submit(1)
+    pipeline.submit(2)
+    pipeline.stop(timeout=0)
+    process.release.set()
+    assert 1 not in process.done and 2 not in process.done
+    assert pipeline.stats()['dropped'] == 2
+
+
+@pytest.mark.parametrize('policy, dropped', [('drop_oldest', [1, 2]), ('drop_newest', [3, 4])])
+def test_dropped_jobs_are_reported(policy, dropped):
+    process = _Blocking()
+    reported = []
+    pipeline = FramePipeline(process, workers=1, queueSize=2, policy=policy, onDrop=reported.append)
+    pipeline.start()
+    try:
+        pipeline.submit(0)
+        assert process.started.wait(5)
+        for job in range(1, 5):
+            pipeline.submit(job)
+        assert reported == dropped
+        pipeline.stop(timeout=0)
+        assert sorted(reported) == [1, 2, 3, 4]
+    finally:
+        process.release.set()
+        pipeline.stop()
+
+
+def test_block_policy_waits_for_room():
+    process = _Blocking()
+    pipeline = FramePipeline(process, workers=1, queueSize=1, policy='block')
+    pipeline.start()
+    try:
+        pipeline.submit(0)
+        assert process.started.wait(5)
+        pipeline.submit(1)
+        submitted = threading.Event()
+        submitter = threading.Thread(target=lambda: pipeline.submit(2) and submitted.set())
+        submitter.start()
+        assert not submitted.wait(0.1)
+        process.release.set()
+        assert submitted.wait(5)
+        assert pipeline.join(5)
+    finally:
+        pipeline.stop()
+    assert process.done == [0, 1, 2]
+    assert pipeline.stats()['dropped'] == 0
+
+
+def test_stop_releases_blocked_submitters():
+    process = _Blocking()
+    reported = []
+    pipeline = FramePipeline(process, workers=1, queueSize=1, policy='block', onDrop=reported.append)
+    pipeline.start()
+    try:
+        pipeline.submit(0)
+        assert process.started.wait(5)
+        pipeline.submit(1)
+        results = []
+        submitter = threading.Thread(target=lambda: results.append(pipeline.submit(2)))
+        submitter.start()
+        pipeline.stop(timeout=0)
+        submitter.join(5)
+        assert results == [False]
+        assert sorted(reported) == [1, 2]
+    finally:
+        process.release.set()
+        pipeline.stop()
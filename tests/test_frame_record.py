@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+
+import pytest
+
+from eve_sim import EveSimSDK, SyntheticFrames
+from eve_wrapper_ext import EveWrapperExt
+from frame_record import FrameRecord
+from frame_ring import FrameRing
+from jpeg_cache import JpegCache
+from metadata import MetadataFrame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _image(frame_id):
+    ring = FrameRing()
+    slot = ring.acquire((48, 64, 3))
+    slot.buffer[:] = frame_id
+    return ring.publish(slot, frame_id)
+
+
+def _record(frame_id=1, jpegCache=None):
+    metadata = MetadataFrame(json.dumps({'frame': frame_id}).encode(), frame_id)
+    image = _image(frame_id)
+    return FrameRecord(frame_id, metadata, metadata.raw, image, image, 10, 20, 30, 40, jpegCache)
+
+
+def test_record_is_immutable():
+    record = _record()
+    with pytest.raises(AttributeError):
+        record.frame_id = 2
+    with pytest.raises(AttributeError):
+        record.image = None
+    with pytest.raises(AttributeError):
+        del record.metadata
+    with pytest.raises(AttributeError):
+        record.extra = 1
+    assert record.frame_id == 1 and record.image is not None
+
+
+def test_replace_keeps_the_other_fields_and_the_jpeg_handle():
+    cache = JpegCache()
+    record = _record(jpegCache=cache)
+    image = _image(2)
+    newer = record.replace(frame_id=2, image_view=image, image=image)
+    assert (record.frame_id, newer.frame_id) == (1, 2)
+    assert newer.metadata is record.metadata
+    assert (newer.capture_ns, newer.serial_ns, newer.callback_ns, newer.publish_ns) == (10, 20, 30, 40)
+    assert newer._jpeg_cache is cache
+    assert newer.jpeg() is newer.jpeg()
+    assert cache.stats()['misses'] == 1
+
+
+def test_jpeg_needs_a_cache_and_an_image():
+    assert _record().jpeg() is None
+    assert FrameRecord(jpegCache=JpegCache()).jpeg() is None
+
+
+def test_readers_only_see_whole_records():
+    wrapper = EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                            toJpg=False, copyImage=True, maxWidth=0, driverPath=ROOT, objectDetection=False,
+                            options={'pipeline_workers': 2})
+    # Callbacks back to back, published by two workers
+    sim = EveSimSDK(SyntheticFrames(width=320, height=240, users=1, frames=10), fps=0)
+    stop = threading.Event()
+    mixed = []
+    seen = [[], []]
+
+    def reader(ids):
+        while not stop.is_set():
+            record = wrapper.get_frame_record()
+            if record.image_view is None:
+                continue
+            ids.append(record.frame_id)
+            if not (record.image_view.frame_id == record.metadata.frame_id == record.frame_id):
+                mixed.append(record)
+            data = wrapper.get_frame_data()
+            if data['image'] is not None and data['image'].frame_id != data['frame_id']:
+                mixed.append(data)
+
+    threads = [threading.Thread(target=reader, args=(ids,)) for ids in seen]
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=sim)
+        for thread in threads:
+            thread.start()
+        assert wrapper.wait_for_frame(after_id=50, timeout=10) is not None
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        wrapper.stop()
+    assert mixed == []
+    for ids in seen:
+        # Every reader followed the publications, never going back to an older record
+        assert len(set(ids)) > 1
+        assert ids == sorted(ids)
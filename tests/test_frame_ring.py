@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from frame_ring import FrameRing
+
+SHAPE = (4, 6, 3)
+
+
+def _write(ring, frame_id, shape=SHAPE):
+    slot = ring.acquire(shape)
+    slot.buffer[:] = frame_id
+    return slot, ring.publish(slot, frame_id)
+
+
+def test_needs_two_slots():
+    with pytest.raises(ValueError):
+        FrameRing(slots=1)
+
+
+def test_view_is_read_only_and_tagged():
+    ring = FrameRing(slots=2)
+    _, view = _write(ring, 7)
+    assert view.frame_id == 7
+    assert not view.flags.writeable
+    assert view[1:].frame_id == 7
+    with pytest.raises(ValueError):
+        view[0, 0, 0] = 1
+
+
+def test_released_slots_are_reused():
+    ring = FrameRing(slots=3)
+    buffers = set()
+    for frame_id in range(10):
+        slot, view = _write(ring, frame_id)
+        buffers.add(id(slot.buffer))
+        del view
+    stats = ring.stats()
+    assert stats['allocations'] == 1
+    assert stats['overflows'] == 0
+    assert stats['busy_slots'] == 0
+    assert len(buffers) == 1
+
+
+def test_referenced_slot_is_not_overwritten():
+    ring = FrameRing(slots=2)
+    first_slot, first = _write(ring, 1)
+    second_slot, second = _write(ring, 2)
+    assert second_slot is not first_slot
+    del second
+    assert ring.stats()['busy_slots'] == 1
+    for frame_id in range(3, 8):
+        slot, view = _write(ring, frame_id)
+        assert slot is not first_slot
+        del view
+    assert (first == 1).all()
+    assert first.frame_id == 1
+
+
+def test_derived_views_keep_the_slot_busy():
+    ring = FrameRing(slots=2)
+    slot, view = _write(ring, 1)
+    crop = view[1:3, 2:4]
+    del view
+    assert not slot.is_free()
+    del crop
+    assert slot.is_free()
+
+
+def test_overflow_gives_readers_the_old_buffer():
+    ring = FrameRing(slots=2)
+    _, first = _write(ring, 1)
+    _, second = _write(ring, 2)
+    _, third = _write(ring, 3)
+    stats = ring.stats()
+    assert stats['overflows'] == 1
+    assert stats['allocations'] == 3
+    assert (first == 1).all() and (second == 2).all() and (third == 3).all()
+
+
+def test_writing_slot_is_not_handed_out_twice():
+    ring = FrameRing(slots=2)
+    writing = ring.acquire(SHAPE)
+    other = ring.acquire(SHAPE)
+    assert other is not writing
+    ring.release(writing)
+    ring.release(other)
+    assert ring.stats()['busy_slots'] == 0
+
+
+def test_shape_change_reallocates():
+    ring = FrameRing(slots=2, dtype=np.uint8)
+    _write(ring, 1)
+    slot, view = _write(ring, 2, shape=(2, 2, 3))
+    assert view.shape == (2, 2, 3)
+    assert ring.stats()['allocations'] == 2
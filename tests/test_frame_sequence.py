@@ -0,0 +1,96 @@
+import pytest
+
+from frame_sequence import _PERIOD_WINDOW, SequenceTracker
+
+PERIOD_NS = 33_333_333
+
+
+def _timestamps(tracker, intervals_ms, start=10**12):
+    timestamp = start
+    tracker.record(timestamp_ns=timestamp)
+    for interval in intervals_ms:
+        timestamp += int(interval * 1e6)
+        tracker.record(timestamp_ns=timestamp)
+    return timestamp
+
+
+def test_gap_factor_above_one():
+    with pytest.raises(ValueError):
+        SequenceTracker(gapFactor=1.0)
+
+
+def test_numbered_gaps_and_duplicates():
+    tracker = SequenceTracker()
+    for number in (1, 2, 3, 6, 6, 7, 5, 10):
+        tracker.record(number=number)
+    stats = tracker.stats()
+    assert stats['source'] == 'number'
+    assert stats['count'] == 8
+    assert stats['frames'] == 6
+    assert stats['duplicates'] == 2
+    assert stats['skipped'] == 4
+    assert stats['gaps'] == 2
+    assert stats['longest_gap_frames'] == 2
+    assert stats['drop_rate'] == pytest.approx(4 / 10)
+
+
+def test_steady_timestamps_have_no_gaps():
+    tracker = SequenceTracker()
+    _timestamps(tracker, [33.3] * 100)
+    stats = tracker.stats()
+    assert stats['source'] == 'timestamp'
+    assert stats['frames'] == 101
+    assert stats['skipped'] == 0
+    assert stats['period_ms'] == pytest.approx(33.3, rel=0.01)
+
+
+def test_timestamp_gap_counts_skipped_frames():
+    tracker = SequenceTracker()
+    _timestamps(tracker, [33.3] * 10 + [100.0] + [33.3] * 10)
+    stats = tracker.stats()
+    assert stats['gaps'] == 1
+    assert stats['skipped'] == 2
+    assert stats['longest_gap_ms'] == pytest.approx(100.0)
+
+
+def test_repeated_timestamp_is_a_duplicate():
+    tracker = SequenceTracker()
+    _timestamps(tracker, [33.3, 33.3, 0.0, 33.3])
+    stats = tracker.stats()
+    assert stats['duplicates'] == 1
+    assert stats['frames'] == 4
+
+
+def test_frames_without_sequence():
+    tracker = SequenceTracker()
+    tracker.record()
+    tracker.record(timestamp_ns=0)
+    stats = tracker.stats()
+    assert stats['frames'] == 2
+    assert stats['source'] is None
+
+
+def test_reset():
+    tracker = SequenceTracker()
+    tracker.record(number=1)
+    tracker.record(number=5)
+    tracker.reset()
+    assert tracker.stats()['skipped'] == 0
+    assert tracker.stats()['count'] == 0
+
+
+def test_jitter_does_not_shrink_the_period():
+    tracker = SequenceTracker()
+    _timestamps(tracker, [33.0, 33.0, 33.0, 15.0, 18.3] + [33.3] * 50)
+    stats = tracker.stats()
+    assert stats['gaps'] == 0
+    assert stats['skipped'] == 0
+    assert stats['period_ms'] == pytest.approx(33.3, rel=0.01)
+
+
+def test_period_follows_a_rate_change():
+    tracker = SequenceTracker()
+    _timestamps(tracker, [33.3] * 30 + [66.7] * 30)
+    stats = tracker.stats()
+    assert stats['period_ms'] == pytest.approx(66.7, rel=0.01)
+    assert stats['gaps'] <= _PERIOD_WINDOW // 2 + 1
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import threading
+
+from eve_sim import EveSimSDK, SyntheticFrames
+from eve_wrapper_ext import EveWrapperExt
+from frame_hub import FrameHub
+from frame_stream import FrameStream
+from metadata import MetadataFrame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _metadata(frame_id):
+    return MetadataFrame(json.dumps({'serial_status': 'success'}).encode(), frame_id)
+
+
+def _wrapper():
+    return EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                         toJpg=False, copyImage=False, maxWidth=0, driverPath=ROOT, objectDetection=False,
+                         options={'metadata_only': True})
+
+
+def test_frames_published_from_a_thread_arrive_in_order():
+    hub = FrameHub(allowBlock=False)
+
+    async def consume():
+        stream = FrameStream(asyncio.get_running_loop(), hub, fields=('metadata',), maxsize=8, policy='drop_oldest')
+        publisher = threading.Thread(target=lambda: [hub.publish(i, _metadata(i), None) for i in range(1, 6)])
+        publisher.start()
+        frame_ids = []
+        async for frame in stream:
+            frame_ids.append(frame.frame_id)
+            if len(frame_ids) == 5:
+                stream.close()
+        publisher.join()
+        return frame_ids, stream.stats()
+
+    frame_ids, stats = asyncio.run(asyncio.wait_for(consume(), 5))
+    assert frame_ids == [1, 2, 3, 4, 5]
+    assert stats['dropped'] == 0
+
+
+def test_close_delivers_the_queued_frames_then_stops():
+    hub = FrameHub()
+
+    async def consume():
+        stream = FrameStream(asyncio.get_running_loop(), hub, fields=('metadata',), maxsize=4, policy='drop_oldest')
+        for frame_id in (1, 2):
+            hub.publish(frame_id, _metadata(frame_id), None)
+        stream.close()
+        hub.publish(3, _metadata(3), None)
+        return [frame.frame_id async for frame in stream], stream.closed
+
+    assert asyncio.run(consume()) == ([1, 2], True)
+    assert not hub
+
+
+def test_cancelled_get_leaves_the_stream_usable():
+    hub = FrameHub()
+
+    async def consume():
+        stream = FrameStream(asyncio.get_running_loop(), hub, fields=('metadata',))
+        waiting = asyncio.ensure_future(stream.get())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        try:
+            await waiting
+        except asyncio.CancelledError:
+            pass
+        assert stream._waiter is None
+        hub.publish(1, _metadata(1), None)
+        frame = await asyncio.wait_for(stream.get(), 1)
+        stream.close()
+        return frame.frame_id
+
+    assert asyncio.run(consume()) == 1
+
+
+def test_stream_of_a_closed_loop_unsubscribes():
+    hub = FrameHub()
+    loop = asyncio.new_event_loop()
+    stream = FrameStream(loop, hub, fields=('metadata',))
+    loop.close()
+    hub.publish(1, _metadata(1), None)
+    assert stream.closed
+    assert not hub
+
+
+def test_next_metadata_on_simulator():
+    wrapper = _wrapper()
+    sim = EveSimSDK(SyntheticFrames(width=320, height=240, users=2, frames=5), fps=100)
+    try:
+        wrapper.init(useMetadataCamera=True, sdkBackend=sim)
+        metadata = asyncio.run(wrapper.next_metadata(timeout=5))
+    finally:
+        wrapper.stop()
+    assert metadata['pipeline_data']['user_count'] == 2
+    assert not wrapper._hub
+
+
+def test_next_metadata_times_out_without_frames():
+    wrapper = _wrapper()
+    try:
+        assert asyncio.run(wrapper.next_metadata(timeout=0.05)) is None
+        assert not wrapper._hub
+    finally:
+        wrapper._pipeline.stop()
@@ -0,0 +1,86 @@
+import ctypes
+import json
+import os
+
+import numpy as np
+import pytest
+
+from eve_sim import synthetic_fpga_data
+from fpga_metadata import FPGA_DATA_SIZE, FpgaMetadataFrame, decode_fpga_data
+from frame_tensors import LANDMARKS, MAX_USERS, FrameTensors
+from metadata import MetadataFrame
+from metadata_ring import MetadataRing, RingFpgaMetadataFrame
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def _raw(users, offset=0):
+    data = synthetic_fpga_data(users, offset)
+    return ctypes.string_at(ctypes.addressof(data), FPGA_DATA_SIZE)
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as file_:
+        return file_.read()
+
+
+def _assert_same(first, second):
+    assert first.frame_id == second.frame_id
+    assert first.user_count == second.user_count
+    for name in FrameTensors._ARRAYS:
+        np.testing.assert_array_equal(getattr(first, name), getattr(second, name), err_msg=name)
+
+
+@pytest.mark.parametrize('users', [0, 1, 3, MAX_USERS])
+def test_struct_and_dict_fill_agree(users):
+    raw = _raw(users, offset=6)
+    by_struct = FrameTensors().fill(FpgaMetadataFrame(raw, 7))
+    by_dict = FrameTensors().fill(MetadataFrame(json.dumps(decode_fpga_data(raw)).encode(), 7))
+    _assert_same(by_struct, by_dict)
+    assert by_struct.valid.sum() == users
+
+
+def test_sample_fills_agree():
+    by_struct = FrameTensors().fill(FpgaMetadataFrame(_fixture('metadata_sample.bin'), 1))
+    by_dict = FrameTensors().fill(MetadataFrame(_fixture('metadata_sample.json'), 1))
+    _assert_same(by_struct, by_dict)
+    assert by_struct.user_id[:2].tolist() == [3, 5]
+    assert by_struct.face_landmark_count[:2].tolist() == [3, 0]
+    # Rows past the landmark count are zeroed, not copied from the struct
+    assert not by_struct.face_landmarks[0, 3:].any()
+    assert by_struct.person_valid[:2].tolist() == [True, False]
+    assert by_struct.face_box[0].tolist() == [80, 150, 180, 280]
+
+
+@pytest.mark.parametrize('binary', [True, False])
+def test_reused_tensors_clear_the_slots_past_user_count(binary):
+    def frame(users, frame_id):
+        raw = _raw(users)
+        if binary:
+            return FpgaMetadataFrame(raw, frame_id)
+        return MetadataFrame(json.dumps(decode_fpga_data(raw)).encode(), frame_id)
+
+    tensors = FrameTensors()
+    assert tensors.fill(frame(5, 1)) is tensors
+    assert tensors.face_landmark_count[:5].tolist() == [LANDMARKS] * 5
+    tensors.fill(frame(2, 2))
+    _assert_same(tensors, FrameTensors().fill(frame(2, 2)))
+    assert tensors.valid.tolist() == [True, True] + [False] * (MAX_USERS - 2)
+    assert not tensors.face_landmarks[2:].any()
+
+
+def test_reused_ring_slot_leaves_the_arrays_unchanged():
+    ring = MetadataRing(slots=2, capacity=FPGA_DATA_SIZE)
+    frames = []
+    for frame_id, users in enumerate((3, 1, 2)):
+        raw = ctypes.create_string_buffer(_raw(users), FPGA_DATA_SIZE)
+        slot = ring.write(ctypes.addressof(raw), FPGA_DATA_SIZE)
+        ring.commit(slot, frame_id)
+        frames.append(RingFpgaMetadataFrame(ring, slot, frame_id))
+
+    tensors = FrameTensors()
+    assert tensors.fill(frames[1]) is tensors
+    # Frame 0's slot now holds frame 2: no stale data is filled in and reported as frame 0
+    assert tensors.fill(frames[0]) is None
+    assert tensors.frame_id == 1
+    assert tensors.user_count == 1
@@ -0,0 +1,71 @@
+import pytest
+
+from frame_timing import FrameTiming
+
+MS = 1_000_000
+
+
+def test_latencies_and_interval():
+    timing = FrameTiming(window=10)
+    for i in range(3):
+        capture = 1000 * MS + i * 33 * MS
+        timing.record(capture, capture + 2 * MS, capture + 10 * MS, capture + 15 * MS, frame_time=4.0)
+    stats = timing.stats()
+    assert stats['frames'] == 3
+    assert stats['capture_to_callback']['p50_ms'] == pytest.approx(10.0)
+    assert stats['serial_to_callback']['p50_ms'] == pytest.approx(8.0)
+    assert stats['callback_to_publish']['p50_ms'] == pytest.approx(5.0)
+    assert stats['metadata_skew']['p50_ms'] == pytest.approx(2.0)
+    assert stats['frame_interval']['count'] == 2
+    assert stats['frame_interval']['p50_ms'] == pytest.approx(33.0)
+    assert stats['frame_time']['p50_ms'] == pytest.approx(4.0)
+
+
+def test_missing_timestamps_are_left_out():
+    timing = FrameTiming(window=10)
+    timing.record(None, 0, 1000 * MS, 1005 * MS)
+    stats = timing.stats()
+    assert stats['capture_to_callback'] is None
+    assert stats['serial_to_callback'] is None
+    assert stats['callback_to_publish']['count'] == 1
+    assert sum(stats['implausible'].values()) == 0
+
+
+def test_timestamps_on_another_clock_are_flagged():
+    timing = FrameTiming(window=10)
+    # Serial read time on a wall clock, capture after the callback
+    timing.record(1020 * MS, 1_700_000_000_000 * MS, 1000 * MS, 1010 * MS)
+    stats = timing.stats()
+    assert stats['serial_to_callback'] is None
+    assert stats['capture_to_callback'] is None
+    assert stats['metadata_skew'] is None
+    assert stats['callback_to_publish']['p50_ms'] == pytest.approx(10.0)
+    assert stats['implausible'] == {
+        'capture_to_callback': 1,
+        'serial_to_callback': 1,
+        'callback_to_publish': 0,
+        'capture_to_publish': 1,
+        'metadata_skew': 1,
+    }
+    timing.reset()
+    assert sum(timing.stats()['implausible'].values()) == 0
+
+
+def test_window_rolls_over():
+    timing = FrameTiming(window=2)
+    for latency in (1, 2, 3):
+        timing.record(None, None, 1000 * MS, (1000 + latency) * MS)
+    stats = timing.stats()
+    assert stats['frames'] == 3
+    assert stats['callback_to_publish']['min_ms'] == pytest.approx(2.0)
+
+
+def test_zero_window_disables():
+    timing = FrameTiming(window=0)
+    assert not timing.enabled
+    timing.record(1000 * MS, 1000 * MS, 1001 * MS, 1002 * MS)
+    stats = timing.stats()
+    assert stats['frames'] == 0
+    assert stats['callback_to_publish'] is None
+    with pytest.raises(ValueError):
+        FrameTiming(window=-1)
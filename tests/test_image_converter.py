@@ -0,0 +1,161 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from eve_sim import synthetic_image
+from frame_ring import FrameRing
+from image_converter import ImageConverter
+
+
+def _yuyv(height=120, width=160, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 2), dtype=np.uint8)
+
+
+def _convert(converter, ring, raw, frame_id=1):
+    slot, yuv_slot = converter.convert(raw)
+    return ring.publish(slot, frame_id), yuv_slot
+
+
+def test_yuyv_is_converted_and_downscaled():
+    ring = FrameRing()
+    converter = ImageConverter(ring, maxWidth=80)
+    raw = _yuyv()
+    image, _ = _convert(converter, ring, raw)
+    expected = cv2.resize(cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV), (80, 60), interpolation=cv2.INTER_AREA)
+    np.testing.assert_array_equal(image, expected)
+
+
+@pytest.mark.parametrize('maxWidth, shape', [(0, (120, 160, 3)), (80, (60, 80, 3))])
+def test_bgr_input_is_copied_or_downscaled(maxWidth, shape):
+    ring = FrameRing()
+    raw = np.random.default_rng(1).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    image, _ = _convert(ImageConverter(ring, maxWidth=maxWidth), ring, raw)
+    assert image.shape == shape
+    if not maxWidth:
+        np.testing.assert_array_equal(image, raw)
+
+
+def test_unsupported_format_is_skipped():
+    ring = FrameRing()
+    assert ImageConverter(ring).convert(np.zeros((4, 4, 4), dtype=np.uint8)) == (None, None)
+    assert ring.allocations == 0
+
+
+def test_steady_state_allocates_nothing():
+    ring = FrameRing(slots=4)
+    converter = ImageConverter(ring, maxWidth=80, warmupFrames=4)
+    raw = _yuyv()
+    for frame_id in range(1, 31):
+        _convert(converter, ring, raw, frame_id)
+    stats = converter.stats()
+    assert stats['frames'] == 30
+    assert stats['rebuilds'] == 1
+    # The full-resolution BGR scratch buffer plus one buffer per ring slot
+    assert stats['allocations'] == 1 + ring.allocations
+    assert stats['steady_frames'] == 26
+    assert stats['steady_allocations'] == 0
+    assert stats['steady_allocations_per_frame'] == 0.0
+
+
+def test_resolution_change_rebuilds_and_reallocates_during_warmup():
+    ring = FrameRing(slots=2)
+    converter = ImageConverter(ring, maxWidth=80, warmupFrames=2)
+    for frame_id in range(1, 6):
+        _convert(converter, ring, _yuyv(), frame_id)
+    for frame_id in range(6, 11):
+        image, _ = _convert(converter, ring, _yuyv(240, 320), frame_id)
+    assert image.shape == (60, 80, 3)
+    stats = converter.stats()
+    assert stats['rebuilds'] == 2
+    assert stats['input_shape'] == (240, 320, 2)
+    assert stats['steady_allocations'] == 0
+
+
+def test_pipeline_workers_get_their_own_scratch_buffer():
+    ring = FrameRing(slots=4)
+    converter = ImageConverter(ring, maxWidth=80)
+    raw = _yuyv()
+    barrier = threading.Barrier(2)
+    buffers = []
+
+    def worker():
+        barrier.wait()
+        slot, _ = converter.convert(raw)
+        buffers.append(converter._scratch.buffer)
+        ring.release(slot)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert buffers[0] is not buffers[1]
+    assert converter.stats()['allocations'] == 2 + ring.allocations
+
+
+def _smooth_yuyv(height=240, width=320):
+    return synthetic_image(width, height, 2, 0)
+
+
+def _yuv_reference(raw, out_width, out_height):
+    height, width = raw.shape[:2]
+    pairs = cv2.resize(raw.reshape(height, width // 2, 4), (out_width // 2, out_height), interpolation=cv2.INTER_AREA)
+    return pairs.reshape(out_height, out_width, 2)
+
+
+def test_yuv_path_downscales_before_the_colour_conversion():
+    ring, yuv_ring = FrameRing(), FrameRing()
+    converter = ImageConverter(ring, maxWidth=160, colorPath='yuv', yuvRing=yuv_ring)
+    raw = _smooth_yuyv()
+    image, yuv_slot = _convert(converter, ring, raw)
+    yuyv = yuv_ring.publish(yuv_slot, 1)
+    np.testing.assert_array_equal(yuyv, _yuv_reference(raw, 160, 120))
+    np.testing.assert_array_equal(image, cv2.cvtColor(np.ascontiguousarray(yuyv), cv2.COLOR_YUV2BGR_YUYV))
+    # Close to converting the full frame first
+    bgr_ring = FrameRing()
+    bgr, _ = _convert(ImageConverter(bgr_ring, maxWidth=160), bgr_ring, raw)
+    assert np.abs(image.astype(int) - bgr.astype(int)).mean() < 2
+
+
+def test_gray_path_keeps_only_the_luma():
+    ring = FrameRing()
+    raw = _smooth_yuyv()
+    image, yuv_slot = _convert(ImageConverter(ring, maxWidth=160, colorPath='gray'), ring, raw)
+    assert yuv_slot is None
+    assert image.shape == (120, 160, 1)
+    np.testing.assert_array_equal(image[:, :, 0], _yuv_reference(raw, 160, 120)[:, :, 0])
+
+
+def test_yuv_output_keeps_whole_pixel_pairs():
+    ring = FrameRing()
+    image, _ = _convert(ImageConverter(ring, maxWidth=81, colorPath='yuv'), ring, _smooth_yuyv())
+    assert image.shape == (61, 80, 3)
+
+
+def test_colour_path_only_applies_to_yuyv():
+    ring = FrameRing()
+    raw = np.random.default_rng(2).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    image, yuv_slot = _convert(ImageConverter(ring, colorPath='gray', yuvRing=FrameRing()), ring, raw)
+    assert yuv_slot is None
+    np.testing.assert_array_equal(image, raw)
+
+
+@pytest.mark.parametrize('keep_yuv', [False, True])
+def test_yuv_path_steady_state_allocates_nothing(keep_yuv):
+    ring = FrameRing()
+    yuv_ring = FrameRing() if keep_yuv else None
+    converter = ImageConverter(ring, maxWidth=160, warmupFrames=2, colorPath='yuv', yuvRing=yuv_ring)
+    raw = _smooth_yuyv()
+    for frame_id in range(1, 11):
+        slot, yuv_slot = converter.convert(raw)
+        ring.publish(slot, frame_id)
+        if yuv_ring is not None:
+            yuv_ring.publish(yuv_slot, frame_id)
+    assert converter.stats()['steady_allocations'] == 0
+
+
+def test_unknown_colour_path():
+    with pytest.raises(ValueError):
+        ImageConverter(FrameRing(), colorPath='rgb')
@@ -0,0 +1,77 @@
+import threading
+
+import numpy as np
+import pytest
+
+import jpeg_cache
+from frame_ring import FrameView
+from jpeg_cache import JpegCache
+
+
+def _image(frame_id, value=128):
+    image = np.full((16, 16, 3), value, dtype=np.uint8).view(FrameView)
+    image.frame_id = frame_id
+    return image
+
+
+def test_encodes_once_per_frame():
+    cache = JpegCache()
+    data = cache.get(_image(1))
+    assert data[:2] == b'\xff\xd8'
+    assert cache.get(_image(1)) is data
+    cache.get(_image(2))
+    stats = cache.stats()
+    assert stats['misses'] == 2
+    assert stats['hits'] == 1
+    assert stats['frame_id'] == 2
+
+
+def test_concurrent_requests_share_one_encode(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    encodes = []
+    imencode = jpeg_cache.cv2.imencode
+
+    def slow_imencode(*args, **kwargs):
+        encodes.append(args)
+        started.set()
+        release.wait(5)
+        return imencode(*args, **kwargs)
+
+    monkeypatch.setattr(jpeg_cache.cv2, 'imencode', slow_imencode)
+    cache = JpegCache()
+    image = _image(5)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(image))) for _ in range(4)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Wait for the other requesters to join the in-flight encode before finishing it
+    while cache.stats()['shared'] < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(encodes) == 1
+    assert len(results) == 4
+    assert all(result is results[0] for result in results)
+    assert cache.stats()['misses'] == 1
+
+
+def test_failed_encode_is_raised_to_waiters(monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("encoder failure")
+
+    monkeypatch.setattr(jpeg_cache.cv2, 'imencode', broken)
+    cache = JpegCache()
+    with pytest.raises(RuntimeError):
+        cache.get(_image(1))
+    assert cache.stats()['frame_id'] is None
+
+
+def test_older_frame_does_not_replace_newer():
+    cache = JpegCache()
+    cache.get(_image(3))
+    cache.get(_image(2))
+    assert cache.stats()['frame_id'] == 3
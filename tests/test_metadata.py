@@ -0,0 +1,114 @@
+import ctypes
+import json
+import os
+
+import pytest
+
+from eve_sim import EveSimSDK, SyntheticFrames, synthetic_fpga_data
+from eve_wrapper_ext import EveWrapperExt
+from fpga_metadata import FPGA_DATA_SIZE, FpgaMetadataFrame, decode_fpga_data, serial_read_time
+from metadata import MetadataFrame, available_decoders, get_decoder, scan_frame_number, scan_serial_status
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Restamped in the binary struct when the simulator delivers the frame, not in its JSON text
+_DELIVERY_FIELDS = ('serial_read_time_ns',)
+
+
+def _without_delivery(metadata):
+    return {key: value for key, value in metadata.items() if key not in _DELIVERY_FIELDS}
+
+
+def _raw(users, offset=0):
+    data = synthetic_fpga_data(users, offset)
+    return ctypes.string_at(ctypes.addressof(data), FPGA_DATA_SIZE)
+
+
+@pytest.mark.parametrize('users', [0, 1, 5])
+def test_binary_decode_round_trips_through_json(users):
+    raw = _raw(users, offset=8)
+    decoded = decode_fpga_data(raw)
+    assert decoded['serial_status'] == 'success'
+    assert decoded['serial_read_time_ns'] == serial_read_time(raw)
+    assert decoded['pipeline_data']['user_count'] == users
+    assert len(decoded['pipeline_data']['users']) == users
+    assert json.loads(json.dumps(decoded)) == decoded
+
+
+def test_serial_status_scan():
+    assert scan_serial_status(b'{"serial_status": "timeout", "pipeline_data": {}}') == 'timeout'
+    assert scan_serial_status(b'{"pipeline_data": {}}') is None
+
+
+def _run_sim(metadataSource, frames):
+    wrapper = EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                            toJpg=False, copyImage=False, maxWidth=0, driverPath=ROOT, objectDetection=False,
+                            options={'metadata_source': metadataSource, 'metadata_only': True})
+    sim = EveSimSDK(SyntheticFrames(width=320, height=240, users=3, frames=frames), fps=200, loop=False)
+    try:
+        wrapper.init(useMetadataCamera=True, sdkBackend=sim)
+        subscription = wrapper.subscribe(fields=('metadata',), depth=frames)
+        assert sim.wait_finished(5)
+        received = []
+        while True:
+            frame = subscription.poll()
+            if frame is None:
+                break
+            received.append(frame)
+    finally:
+        wrapper.stop()
+    return received
+
+
+def test_wrapper_metadata_sources_agree():
+    frames = 6
+    by_json = [_without_delivery(frame.metadata.parsed()) for frame in _run_sim('json', frames)]
+    by_binary = [_without_delivery(frame.metadata.parsed()) for frame in _run_sim('binary', frames)]
+    assert by_json
+    # Both runs subscribe after the callbacks started: compare the frames both saw
+    common = min(len(by_json), len(by_binary))
+    assert by_json[-common:] == by_binary[-common:]
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as file_:
+        return file_.read()
+
+
+def _assert_subset(expected, actual, path='metadata'):
+    """Every field the binary decode produces must match the JSON metadata"""
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict), path
+        for key, value in expected.items():
+            assert key in actual, f"{path}.{key} missing from the JSON metadata"
+            _assert_subset(value, actual[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(actual) == len(expected), path
+        for i, (value, other) in enumerate(zip(expected, actual)):
+            _assert_subset(value, other, f"{path}.{i}")
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-5, abs=1e-5), path
+    else:
+        assert actual == expected, path
+
+
+@pytest.mark.parametrize('decoder', available_decoders())
+def test_json_and_binary_agree(decoder):
+    json_frame = MetadataFrame(_fixture('metadata_sample.json'), 1, get_decoder(decoder))
+    binary_frame = FpgaMetadataFrame(_fixture('metadata_sample.bin'), 1)
+    assert len(binary_frame.raw) == FPGA_DATA_SIZE
+    assert json_frame.is_success() and binary_frame.is_success()
+    assert binary_frame.parsed()['pipeline_data']['user_count'] > 0
+    _assert_subset(binary_frame.parsed(), json_frame.parsed())
+
+
+@pytest.mark.parametrize('raw, number', [
+    (b'{"frame_number": 12, "pipeline_data": {"users": []}}', 12),
+    (b'{"serial_status": "success", "pipeline_data": {"frame_no": 3}, "frame_count": 7}', 7),
+    (b'{"pipeline_data": {"users": [{"frame_number": 4}]}}', None),
+    (b'{"note": "\\"frame_number\\": 5", "frame_no": 6}', 6),
+    (b'{"pipeline_data": {}}', None),
+])
+def test_frame_number_scan_reads_top_level_key(raw, number):
+    assert scan_frame_number(raw) == number
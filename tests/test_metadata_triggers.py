@@ -0,0 +1,141 @@
+import json
+import os
+
+import pytest
+
+from eve_sim import EveSimSDK, SyntheticFrames
+from eve_wrapper_ext import EveWrapperExt
+from metadata import MetadataFrame
+from metadata_triggers import MetadataTriggers, all_of, any_of, any_user, not_, where
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame(frame_id, user_count=1, status='registered'):
+    data = {
+        'serial_status': 'success',
+        'pipeline_data': {
+            'user_count': user_count,
+            'users': [{'id': i, 'face_id_status': status} for i in range(user_count)],
+        },
+    }
+    return MetadataFrame(json.dumps(data).encode(), frame_id)
+
+
+def test_conditions():
+    data = _frame(1, user_count=2).parsed()
+    assert where('pipeline_data.user_count', '>=', 2)(data)
+    assert where('pipeline_data.users.1.id', '==', 1)(data)
+    assert not where('pipeline_data.users.5.id', '==', 5)(data)
+    assert not where('pipeline_data.missing', '!=', 0)(data)
+    assert any_user(where('face_id_status', 'in', ('registered', 'recognized')))(data)
+    assert not any_user(where('id', '==', 9))(data)
+    assert all_of(where('serial_status', '==', 'success'), where('pipeline_data.user_count', '==', 2))(data)
+    assert any_of(where('serial_status', '==', 'timeout'), where('pipeline_data.user_count', '==', 2))(data)
+    assert not_(where('serial_status', '==', 'timeout'))(data)
+
+
+def test_unknown_operator():
+    with pytest.raises(ValueError):
+        where('serial_status', '=~', 'success')
+
+
+def test_trigger_needs_consecutive_frames():
+    triggers = MetadataTriggers()
+    future = triggers.add(where('pipeline_data.user_count', '==', 2), frames=3)
+    for frame_id, users in enumerate((2, 2, 1, 2, 2), start=1):
+        triggers.evaluate(_frame(frame_id, users))
+    assert not future.done()
+    triggers.evaluate(_frame(6, 2))
+    assert future.result(0).frame_id == 6
+    assert triggers.stats() == {'pending': 0, 'evaluated': 6, 'resolved': 1}
+
+
+def test_current_frame_counts_as_first():
+    triggers = MetadataTriggers()
+    future = triggers.add(where('pipeline_data.user_count', '==', 1), current=_frame(4))
+    assert future.result(0).frame_id == 4
+    assert not triggers
+
+
+def test_stale_and_repeated_frames_are_ignored():
+    triggers = MetadataTriggers()
+    future = triggers.add(where('pipeline_data.user_count', '==', 1), frames=2)
+    triggers.evaluate(_frame(5))
+    triggers.evaluate(_frame(5))
+    triggers.evaluate(_frame(3))
+    assert not future.done()
+    triggers.evaluate(_frame(6))
+    assert future.result(0).frame_id == 6
+
+
+def test_condition_error_fails_the_future():
+    triggers = MetadataTriggers()
+    future = triggers.add(lambda data: data['missing'])
+    triggers.evaluate(_frame(1))
+    with pytest.raises(KeyError):
+        future.result(0)
+
+
+def test_cancel():
+    triggers = MetadataTriggers()
+    cancelled = triggers.add(where('pipeline_data.user_count', '==', 9))
+    dropped = triggers.add(where('pipeline_data.user_count', '==', 9))
+    cancelled.cancel()
+    triggers.evaluate(_frame(1))
+    assert triggers.stats()['pending'] == 1
+    triggers.cancel_all()
+    assert dropped.cancelled()
+    assert not triggers
+
+
+def test_wrapper_trigger_on_simulator():
+    wrapper = EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                            toJpg=False, copyImage=False, maxWidth=0, driverPath=ROOT, objectDetection=False,
+                            options={'metadata_only': True})
+    sim = EveSimSDK(SyntheticFrames(width=320, height=240, users=3, frames=5), fps=100)
+    try:
+        wrapper.init(useMetadataCamera=True, sdkBackend=sim)
+        metadata = wrapper.wait_until(where('pipeline_data.user_count', '==', 3), frames=3, timeout=5)
+        assert metadata is not None
+        assert metadata.parsed()['pipeline_data']['user_count'] == 3
+        assert wrapper.wait_until(where('pipeline_data.user_count', '==', 4), timeout=0.1) is None
+        frame_id = wrapper.get_frame_id()
+        metadata = wrapper.wait_until(where('pipeline_data.user_count', '==', 3), timeout=5, after_id=frame_id)
+        assert metadata.frame_id > frame_id
+    finally:
+        wrapper.stop()
+
+
+def test_after_id_skips_the_current_and_older_frames():
+    triggers = MetadataTriggers()
+    future = triggers.add(where('pipeline_data.user_count', '==', 1), current=_frame(4), after_id=4)
+    assert not future.done()
+    triggers.evaluate(_frame(4))
+    assert not future.done()
+    triggers.evaluate(_frame(5))
+    assert future.result(0).frame_id == 5
+
+
+@pytest.mark.parametrize('demand_mode', [False, True])
+def test_wrapper_trigger_resolves_with_the_frame_record(demand_mode):
+    wrapper = EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                            toJpg=False, copyImage=True, maxWidth=0, driverPath=ROOT, objectDetection=False,
+                            options={'demand_mode': demand_mode})
+    sim = EveSimSDK(SyntheticFrames(width=320, height=240, users=3, frames=5), fps=100)
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=sim)
+        assert wrapper.wait_for_frame(timeout=5) is not None
+        frame_id = wrapper.get_frame_id()
+        # As tapp does in demand mode: an image subscriber makes every frame carry its image
+        subscription = wrapper.subscribe(fields=('image',)) if demand_mode else None
+        record = wrapper.wait_until(where('pipeline_data.user_count', '==', 3), timeout=5, after_id=frame_id)
+        if subscription is not None:
+            subscription.close()
+    finally:
+        wrapper.stop()
+    assert record.frame_id > frame_id
+    assert record.parsed()['pipeline_data']['user_count'] == 3
+    # The image published with the metadata that satisfied the trigger
+    assert record.image_view is not None
+    assert record.image_view.frame_id == record.frame_id
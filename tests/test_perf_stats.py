@@ -0,0 +1,66 @@
+import os
+
+from eve_sim import EveSimSDK, SyntheticFrames
+from eve_wrapper_ext import EveWrapperExt
+from perf_stats import BUCKETS, PerfStats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_percentiles_are_bucket_upper_bounds():
+    perf = PerfStats(enabled=True)
+    # 90 samples in [512, 1024) ns, 9 in [8192, 16384) and one in [2**20, 2**21)
+    for ns in [600] * 90 + [10000] * 9 + [1500000]:
+        perf.record('stage', ns)
+    stats = perf.snapshot()['stage']
+    assert stats['count'] == 100
+    assert stats['p50_us'] == 1.024
+    assert stats['p90_us'] == 1.024
+    assert stats['p99_us'] == 16.384
+    assert stats['max_us'] == 1500.0
+    assert stats['mean_us'] == (600 * 90 + 10000 * 9 + 1500000) / 100 / 1000
+    assert stats['buckets'] == [[1 << 10, 90], [1 << 14, 9], [1 << 21, 1]]
+
+
+def test_long_durations_land_in_the_last_bucket():
+    perf = PerfStats()
+    perf.record('stage', 1 << 60)
+    assert perf.snapshot()['stage']['buckets'] == [[1 << (BUCKETS - 1), 1]]
+
+
+def test_disabled_timing_records_nothing():
+    perf = PerfStats()
+    start = perf.start()
+    assert start == 0
+    assert perf.lap('stage', start) == 0
+    perf.enabled = True
+    # A section started while timing was off is not recorded either
+    assert perf.lap('stage', start) == 0
+    start = perf.start()
+    assert perf.lap('stage', start) >= start
+    assert perf.snapshot()['stage']['count'] == 1
+
+
+def test_reset():
+    perf = PerfStats(enabled=True)
+    perf.record('stage', 100)
+    perf.reset()
+    assert perf.snapshot() == {}
+
+
+def test_wrapper_stages_are_timed_when_enabled():
+    wrapper = EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                            toJpg=False, copyImage=True, maxWidth=0, driverPath=ROOT, objectDetection=False,
+                            options={'perf_stats': True})
+    sim = EveSimSDK(SyntheticFrames(width=320, height=240, users=1, frames=3), fps=100)
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=sim)
+        assert wrapper.wait_for_frame(after_id=3, timeout=5) is not None
+        wrapper.set_perf_enabled(False)
+        stats = wrapper.get_perf_stats()
+        assert {'read_metadata', 'get_image', 'cvtColor', 'publish'} <= set(stats)
+        wrapper.reset_perf_stats()
+        assert wrapper.wait_for_frame(after_id=wrapper.get_frame_id() + 2, timeout=5) is not None
+        assert wrapper.get_perf_stats() == {}
+    finally:
+        wrapper.stop()
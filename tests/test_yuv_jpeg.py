@@ -0,0 +1,69 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from eve_sim import EveSimSDK, SyntheticFrames, synthetic_image
+from eve_wrapper_ext import EveWrapperExt
+from yuv_jpeg import YuvJpegEncoder, available_yuv_encoders
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENCODERS = available_yuv_encoders()
+
+needs_encoder = pytest.mark.skipif(not ENCODERS, reason='no YUV JPEG backend installed')
+
+
+def _decode(data):
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def _wrapper(**options):
+    return EveWrapperExt(comport=0, i2cAdapter=0, i2cDevice=0x30, i2cIRQ=26, pipelineVersion=0, evePath=ROOT,
+                         toJpg=True, copyImage=True, maxWidth=160, driverPath=ROOT, objectDetection=False,
+                         options=options)
+
+
+def test_unknown_encoder():
+    with pytest.raises(ValueError):
+        YuvJpegEncoder('libjpeg')
+
+
+@needs_encoder
+@pytest.mark.parametrize('name', ENCODERS)
+def test_planes_are_encoded_without_colour_conversion(name):
+    yuyv = synthetic_image(320, 240, 2, 0)
+    encoder = YuvJpegEncoder(name)
+    for _ in range(2):
+        # JPEG stores full-range YCbCr: decoding gives back the camera's Y, U and V values
+        ycrcb = cv2.cvtColor(_decode(encoder.encode(yuyv)), cv2.COLOR_BGR2YCrCb).astype(int)
+        assert np.abs(ycrcb[:, :, 0] - yuyv[:, :, 0]).mean() < 2
+        assert np.abs(ycrcb[:, 0::2, 2] - yuyv[:, 0::2, 1]).mean() < 2
+        assert np.abs(ycrcb[:, 1::2, 1] - yuyv[:, 1::2, 1]).mean() < 2
+
+
+def test_yuv_jpeg_needs_the_yuv_colour_path():
+    with pytest.raises(ValueError):
+        _wrapper(yuv_jpeg=ENCODERS[0] if ENCODERS else 'simplejpeg')
+
+
+@needs_encoder
+def test_wrapper_encodes_jpegs_from_the_kept_yuyv_frame():
+    wrapper = _wrapper(color_path='yuv', yuv_jpeg=ENCODERS[0])
+    encoder = wrapper._jpeg_cache._yuvEncoder
+    encoded = []
+    encode = encoder.encode
+    encoder.encode = lambda yuyv: encoded.append(yuyv.shape) or encode(yuyv)
+    sim = EveSimSDK(SyntheticFrames(width=320, height=240, users=1, frames=3), fps=100)
+    try:
+        wrapper.init(useMetadataCamera=False, sdkBackend=sim)
+        assert wrapper.wait_for_frame(timeout=5) is not None
+        record = wrapper.get_frame_record()
+        image = record.image_view
+        assert image.yuv.shape == (120, 160, 2)
+        assert image.yuv.frame_id == image.frame_id
+        decoded = _decode(record.jpeg())
+    finally:
+        wrapper.stop()
+    assert decoded.shape == image.shape
+    assert encoded == [(120, 160, 2)]